@@ -1,26 +1,49 @@
 from flask import Flask
 
-from app.config import Config, ProductionConfig
-from .extensions import db, migrate, api
-from app.main import aquarium_bp
+from app.config import Config
+from .extensions import db, migrate, api, compress, replica_router, reading_cache, catalog_cache, \
+    rate_limiter, purger, change_log
+from .lazy import LazyRoutes
+from app.commands import dataset_cli, purge_cli, changes_cli
+# models register their tables on db.metadata, which create_all, migrations and the dataset commands rely on
+from app.main import models  # noqa: F401
 
 
 def create_app(settings=Config):
     app = Flask(__name__)
     app.config.from_object(settings)
 
-    initialize_blueprints(app)
     initialize_extensions(app)
+    initialize_commands(app)
+    # blueprints and resources are registered before the first request, see LazyRoutes
+    app.wsgi_app = LazyRoutes(app, initialize_blueprints)
     return app
 
 
 def initialize_blueprints(app):
+    from app.main import aquarium_bp, register_resources
+    register_resources()
     app.register_blueprint(aquarium_bp)
+    api.init_app(app)
     return None
 
 
 def initialize_extensions(app):
     db.init_app(app)
-    migrate.init_app(app, db, render_as_batch=True)
-    api.init_app(app)
+    # the search tables and indexes of the names are created by raw DDL, see app.main.models.name_search_ddl
+    migrate.init_app(app, db, render_as_batch=True, include_object=models.include_in_migrations)
+    compress.init_app(app)
+    replica_router.init_app(app)
+    reading_cache.init_app(app)
+    catalog_cache.init_app(app)
+    rate_limiter.init_app(app)
+    purger.init_app(app)
+    change_log.init_app(app)
+    return None
+
+
+def initialize_commands(app):
+    app.cli.add_command(dataset_cli)
+    app.cli.add_command(purge_cli)
+    app.cli.add_command(changes_cli)
     return None
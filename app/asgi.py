@@ -0,0 +1,223 @@
+""" ASGI entry point with an asynchronous read path.
+
+GET requests of the list and single resource endpoints are served by the asynchronous controllers on an
+sqlalchemy asyncio engine, so a single process can wait on many slow queries at once. All other requests, including
+name searches, are passed to the flask application. Reads go to the replica bind like on the synchronous path (see
+ReplicaRouter) and the responses are compressed by the Compress extension. Requires an asyncio database driver
+(aiosqlite or aiomysql), asgiref for the fallback to the flask application and an ASGI server, e.g.
+``uvicorn run_async_app:app``.
+"""
+import json
+import re
+from urllib.parse import parse_qs
+
+from flask_restful import marshal
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from werkzeug.exceptions import HTTPException
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+from app import create_app
+from app.config import Config
+from app.extensions import compress
+from app.replica import ReplicaRouter, REPLICA_BIND
+from app.http_status_codes import HttpStatus as Status
+from app.main.resources.resource_fields import Fields
+from app.main.resources.controller import make_order_by, ResponseContent, IdListContent
+from app.main.resources.async_controller import AsyncAquariumController, AsyncTemperatureController, \
+    AsyncChemicalController, AsyncFertilizerController, AsyncFertilizationController
+from app.main.api_parser import ParserFactory
+
+# asyncio drivers for the database dialects of the synchronous configuration
+_async_drivers = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql'
+}
+
+_route = re.compile(r'^/(?P<resource>aquariums|temperatures|chemicals|fertilizers|fertilization)'
+                    r'(?:/(?P<resource_id>\d+))?/?$')
+
+parser_factory = ParserFactory()
+
+
+class AsyncResource:
+    """
+    Data class that describes how to parse, select and marshal a resource on the asynchronous read path.
+    """
+    def __init__(self, parser_name, controller, resource_field, filters=None):
+        """
+        :param parser_name: Name of the ParserFactory method for the resource.
+        :param controller: Asynchronous controller of the resource.
+        :param resource_field: Marshal field dict of a single resource.
+        :param filters: Query parameter names mapped to the filter arguments of the controller.
+        """
+        self.parser_name = parser_name
+        self.controller = controller
+        self.resource_field = resource_field
+        self.filters = filters or {}
+
+
+_time_range_filters = {'from': 'from_timestamp', 'to': 'to_timestamp'}
+
+_resources = {
+    'aquariums': AsyncResource('aquarium_parser', AsyncAquariumController(), Fields.aquarium_field),
+    'temperatures': AsyncResource('temperature_parser', AsyncTemperatureController(), Fields.temperature_field,
+                                  dict(_time_range_filters, **{'aquarium-id': 'aquarium_id'})),
+    'chemicals': AsyncResource('chemical_parser', AsyncChemicalController(), Fields.chemical_field,
+                               {'fertilizer-id': 'fertilizer_id'}),
+    'fertilizers': AsyncResource('fertilizer_parser', AsyncFertilizerController(), Fields.fertilizer_field,
+                                 {'chemical-id': 'chemical_id'}),
+    'fertilization': AsyncResource('fertilization_parser', AsyncFertilizationController(),
+                                   Fields.fertilization_field,
+                                   dict(_time_range_filters, **{'aquarium-id': 'aquarium_id'})),
+}
+
+
+def async_database_uri(database_uri):
+    """
+    :param database_uri: Database uri of a synchronous driver, e.g. sqlite:///app.db
+    :return: Database uri of the asyncio driver for the same database, e.g. sqlite+aiosqlite:///app.db
+    """
+    dialect, location = database_uri.split('://', 1)
+    return '{}://{}'.format(_async_drivers.get(dialect, dialect), location)
+
+
+class AsyncReadApp:
+    """
+    ASGI application that serves GET requests of the resources asynchronously and passes everything else to the
+    flask application.
+    """
+    def __init__(self, flask_app, fallback=None):
+        """
+        :param flask_app: Flask application used for configuration, argument parsing, marshalling and fallback.
+        :param fallback: ASGI application for requests that are not served asynchronously.
+        """
+        self.flask_app = flask_app
+        self.fallback = fallback
+        config = flask_app.config
+        database_uri = config.get('SQLALCHEMY_ASYNC_DATABASE_URI') or \
+            async_database_uri(config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(database_uri)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.replica_engine = None
+        self.replica_session_factory = None
+        if ReplicaRouter.has_replica(flask_app):
+            self.replica_engine = create_async_engine(async_database_uri(config['SQLALCHEMY_BINDS'][REPLICA_BIND]))
+            self.replica_session_factory = sessionmaker(self.replica_engine, class_=AsyncSession,
+                                                        expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        match = _route.match(scope['path']) if scope['type'] == 'http' else None
+        # name searches use the full text tables of the synchronous controllers
+        if match and scope['method'] in ('GET', 'HEAD') and \
+                'q' not in parse_qs(scope['query_string'].decode('latin-1')):
+            status, content = await self.get(scope, match.group('resource'), match.group('resource_id'))
+            return await self._send_response(send, self._make_response(scope, status, content),
+                                             head=scope['method'] == 'HEAD')
+
+        if self.fallback is not None:
+            return await self.fallback(scope, receive, send)
+        return await self._send_json(send, Status.not_found_404,
+                                     json.dumps({'message': 'Resource not found'}).encode('utf-8'))
+
+    async def get(self, scope, resource_name, resource_id=None):
+        """
+        Serves a GET request of a list or single resource.
+
+        :return: Tuple of the HTTP status code and the marshalled content.
+        """
+        resource = _resources[resource_name]
+        with self._request_context(scope):
+            if resource_id:
+                parser = parser_factory.fields_parser(resource.resource_field)
+            else:
+                parser = getattr(parser_factory, resource.parser_name)('get')
+            try:
+                args = parser.parse_args()
+            except HTTPException as error:
+                return error.code, getattr(error, 'data', {'message': error.description})
+            # the X-Read-Your-Writes header and the read_primary_until cookie read from the primary
+            session_factory = self.replica_session_factory \
+                if ReplicaRouter.routes_to_replica(self.flask_app) else self.session_factory
+
+        fields = args['fields']
+        controller = resource.controller
+        async with session_factory() as session:
+            if resource_id:
+                content = await controller.get_by_id(session, int(resource_id), fields=fields)
+                if not content:
+                    return Status.not_found_404, {'message': 'Resource not found'}
+                marshal_field = Fields.select(resource.resource_field, fields)
+            elif args['ids']:
+                content, missing_ids = await controller.get_by_ids(session, args['ids'], fields=fields)
+                content = IdListContent(content, missing_ids)
+                marshal_field = Fields.select_id_list(resource.resource_field, fields)
+            else:
+                filters = {name: args[arg] for arg, name in resource.filters.items()}
+                page = args['page']
+                items_per_page = self.flask_app.config['ITEMS_PER_PAGE']
+                items = await controller.get_multiple(session, make_order_by(args['order-by']), page=page,
+                                                      items_per_page=items_per_page, fields=fields, **filters)
+                total_results = await controller.count_all(session, **filters)
+                content = ResponseContent(items, page, items_per_page, total_results)
+                marshal_field = Fields.select_list(resource.resource_field, fields)
+
+        with self._request_context(scope):
+            return Status.ok_200, marshal(content, marshal_field)
+
+    def _request_context(self, scope):
+        # flask request context for reqparse, url generation of the marshalled fields, replica routing and compression
+        return self.flask_app.test_request_context(scope['path'], method=scope['method'],
+                                                   query_string=scope['query_string'],
+                                                   headers=[(k.decode('latin-1'), v.decode('latin-1'))
+                                                            for k, v in scope.get('headers', [])])
+
+    def _make_response(self, scope, status, content):
+        body = json.dumps(content).encode('utf-8') + b'\n'
+        with self._request_context(scope):
+            return compress.after_request(self.flask_app.response_class(body, status, mimetype='application/json'))
+
+    @staticmethod
+    async def _send_response(send, response, head=False):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in response.headers]
+        })
+        await send({'type': 'http.response.body', 'body': b'' if head else response.get_data()})
+
+    @staticmethod
+    async def _send_json(send, status, body, head=False):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                if self.replica_engine is not None:
+                    await self.replica_engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(settings=Config):
+    flask_app = create_app(settings)
+    # marshalling builds urls outside of the flask request handling
+    flask_app.wsgi_app.load()
+    fallback = WsgiToAsgi(flask_app) if WsgiToAsgi is not None else None
+    return AsyncReadApp(flask_app, fallback)
@@ -0,0 +1,121 @@
+""" Catalog cache module. The catalog cache extension is initialized in app/__init__.py"""
+import threading
+import time
+
+from flask import current_app
+
+
+class Catalog:
+    """
+    Snapshot of all chemicals, fertilizers and the ingredients of the fertilizers. A catalog is not changed after it
+    was built, so requests can read it without locking.
+    """
+    def __init__(self, version, chemicals, fertilizers, ingredients):
+        """
+        :param version: Version of the catalog cache the snapshot was built for.
+        :param chemicals: List of (id, name) tuples ordered by name.
+        :param fertilizers: List of (id, name) tuples ordered by name.
+        :param ingredients: List of (fertilizer id, chemical id) tuples.
+        """
+        self.version = version
+        self.created = time.monotonic()
+        # dicts keep the name order of the rows
+        self.chemical_names = dict(chemicals)
+        self.fertilizer_names = dict(fertilizers)
+        self.chemical_ids = {fertilizer_id: [] for fertilizer_id in self.fertilizer_names}
+        self.fertilizer_ids = {chemical_id: set() for chemical_id in self.chemical_names}
+        for fertilizer_id, chemical_id in ingredients:
+            if fertilizer_id in self.chemical_ids and chemical_id in self.fertilizer_ids:
+                self.chemical_ids[fertilizer_id].append(chemical_id)
+                self.fertilizer_ids[chemical_id].add(fertilizer_id)
+
+    def chemicals(self, fertilizer_id=None):
+        """
+        :param fertilizer_id: Only chemicals of this fertilizer when set.
+        :return: List of chemical ids ordered by name.
+        """
+        if fertilizer_id is None:
+            return list(self.chemical_names)
+        ingredients = set(self.chemical_ids.get(fertilizer_id, ()))
+        return [i for i in self.chemical_names if i in ingredients]
+
+    def fertilizers(self, chemical_id=None):
+        """
+        :param chemical_id: Only fertilizers that contain this chemical when set.
+        :return: List of fertilizer ids ordered by name.
+        """
+        if chemical_id is None:
+            return list(self.fertilizer_names)
+        fertilizer_ids = self.fertilizer_ids.get(chemical_id, set())
+        return [i for i in self.fertilizer_names if i in fertilizer_ids]
+
+
+class CatalogCache:
+    """
+    Flask extension that keeps the chemicals, fertilizers and their ingredients in process memory.
+
+    Writes of the process rebuild the catalog and increase its version, a catalog loaded by a concurrent read before
+    the write is not stored. The catalog is also rebuilt after CATALOG_CACHE_TTL seconds, which picks up changes of
+    other processes.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOG_CACHE_ENABLED', True)
+        app.config.setdefault('CATALOG_CACHE_TTL', 60)
+        app.extensions['catalog_cache'] = _CatalogStore()
+
+    @staticmethod
+    def _store():
+        return current_app.extensions['catalog_cache']
+
+    def get(self, load):
+        """
+        :param load: Function that selects the chemical rows, fertilizer rows and ingredient rows, see Catalog.
+        :return: Current catalog. None when the catalog cache is disabled.
+        """
+        config = current_app.config
+        if not config['CATALOG_CACHE_ENABLED']:
+            return None
+
+        catalog = self._store().catalog
+        if catalog is not None and time.monotonic() - catalog.created < config['CATALOG_CACHE_TTL']:
+            return catalog
+        return self._build(load)
+
+    def refresh(self, load):
+        """
+        Rebuilds the catalog after a committed write of chemicals or fertilizers.
+        """
+        if not current_app.config['CATALOG_CACHE_ENABLED']:
+            return
+
+        store = self._store()
+        with store.lock:
+            store.version += 1
+            store.catalog = None
+        self._build(load)
+
+    def _build(self, load):
+        store = self._store()
+        with store.lock:
+            version = store.version
+        catalog = Catalog(version, *load())
+
+        with store.lock:
+            # rows loaded before a write of another thread are outdated, they are used for the current request only
+            if store.version == version:
+                store.catalog = catalog
+        return catalog
+
+
+class _CatalogStore:
+    """
+    Catalog of an app and its version.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.catalog = None
@@ -0,0 +1,18 @@
+""" Change log module. The change log extension is initialized in app/__init__.py"""
+
+
+class ChangeLog:
+    """
+    Flask extension that configures the change log of GET /changes. The entries are written at commit by the session
+    events in app/main/models.py and deleted by ``flask changes compact``.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # days the entries are kept, cursors of older requests are answered with 410 Gone
+        app.config.setdefault('CHANGES_RETENTION_DAYS', 30)
+        # compaction keeps only the latest entry of each resource
+        app.config.setdefault('CHANGES_COMPACTION', True)
+        app.extensions['change_log'] = self
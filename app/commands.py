@@ -0,0 +1,180 @@
+""" Flask CLI commands. Commands are registered in app/__init__.py"""
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.extensions import db
+
+_formats = ('jsonl', 'csv')
+
+dataset_cli = AppGroup('dataset', help='Export and import the content of all tables.')
+purge_cli = AppGroup('purge', help='Delete soft deleted aquariums.')
+changes_cli = AppGroup('changes', help='Maintain the change log of /changes.')
+
+
+def _table_path(directory, table, file_format):
+    return os.path.join(directory, '{}.{}'.format(table.name, file_format))
+
+
+def _to_text(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _from_text(column, value):
+    """
+    Converts a value read from a file into the python type of the column.
+    """
+    if value is None or value == '':
+        return None
+    # dialect variants (e.g. DateTime with microseconds on mysql) are decorators of the generic type
+    python_type = getattr(column.type, 'impl', column.type).python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+class _Progress:
+    """
+    Reports processed rows and rows per second of a table.
+    """
+    def __init__(self, table_name, action):
+        self.table_name = table_name
+        self.action = action
+        self.rows = 0
+        self.start = time.perf_counter()
+
+    def add(self, rows):
+        self.rows += rows
+        self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed > 0 else 0
+        click.echo('{} {}: {} rows, {:.0f} rows/s'.format(self.action, self.table_name, self.rows, rate))
+
+
+def _write_rows(file, table, partitions, file_format, progress):
+    column_names = [c.name for c in table.columns]
+    if file_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(column_names)
+        for rows in partitions:
+            writer.writerows([_to_text(v) for v in row] for row in rows)
+            progress.add(len(rows))
+    else:
+        for rows in partitions:
+            file.writelines(json.dumps(dict(zip(column_names, map(_to_text, row)))) + '\n' for row in rows)
+            progress.add(len(rows))
+
+
+def _read_rows(file, file_format):
+    if file_format == 'csv':
+        return csv.DictReader(file)
+    return (json.loads(line) for line in file if line.strip())
+
+
+def _chunks(rows, table, chunk_size):
+    columns = {c.name: c for c in table.columns}
+    chunk = []
+    for row in rows:
+        chunk.append({name: _from_text(columns[name], value) for name, value in row.items() if name in columns})
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@dataset_cli.command('export')
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(_formats), default='jsonl', show_default=True)
+@click.option('--chunk-size', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Number of rows fetched from the database at once.')
+def export_dataset(directory, file_format, chunk_size):
+    """Write every table to DIRECTORY as one JSON Lines or CSV file per table."""
+    os.makedirs(directory, exist_ok=True)
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        for table in db.metadata.sorted_tables:
+            progress = _Progress(table.name, 'exported')
+            result = connection.execute(table.select().order_by(*table.primary_key.columns))
+            with open(_table_path(directory, table, file_format), 'w', newline='', encoding='utf-8') as file:
+                _write_rows(file, table, result.partitions(chunk_size), file_format, progress)
+            if not progress.rows:
+                progress.report()
+
+
+@dataset_cli.command('import')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(_formats), default='jsonl', show_default=True)
+@click.option('--chunk-size', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Number of rows inserted with a single statement.')
+@click.option('--replace', is_flag=True, help='Delete all existing rows before importing.')
+def import_dataset(directory, file_format, chunk_size, replace):
+    """Load the table files in DIRECTORY in foreign key order within one transaction."""
+    tables = db.metadata.sorted_tables
+    with db.engine.begin() as connection:
+        if replace:
+            for table in reversed(tables):
+                connection.execute(table.delete())
+
+        for table in tables:
+            path = _table_path(directory, table, file_format)
+            if not os.path.exists(path):
+                click.echo('skipped {}: {} not found'.format(table.name, path))
+                continue
+
+            progress = _Progress(table.name, 'imported')
+            with open(path, newline='', encoding='utf-8') as file:
+                for chunk in _chunks(_read_rows(file, file_format), table, chunk_size):
+                    connection.execute(table.insert(), chunk)
+                    progress.add(len(chunk))
+            if not progress.rows:
+                progress.report()
+
+
+@purge_cli.command('resume')
+def resume_purge_jobs():
+    """Run the purge jobs that are pending, failed or were interrupted by the end of their process."""
+    # the resources and controllers are only imported when needed, see app.main.register_resources
+    from app.main.models import PurgeJob
+    from app.main.resources.controller import PurgeJobController
+
+    controller = PurgeJobController()
+    for job in controller.get_unfinished():
+        click.echo('purging aquarium {} (job {})'.format(job.aquarium_id, job.id))
+        try:
+            controller.run(job.id)
+        except Exception as error:
+            click.echo('job {} failed: {}'.format(job.id, error))
+            continue
+        job = controller.get_by_id(job.id)
+        if job.status != PurgeJob.DONE:
+            click.echo('job {} is running in another process'.format(job.id))
+            continue
+        click.echo('deleted {} temperatures, {} fertilization and {} water changes'.format(
+            job.deleted_temperatures, job.deleted_fertilization, job.deleted_water_changes))
+
+
+@changes_cli.command('compact')
+@click.option('--retention-days', type=click.IntRange(min=0), default=None,
+              help='Days the entries are kept, CHANGES_RETENTION_DAYS when not set.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=10000, show_default=True,
+              help='Number of entries deleted in one transaction.')
+def compact_changes(retention_days, chunk_size):
+    """Delete expired change log entries and, with CHANGES_COMPACTION, the older entries of each resource."""
+    from app.main.resources.controller import ChangeLogController
+
+    config = current_app.config
+    if retention_days is None:
+        retention_days = config['CHANGES_RETENTION_DAYS']
+    expired, superseded = ChangeLogController().compact(retention_days, config['CHANGES_COMPACTION'], chunk_size)
+    click.echo('deleted {} expired and {} superseded entries'.format(expired, superseded))
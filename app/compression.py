@@ -0,0 +1,93 @@
+""" Response compression module. The compress extension is initialized in app/__init__.py"""
+import zlib
+
+from flask import request, current_app
+
+try:
+    # optional faster codec, only offered when installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# gzip container for zlib.compressobj
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class Compress:
+    """
+    Flask extension that compresses responses depending on the Accept-Encoding request header.
+
+    Supports gzip and zstd (when the zstandard package is installed). Responses smaller than COMPRESS_MIN_SIZE
+    are sent uncompressed. Streamed responses (e.g. generator responses) are compressed chunk by chunk.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_ZSTD_LEVEL', 3)
+        # octet-stream is the npy export, arrow streams are compressed per record batch
+        app.config.setdefault('COMPRESS_MIMETYPES', ['application/json', 'application/x-ndjson', 'text/csv',
+                                                     'text/plain', 'text/html', 'application/octet-stream',
+                                                     'application/vnd.apache.arrow.stream'])
+        app.after_request(self.after_request)
+
+    @staticmethod
+    def available_encodings():
+        """
+        :return: Supported content encodings ordered by server preference.
+        """
+        if zstandard is not None:
+            return ['zstd', 'gzip']
+        return ['gzip']
+
+    def after_request(self, response):
+        config = current_app.config
+
+        if not config['COMPRESS_ENABLED'] or response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if response.status_code < 200 or response.status_code in (204, 304) or \
+                'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+            return response
+
+        encoding = request.accept_encodings.best_match(self.available_encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # size is unknown, compress the chunks while they are sent
+            chunks = response.iter_encoded()
+            if hasattr(response.response, 'close'):
+                response.call_on_close(response.response.close)
+            response.response = self._compress_stream(chunks, self._compressor(encoding, config))
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            compressor = self._compressor(encoding, config)
+            response.set_data(compressor.compress(data) + compressor.flush())
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compressor(encoding, config):
+        if encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=config['COMPRESS_ZSTD_LEVEL']).compressobj()
+        return zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, _GZIP_WBITS)
+
+    @staticmethod
+    def _compress_stream(chunks, compressor):
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
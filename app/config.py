@@ -7,9 +7,45 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'secret_placeholder'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(base_dir, 'app.db')
+    # optional read replica for GET requests, e.g. a copy of the sqlite file for local testing
+    SQLALCHEMY_BINDS = {'replica': os.environ['DATABASE_REPLICA_URL']} \
+        if os.environ.get('DATABASE_REPLICA_URL') else {}
+    # seconds a client reads from the primary after a write
+    REPLICA_STICKY_SECONDS = 5
+    # database of the asynchronous read path (app/asgi.py), derived from SQLALCHEMY_DATABASE_URI when not set
+    SQLALCHEMY_ASYNC_DATABASE_URI = os.environ.get('DATABASE_ASYNC_URL')
     # disable signal feature of flask-sqlalchemy about every change in the database
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     ITEMS_PER_PAGE = 5
+    # compress responses from COMPRESS_MIN_SIZE bytes on, gzip level from 1 (fastest) to 9 (smallest)
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    # newest temperatures cached per aquarium, total number of cached temperatures and seconds until reloading them
+    READING_CACHE_SIZE = 100
+    READING_CACHE_MAX_READINGS = 100000
+    READING_CACHE_TTL = 60
+    # seconds until the cached chemicals and fertilizers are loaded again, writes of the process reload them at once
+    CATALOG_CACHE_TTL = 60
+    # token buckets of POST /temperatures, /temperatures/batch, /fertilization and /batch: requests per second and
+    # burst
+    RATELIMIT_CLIENT_RATE = 10
+    RATELIMIT_CLIENT_BURST = 100
+    RATELIMIT_AQUARIUM_RATE = 5
+    RATELIMIT_AQUARIUM_BURST = 50
+    # request header that identifies a client (e.g. X-Sensor-Id), the client address when not set
+    RATELIMIT_CLIENT_HEADER = os.environ.get('RATELIMIT_CLIENT_HEADER')
+    # sqlite file to share the limits between the worker processes of a host, process memory when not set
+    RATELIMIT_STORAGE_PATH = os.environ.get('RATELIMIT_STORAGE_PATH')
+    # seconds /readyz waits for a database connection and SELECT 1
+    READINESS_TIMEOUT = 2
+    # rows of a deleted aquarium purged per transaction and seconds between the transactions
+    PURGE_CHUNK_SIZE = 1000
+    PURGE_CHUNK_PAUSE = 0.05
+    # seconds without progress after which a running purge job is resumed by flask purge resume
+    PURGE_RUNNING_TIMEOUT = 600
+    # days change log entries are kept and whether older entries of a resource are compacted
+    CHANGES_RETENTION_DAYS = 30
+    CHANGES_COMPACTION = True
 
 
 class ProductionConfig:
@@ -19,8 +55,31 @@ class ProductionConfig:
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD')
     MYSQL_DB = os.environ.get('MYSQL_DB')
     SQLALCHEMY_DATABASE_URI = 'mysql://{}:{}@{}/{}'.format(MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST, MYSQL_DB)
+    MYSQL_REPLICA_HOST = os.environ.get('MYSQL_REPLICA_HOST')
+    SQLALCHEMY_BINDS = {
+        'replica': 'mysql://{}:{}@{}/{}'.format(MYSQL_USER, MYSQL_PASSWORD, MYSQL_REPLICA_HOST, MYSQL_DB)
+    } if MYSQL_REPLICA_HOST else {}
+    REPLICA_STICKY_SECONDS = 5
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     ITEMS_PER_PAGE = 5
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    READING_CACHE_SIZE = 100
+    READING_CACHE_MAX_READINGS = 100000
+    READING_CACHE_TTL = 60
+    CATALOG_CACHE_TTL = 60
+    RATELIMIT_CLIENT_RATE = 10
+    RATELIMIT_CLIENT_BURST = 100
+    RATELIMIT_AQUARIUM_RATE = 5
+    RATELIMIT_AQUARIUM_BURST = 50
+    RATELIMIT_CLIENT_HEADER = os.environ.get('RATELIMIT_CLIENT_HEADER')
+    RATELIMIT_STORAGE_PATH = os.environ.get('RATELIMIT_STORAGE_PATH')
+    READINESS_TIMEOUT = 2
+    PURGE_CHUNK_SIZE = 1000
+    PURGE_CHUNK_PAUSE = 0.05
+    PURGE_RUNNING_TIMEOUT = 600
+    CHANGES_RETENTION_DAYS = 30
+    CHANGES_COMPACTION = True
 
 
 class TestConfig:
@@ -29,3 +88,5 @@ class TestConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
     ITEMS_PER_PAGE = 5
+    RATELIMIT_ENABLED = False
+    READINESS_TIMEOUT = 2
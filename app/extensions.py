@@ -1,8 +1,22 @@
 """ Extension module. Extensions are initialized in app/__init__.py"""
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_restful import Api
 
-db = SQLAlchemy()
-migrate = Migrate()
+from app.compression import Compress
+from app.replica import RoutingSQLAlchemy, ReplicaRouter
+from app.lazy import LazyMigrate
+from app.reading_cache import ReadingCache
+from app.catalog_cache import CatalogCache
+from app.ratelimit import RateLimiter
+from app.purge import Purger
+from app.change_log import ChangeLog
+
+db = RoutingSQLAlchemy()
+migrate = LazyMigrate()
 api = Api()
+compress = Compress()
+replica_router = ReplicaRouter()
+reading_cache = ReadingCache()
+catalog_cache = CatalogCache()
+rate_limiter = RateLimiter()
+purger = Purger()
+change_log = ChangeLog()
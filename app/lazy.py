@@ -0,0 +1,104 @@
+""" Lazy loading module. Keeps the startup of short-lived processes (flask db upgrade, CLI jobs, test workers) cheap by
+deferring imports that only some processes need. Used in app/__init__.py and app/extensions.py"""
+import threading
+
+from werkzeug.routing import Map
+
+
+class LazyMigrate:
+    """
+    Replacement for flask_migrate.Migrate that imports Flask-Migrate (and alembic) only when a migration command
+    accesses the migrate configuration of the app.
+    """
+    def __init__(self, app=None, db=None, directory='migrations', **kwargs):
+        self.db = db
+        self.directory = directory
+        self.kwargs = kwargs
+        if app is not None and db is not None:
+            self.init_app(app, db, directory)
+
+    def init_app(self, app, db=None, directory=None, **kwargs):
+        kwargs = dict(self.kwargs, **kwargs)
+        app.extensions['migrate'] = _LazyMigrateConfig(app, db or self.db, directory or self.directory, kwargs)
+
+
+class _LazyMigrateConfig:
+    """
+    Placeholder for the migrate configuration in app.extensions. Initializes Flask-Migrate on first attribute access,
+    which replaces the placeholder with the real configuration.
+    """
+    def __init__(self, app, db, directory, kwargs):
+        self._app = app
+        self._db = db
+        self._directory = directory
+        self._kwargs = kwargs
+        self._config = None
+
+    def __getattr__(self, name):
+        if self._config is None:
+            from flask_migrate import Migrate
+            Migrate(self._app, self._db, self._directory, **self._kwargs)
+            self._config = self._app.extensions['migrate']
+        return getattr(self._config, name)
+
+
+class LazyRoutes:
+    """
+    WSGI middleware that registers the routes of an app before the first request is handled, so the resources
+    are not imported by processes that never handle a request. The url map of the app registers them as well when it
+    is read outside of a request, e.g. by url_for in an app context, ``flask routes`` or app.url_map in
+    ``flask shell``.
+    """
+    def __init__(self, app, register_routes):
+        """
+        :param app: Flask application.
+        :param register_routes: Function that registers all blueprints and resources of the app.
+        """
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.register_routes = register_routes
+        self.loaded = False
+        self._lock = threading.Lock()
+        app.url_map = _LazyRoutesMap(app.url_map, self.load)
+
+    def load(self):
+        with self._lock:
+            if not self.loaded:
+                self.register_routes(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+class _LazyRoutesMap(Map):
+    """
+    Url map that calls load before its rules are read or it is bound to build or match urls.
+    """
+    def __init__(self, url_map, load):
+        """
+        :param url_map: Url map created by the app, its rules (e.g. the static route) are copied.
+        :param load: Function that registers the routes of the app.
+        """
+        super().__init__(host_matching=url_map.host_matching)
+        self._load = load
+        for rule in url_map.iter_rules():
+            self.add(rule.empty())
+
+    def iter_rules(self, endpoint=None):
+        self._load()
+        return super().iter_rules(endpoint)
+
+    def is_endpoint_expecting(self, endpoint, *arguments):
+        self._load()
+        return super().is_endpoint_expecting(endpoint, *arguments)
+
+    def bind(self, *args, **kwargs):
+        self._load()
+        return super().bind(*args, **kwargs)
+
+    def bind_to_environ(self, *args, **kwargs):
+        self._load()
+        return super().bind_to_environ(*args, **kwargs)
@@ -1,19 +1,46 @@
 from flask import Blueprint
 
 from app.extensions import api
-from app.main.resources import AquariumResource, AquariumListResource, TemperatureResource, TemperatureListResource, \
-    ChemicalResource, ChemicalListResource, FertilizerResource, FertilizerListResource, FertilizationResource, \
-    FertilizationListResource
 
 aquarium_bp = Blueprint('aquarium_bp', __name__)
 
-api.add_resource(AquariumListResource, '/aquariums',)
-api.add_resource(AquariumResource, '/aquariums/<string:aquarium_id>')
-api.add_resource(TemperatureListResource, '/temperatures')
-api.add_resource(TemperatureResource, '/temperatures/<string:temperature_id>')
-api.add_resource(ChemicalListResource, '/chemicals')
-api.add_resource(ChemicalResource, '/chemicals/<string:chemical_id>')
-api.add_resource(FertilizerListResource, '/fertilizers')
-api.add_resource(FertilizerResource, '/fertilizers/<string:fertilizer_id>')
-api.add_resource(FertilizationListResource, '/fertilization')
-api.add_resource(FertilizationResource, '/fertilization/<string:fertilization_id>')
+
+def register_resources():
+    """
+    Imports the resources and adds them to the api. Called when the routes of an app are registered, so the
+    resources, parsers and controllers are not imported by processes that never handle a request.
+    """
+    if api.resources:
+        # resources are kept by the global api and registered on every app in api.init_app
+        return
+
+    from app.main.resources import AquariumResource, AquariumListResource, AquariumSummaryResource, \
+        TemperatureResource, TemperatureListResource, TemperatureBatchResource, ChemicalResource, \
+        ChemicalListResource, FertilizerResource, FertilizerListResource, FertilizationResource, \
+        FertilizationListResource, HealthResource, ReadinessResource, TemperatureStatisticsResource, \
+        TemperatureExportResource, FertilizationExportResource, BatchResource, PurgeJobResource, ChangeListResource, \
+        WaterChangeResource, WaterChangeListResource, NutrientResource
+
+    api.add_resource(AquariumListResource, '/aquariums',)
+    api.add_resource(AquariumSummaryResource, '/aquariums/summary')
+    api.add_resource(AquariumResource, '/aquariums/<string:aquarium_id>')
+    api.add_resource(NutrientResource, '/aquariums/<string:aquarium_id>/nutrients')
+    api.add_resource(TemperatureListResource, '/temperatures')
+    api.add_resource(TemperatureBatchResource, '/temperatures/batch')
+    api.add_resource(TemperatureStatisticsResource, '/temperatures/statistics')
+    api.add_resource(TemperatureExportResource, '/temperatures/export')
+    api.add_resource(TemperatureResource, '/temperatures/<string:temperature_id>')
+    api.add_resource(ChemicalListResource, '/chemicals')
+    api.add_resource(ChemicalResource, '/chemicals/<string:chemical_id>')
+    api.add_resource(FertilizerListResource, '/fertilizers')
+    api.add_resource(FertilizerResource, '/fertilizers/<string:fertilizer_id>')
+    api.add_resource(FertilizationListResource, '/fertilization')
+    api.add_resource(FertilizationExportResource, '/fertilization/export')
+    api.add_resource(FertilizationResource, '/fertilization/<string:fertilization_id>')
+    api.add_resource(WaterChangeListResource, '/water-changes')
+    api.add_resource(WaterChangeResource, '/water-changes/<string:water_change_id>')
+    api.add_resource(PurgeJobResource, '/purge-jobs/<string:job_id>')
+    api.add_resource(BatchResource, '/batch')
+    api.add_resource(ChangeListResource, '/changes')
+    api.add_resource(HealthResource, '/healthz')
+    api.add_resource(ReadinessResource, '/readyz')
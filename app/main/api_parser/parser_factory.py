@@ -3,6 +3,7 @@ from flask_restful import inputs
 
 from .request_validator import Validator as Val
 from app.main.resources.controller import OrderBy
+from app.main.resources.resource_fields import Fields
 
 #  allowed request types for parsing
 _request_types = {
@@ -22,6 +23,11 @@ _order_by_liter = OrderBy('liter')
 _order_by_date = OrderBy('date')
 _order_by_celsius = OrderBy('celsius')
 _order_by_amount = OrderBy('amount')
+_order_by_avg = OrderBy('avg')
+_order_by_min = OrderBy('min')
+_order_by_max = OrderBy('max')
+_order_by_readings = OrderBy('readings')
+_order_by_fertilizer = OrderBy('fertilizer')
 
 
 class ParserFactory:
@@ -32,6 +38,16 @@ class ParserFactory:
     def __init__(self, bundle_errors=True):
         self.parser = RequestParser(bundle_errors=bundle_errors)
 
+    def fields_parser(self, resource_field):
+        """
+        Creates a parser for single resource GET requests which only accepts the fields argument.
+
+        :param resource_field: Marshal field dict of the requested resource.
+        """
+        parser = self.parser.copy()
+        parser.add_argument(name='fields', type=Val.fields(resource_field), required=False, location='args')
+        return parser
+
     def aquarium_parser(self, request_type):
         parser = self.parser.copy()
         verify_request_type(request_type)
@@ -41,10 +57,15 @@ class ParserFactory:
                                 help='Unknown order-by parameter. Valid choices are {}'.format(choices),
                                 default=choices[0])
             parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.aquarium_field), required=False,
+                                location='args')
+            # name search, ordered by relevance instead of order-by
+            parser.add_argument(name='q', type=Val.search, required=False, location='args')
         else:
             # add arguments for patch/post requests
             parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
-            parser.add_argument(name='name', type=str, required=True, location='json')
+            parser.add_argument(name='name', type=Val.aquarium_name, required=True, location='json')
             parser.add_argument(name='volume_in_liter', type=Val.volume, required=True, location='json')
 
         if request_type == 'post':
@@ -60,6 +81,11 @@ class ParserFactory:
             parser.add_argument(name='order-by', choices=choices, required=False, location='args', default=choices[0])
             parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
             parser.add_argument(name='aquarium-id', type=inputs.positive, required=False, location='args')
+            parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.temperature_field), required=False,
+                                location='args')
         else:
             # add arguments for patch/post requests
             parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
@@ -68,7 +94,88 @@ class ParserFactory:
 
         if request_type == 'post':
             parser.remove_argument('id')
+            # measurement time of the sensor, the time of the request when not set
+            parser.add_argument(name='timestamp', type=Val.timestamp, required=False, location='json')
+
+        return parser
+
+    def temperature_batch_parser(self):
+        """
+        Creates a parser for uploads of multiple temperature measurements with client timestamps.
+        """
+        parser = self.parser.copy()
+        parser.add_argument(name='temperatures', type=Val.temperature_batch, required=True, location='json')
+        return parser
 
+    def batch_parser(self):
+        """
+        Creates a parser for batches of create, update and delete operations executed in one transaction.
+        """
+        parser = self.parser.copy()
+        parser.add_argument(name='operations', type=Val.batch_operations, required=True, location='json')
+        return parser
+
+    def water_change_parser(self, request_type):
+        parser = self.parser.copy()
+        verify_request_type(request_type)
+        if request_type == 'get':
+            choices = _order_by_liter.get_choices() + _order_by_date.get_choices()
+            parser.add_argument(name='order-by', choices=choices, required=False, location='args', default=choices[0])
+            parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
+            parser.add_argument(name='aquarium-id', type=inputs.positive, required=False, location='args')
+            parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.water_change_field), required=False,
+                                location='args')
+        else:
+            # add arguments for patch/post requests
+            parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
+            parser.add_argument(name='liter_amount', type=inputs.positive, required=True, location='json')
+            parser.add_argument(name='aquarium_id', type=Val.aquarium_id, required=True, location='json')
+
+        if request_type == 'post':
+            parser.remove_argument('id')
+            # time of the water change, the time of the request when not set
+            parser.add_argument(name='timestamp', type=Val.timestamp, required=False, location='json')
+
+        return parser
+
+    def change_parser(self):
+        """
+        Creates a parser for the change log with keyset pagination.
+        """
+        parser = self.parser.copy()
+        # cursor of the next page from the previous response, the first request gets the cursor of the latest change
+        parser.add_argument(name='since', type=Val.change_cursor, required=False, location='args')
+        parser.add_argument(name='items-per-page', type=Val.items_per_page, required=False, location='args')
+        return parser
+
+    def temperature_statistics_parser(self):
+        """
+        Creates a parser for temperature statistics of an aquarium and time range.
+        """
+        parser = self.parser.copy()
+        parser.add_argument(name='aquarium-id', type=inputs.positive, required=False, location='args')
+        parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+        parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
+        parser.add_argument(name='bins', type=Val.histogram_bins, required=False, location='args', default=40)
+        # target range of the time in range percentages
+        parser.add_argument(name='low', type=Val.temperature_limit, required=False, location='args', default=24.0)
+        parser.add_argument(name='high', type=Val.temperature_limit, required=False, location='args', default=28.0)
+        return parser
+
+    def export_parser(self):
+        """
+        Creates a parser for columnar exports of the temperature and fertilization series.
+        """
+        parser = self.parser.copy()
+        choices = ('npy', 'arrow')
+        parser.add_argument(name='format', choices=choices, required=False, location='args', default=choices[0],
+                            help='Unknown export format. Valid choices are {}'.format(choices))
+        parser.add_argument(name='aquarium-id', type=inputs.positive, required=False, location='args')
+        parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+        parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
         return parser
 
     def chemical_parser(self, request_type):
@@ -79,6 +186,11 @@ class ParserFactory:
             parser.add_argument(name='order-by', choices=choices, required=False, location='args', default=choices[0])
             parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
             parser.add_argument(name='fertilizer-id', type=inputs.positive, required=False, location='args')
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.chemical_field), required=False,
+                                location='args')
+            # name search, ordered by relevance instead of order-by
+            parser.add_argument(name='q', type=Val.search, required=False, location='args')
         else:
             # add arguments for patch/post requests
             parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
@@ -97,6 +209,11 @@ class ParserFactory:
             parser.add_argument(name='order-by', choices=choices, required=False, location='args', default=choices[0])
             parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
             parser.add_argument(name='chemical-id', type=inputs.positive, required=False, location='args')
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.fertilizer_field), required=False,
+                                location='args')
+            # name search, ordered by relevance instead of order-by
+            parser.add_argument(name='q', type=Val.search, required=False, location='args')
         else:
             # add arguments for patch/post requests
             parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
@@ -108,6 +225,23 @@ class ParserFactory:
 
         return parser
 
+    def aquarium_summary_parser(self):
+        """
+        Creates a parser for the temperature and fertilization summary of all aquariums with keyset pagination.
+        """
+        parser = self.parser.copy()
+        choices = _order_by_name.get_choices() + _order_by_avg.get_choices() + _order_by_min.get_choices() + \
+            _order_by_max.get_choices() + _order_by_readings.get_choices() + _order_by_fertilizer.get_choices()
+        parser.add_argument(name='order-by', choices=choices, required=False, location='args',
+                            help='Unknown order-by parameter. Valid choices are {}'.format(choices),
+                            default=choices[0])
+        parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+        parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
+        # cursor of the next page from the previous response
+        parser.add_argument(name='after', type=Val.cursor, required=False, location='args')
+        parser.add_argument(name='items-per-page', type=Val.items_per_page, required=False, location='args')
+        return parser
+
     def fertilization_parser(self, request_type):
         parser = self.parser.copy()
         verify_request_type(request_type)
@@ -116,6 +250,11 @@ class ParserFactory:
             parser.add_argument(name='order-by', choices=choices, required=False, location='args', default=choices[0])
             parser.add_argument(name='page', type=inputs.positive, required=False, location='args', default=1)
             parser.add_argument(name='aquarium-id', type=inputs.positive, required=False, location='args')
+            parser.add_argument(name='from', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='to', type=Val.timestamp, required=False, location='args')
+            parser.add_argument(name='ids', type=Val.id_list, required=False, location='args')
+            parser.add_argument(name='fields', type=Val.fields(Fields.fertilization_field), required=False,
+                                location='args')
         else:
             # add arguments for patch/post requests
             parser.add_argument(name='id', type=inputs.positive, required=True, location='json')
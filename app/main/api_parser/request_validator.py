@@ -1,8 +1,23 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+
+import aniso8601
+
 from app.main.models import Aquarium, Fertilizer, Chemical
+from app.replica import ReplicaRouter
 
 
 MAX_TEMPERATURE = 40
 MIN_TEMPERATURE = 0
+MAX_IDS = 100
+MAX_BATCH_TEMPERATURES = 1000
+MAX_BATCH_OPERATIONS = 100
+MAX_HISTOGRAM_BINS = 400
+MAX_ITEMS_PER_PAGE = 100
+# length of the name columns
+MAX_SEARCH_LENGTH = 64
 
 
 class Validator:
@@ -23,6 +38,34 @@ class Validator:
             return True
         return False
 
+    @staticmethod
+    def temperature_limit(value):
+        """
+        Parses a temperature of a query argument.
+        """
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError('Invalid temperature {}'.format(value))
+        return Validator.temperature(value)
+
+    @staticmethod
+    def histogram_bins(value):
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError('Number of histogram bins must be an integer.')
+        if not 0 < value <= MAX_HISTOGRAM_BINS:
+            raise ValueError('Number of histogram bins must be between 1 and {}.'.format(MAX_HISTOGRAM_BINS))
+        return value
+
+    @staticmethod
+    def aquarium_name(value):
+        value = str(value)
+        if value.startswith(Aquarium.DELETED_NAME_PREFIX):
+            raise ValueError('Aquarium names can not start with {!r}.'.format(Aquarium.DELETED_NAME_PREFIX))
+        return value
+
     @staticmethod
     def volume(value):
         if not Validator._is_valid_volume(value):
@@ -35,6 +78,26 @@ class Validator:
             return True
         return False
 
+    @staticmethod
+    def timestamp(value):
+        """
+        Parses an ISO 8601 date or date time. Date times with time zone are converted to naive UTC like the stored
+        timestamps, dates are interpreted as midnight UTC.
+        """
+        if not isinstance(value, str):
+            raise ValueError('Invalid ISO 8601 date time {}'.format(value))
+        try:
+            if 'T' in value:
+                timestamp = aniso8601.parse_datetime(value)
+            else:
+                timestamp = datetime.combine(aniso8601.parse_date(value), datetime.min.time())
+        except ValueError:
+            raise ValueError('Invalid ISO 8601 date time {}'.format(value))
+
+        if timestamp.tzinfo:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return timestamp
+
     @staticmethod
     def aquarium_id(value):
         if not Validator._is_valid_aquarium_id(value):
@@ -45,8 +108,11 @@ class Validator:
     def _is_valid_aquarium_id(value):
         if isinstance(value, int):
             if value > 0:
+                # referenced rows can be missing on the replica shortly after they were created
+                ReplicaRouter.use_primary()
                 aquarium = Aquarium.query.get(value)
-                if aquarium:
+                # soft deleted aquariums are purged in the background
+                if aquarium and aquarium.deleted_timestamp is None:
                     return True
         return False
 
@@ -60,6 +126,7 @@ class Validator:
     def _is_valid_fertilizer_id(value):
         if isinstance(value, int):
             if value > 0:
+                ReplicaRouter.use_primary()
                 fertilizer = Fertilizer.query.get(value)
                 if fertilizer:
                     return True
@@ -75,6 +142,7 @@ class Validator:
     def _is_valid_chemical_id(value):
         if isinstance(value, int):
             if value > 0:
+                ReplicaRouter.use_primary()
                 chemical = Chemical.query.get(value)
                 if chemical:
                     return True
@@ -87,5 +155,152 @@ class Validator:
                 raise ValueError('At least one invalid chemical id.')
         return value
 
+    @staticmethod
+    def id_list(value):
+        """
+        Parses a comma separated list of positive ids. Duplicates are removed, the order is kept.
+        """
+        try:
+            ids = [int(i) for i in value.split(',') if i.strip()]
+        except ValueError:
+            raise ValueError('Ids must be a comma separated list of integers.')
+        if not ids or any(i <= 0 for i in ids):
+            raise ValueError('Ids must be positive integers.')
+
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_IDS:
+            raise ValueError('At most {} ids can be requested at once.'.format(MAX_IDS))
+        return ids
+
+    @staticmethod
+    def items_per_page(value):
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError('Number of items per page must be an integer.')
+        if not 0 < value <= MAX_ITEMS_PER_PAGE:
+            raise ValueError('Number of items per page must be between 1 and {}.'.format(MAX_ITEMS_PER_PAGE))
+        return value
+
+    @staticmethod
+    def search(value):
+        value = value.strip()
+        if not 0 < len(value) <= MAX_SEARCH_LENGTH:
+            raise ValueError('Search must have between 1 and {} characters.'.format(MAX_SEARCH_LENGTH))
+        return value
+
+    @staticmethod
+    def cursor(value):
+        """
+        Parses a keyset pagination cursor created by controller.encode_cursor.
+
+        :return: Tuple of the order by string, the from and to datetimes (or None), the sort value (None if the row
+                 had none) and the id of the last row of the previous page.
+        """
+        try:
+            order_by, from_timestamp, to_timestamp, sort_value_missing, sort_value, last_id = \
+                json.loads(base64.urlsafe_b64decode(value.encode()))
+            from_timestamp = datetime.fromisoformat(from_timestamp) if from_timestamp is not None else None
+            to_timestamp = datetime.fromisoformat(to_timestamp) if to_timestamp is not None else None
+        except (binascii.Error, UnicodeError, ValueError, TypeError):
+            raise ValueError('Invalid cursor {}'.format(value))
+        if sort_value_missing is True:
+            valid_sort_value = sort_value is None
+        else:
+            valid_sort_value = sort_value_missing is False and isinstance(sort_value, (str, int, float)) and \
+                not isinstance(sort_value, bool)
+        if not isinstance(order_by, str) or not valid_sort_value or not isinstance(last_id, int) or \
+                isinstance(last_id, bool):
+            raise ValueError('Invalid cursor {}'.format(value))
+        return order_by, from_timestamp, to_timestamp, sort_value, last_id
+
+    @staticmethod
+    def change_cursor(value):
+        """
+        Parses a change log cursor created by controller.encode_change_cursor.
+
+        :return: Tuple of the id of the last entry the client received and the datetime up to which it received all.
+        """
+        try:
+            last_id, timestamp = json.loads(base64.urlsafe_b64decode(value.encode()))
+            timestamp = datetime.fromisoformat(timestamp)
+        except (binascii.Error, UnicodeError, ValueError, TypeError):
+            raise ValueError('Invalid cursor {}'.format(value))
+        if not isinstance(last_id, int) or isinstance(last_id, bool) or last_id < 0:
+            raise ValueError('Invalid cursor {}'.format(value))
+        return last_id, timestamp
 
+    @staticmethod
+    def temperature_batch(value):
+        """
+        Validates a list of temperature measurements with celsius, timestamp and aquarium_id. The existence of the
+        aquariums is checked for the whole batch by the resource.
+
+        :return: List of dicts with temperature, timestamp and aquarium_id.
+        """
+        if not isinstance(value, list) or not value:
+            raise ValueError('Temperatures must be a non empty list.')
+        if len(value) > MAX_BATCH_TEMPERATURES:
+            raise ValueError('At most {} temperatures can be uploaded at once.'.format(MAX_BATCH_TEMPERATURES))
+
+        temperatures = []
+        for item in value:
+            if not isinstance(item, dict):
+                raise ValueError('Temperatures must be objects with celsius, timestamp and aquarium_id.')
+            celsius = item.get('celsius')
+            if not isinstance(celsius, (int, float)) or isinstance(celsius, bool):
+                raise ValueError('Invalid temperature {}'.format(celsius))
+            aquarium_id = item.get('aquarium_id')
+            if not isinstance(aquarium_id, int) or isinstance(aquarium_id, bool) or aquarium_id <= 0:
+                raise ValueError('Invalid aquarium id {}'.format(aquarium_id))
+            temperatures.append({
+                'temperature': Validator.temperature(celsius),
+                'timestamp': Validator.timestamp(item.get('timestamp')),
+                'aquarium_id': aquarium_id
+            })
+        return temperatures
+
+    @staticmethod
+    def batch_operations(value):
+        """
+        Validates a list of operations with method (POST, PATCH or DELETE), path and an optional JSON object body.
+        The paths and bodies are validated by the resources when the operations are executed.
+
+        :return: List of dicts with method, path and body.
+        """
+        if not isinstance(value, list) or not value:
+            raise ValueError('Operations must be a non empty list.')
+        if len(value) > MAX_BATCH_OPERATIONS:
+            raise ValueError('At most {} operations can be executed at once.'.format(MAX_BATCH_OPERATIONS))
+
+        operations = []
+        for item in value:
+            if not isinstance(item, dict):
+                raise ValueError('Operations must be objects with method, path and body.')
+            method = item.get('method')
+            if not isinstance(method, str) or method.upper() not in ('POST', 'PATCH', 'DELETE'):
+                raise ValueError('Invalid method {}, valid methods are POST, PATCH and DELETE.'.format(method))
+            path = item.get('path')
+            if not isinstance(path, str) or not path.startswith('/'):
+                raise ValueError('Invalid path {}'.format(path))
+            body = item.get('body')
+            if body is not None and not isinstance(body, dict):
+                raise ValueError('Body of {} {} must be an object.'.format(method, path))
+            operations.append({'method': method.upper(), 'path': path, 'body': body})
+        return operations
+
+    @staticmethod
+    def fields(resource_field):
+        """
+        Creates a validator for a comma separated list of field names of a resource field.
 
+        :param resource_field: Marshal field dict of a resource, e.g. Fields.aquarium_field.
+        :return: Validator which returns the list of requested field names.
+        """
+        def validate(value):
+            names = [name.strip() for name in value.split(',') if name.strip()]
+            unknown = [name for name in names if name not in resource_field]
+            if not names or unknown:
+                raise ValueError('Unknown fields {}. Valid fields are {}'.format(unknown, list(resource_field)))
+            return names
+        return validate
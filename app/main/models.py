@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
 from app import db
 
 """
@@ -8,9 +10,14 @@ This module contains all sqlalchemy models and contains all data altering method
 
 
 class Aquarium(db.Model):
+    # names of soft deleted aquariums, which releases the name at once, names of new aquariums can not start with it
+    DELETED_NAME_PREFIX = '~deleted '
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, index=True, nullable=False)
     volume_in_liter = db.Column(db.Integer, nullable=False)
+    # set when the aquarium is hidden until its purge job deleted it, see PurgeJob
+    deleted_timestamp = db.Column(db.DateTime)
     temperature_measurements = db.relationship('AquariumTemperature',
                                                backref='aquarium',
                                                cascade='all, delete',
@@ -19,20 +26,25 @@ class Aquarium(db.Model):
                                     backref='aquarium',
                                     cascade='all, delete',
                                     lazy='dynamic')
+    water_changes = db.relationship('WaterChange',
+                                    backref='aquarium',
+                                    cascade='all, delete',
+                                    lazy='dynamic')
+    nutrients = db.relationship('NutrientEstimate',
+                                uselist=False,
+                                cascade='all, delete-orphan')
+    # loaded with the aquarium in the same query
+    stats = db.relationship('AquariumStats',
+                            uselist=False,
+                            cascade='all, delete-orphan',
+                            lazy='joined')
 
     def update_attributes(self, name=None, volume_in_liter=None):
-        if name and self.is_name_available(name):
+        if name:
             self.name = name
         if volume_in_liter:
             self.volume_in_liter = volume_in_liter
 
-    @staticmethod
-    def is_name_available(name):
-        aquarium = Aquarium.query.filter(Aquarium.name == name).first()
-        if aquarium:
-            return False
-        return True
-
     def add_temperature(self, temperature):
         self.temperature_measurements.append(temperature)
 
@@ -42,14 +54,24 @@ class Aquarium(db.Model):
     def add_water_change(self, water_change):
         self.water_changes.append(water_change)
 
+    def soft_delete(self):
+        self.deleted_timestamp = datetime.utcnow()
+        self.name = '{}{}'.format(Aquarium.DELETED_NAME_PREFIX, self.id)
+
     def __repr__(self):
         return '<Aquarium {}:{}, {} liter>'.format(self.id, self.name, self.volume_in_liter)
 
 
 class AquariumTemperature(db.Model):
+    # time range queries per aquarium, one measurement per aquarium and timestamp for idempotent uploads
+    __table_args__ = (db.Index('ix_aquarium_temperature_aquarium_id_timestamp', 'aquarium_id', 'timestamp',
+                               unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     temperature = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    # microseconds on mysql as well, so measurements within a second are distinct
+    timestamp = db.Column(db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'), index=True,
+                          default=datetime.utcnow)
     aquarium_id = db.Column(db.Integer, db.ForeignKey('aquarium.id'), nullable=False)
 
     def update_attributes(self, celsius=None, aquarium_id=None):
@@ -61,11 +83,54 @@ class AquariumTemperature(db.Model):
     def __repr__(self):
         return '<Aquarium_temp {} in AID {}:{}:{}>'.format(self.id, self.aquarium_id, self.celsius, self.timestamp)
 
+    @staticmethod
+    def insert_ignore_duplicates(temperatures):
+        """
+        Inserts temperature measurements with a single statement per aquarium. Measurements with the aquarium id and
+        timestamp of an existing measurement are skipped, so uploads can be retried. Updates the aquarium stats.
+
+        :param temperatures: List of dicts with temperature, timestamp and aquarium_id.
+        :return: Dict of aquarium ids to the number of inserted measurements.
+        """
+        table = AquariumTemperature.__table__
+        dialect = db.engine.dialect.name
+        if dialect == 'mysql':
+            # the row count of on duplicate key update includes found rows with the mysql client flags of sqlalchemy
+            statement = mysql.insert(table).prefix_with('IGNORE')
+        else:
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(table).on_conflict_do_nothing(index_elements=['aquarium_id', 'timestamp'])
+
+        by_aquarium = {}
+        for temperature in temperatures:
+            by_aquarium.setdefault(temperature['aquarium_id'], []).append(temperature)
+
+        def select_ids(aquarium_id, rows):
+            return set(db.session.execute(db.select(AquariumTemperature.id).where(
+                AquariumTemperature.aquarium_id == aquarium_id,
+                AquariumTemperature.timestamp.in_([row['timestamp'] for row in rows]))).scalars())
+
+        inserted = {}
+        new_ids = []
+        for aquarium_id, rows in by_aquarium.items():
+            # the statement does not return the ids, the change log gets the ids that were not there before
+            existing_ids = select_ids(aquarium_id, rows)
+            inserted[aquarium_id] = db.session.execute(statement, rows).rowcount
+            if inserted[aquarium_id]:
+                new_ids.extend(sorted(select_ids(aquarium_id, rows) - existing_ids))
+        update_aquarium_stats(db.session, {aquarium_id: {AquariumTemperature: count}
+                                           for aquarium_id, count in inserted.items() if count})
+        write_change_log(db.session, [('temperatures', i, ChangeLogEntry.CREATE) for i in new_ids])
+        return inserted
+
 
 class Fertilization(db.Model):
+    # time range queries per aquarium
+    __table_args__ = (db.Index('ix_fertilization_aquarium_id_timestamp', 'aquarium_id', 'timestamp'),)
+
     id = db.Column(db.Integer, primary_key=True)
     amount_in_milliliter = db.Column(db.Integer, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     aquarium_id = db.Column(db.Integer, db.ForeignKey('aquarium.id'), nullable=False)
     fertilizer_id = db.Column(db.Integer, db.ForeignKey('fertilizer.id'), nullable=False)
 
@@ -78,11 +143,29 @@ class Fertilization(db.Model):
                ''.format(self.id, self.amount_in_milliliter, self.aquarium_id, self.fertilizer_id)
 
 
+class WaterChange(db.Model):
+    # time range queries per aquarium
+    __table_args__ = (db.Index('ix_water_change_aquarium_id_timestamp', 'aquarium_id', 'timestamp'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    liter_amount = db.Column(db.Integer, nullable=False)
+    timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    aquarium_id = db.Column(db.Integer, db.ForeignKey('aquarium.id'), nullable=False)
+
+    def update_attributes(self, liter_amount):
+        if liter_amount:
+            self.liter_amount = liter_amount
+
+    def __repr__(self):
+        return '<WaterChange {}: {} liter, aquarium_id={}>'.format(self.id, self.liter_amount, self.aquarium_id)
+
+
+# the primary key serves lookups by fertilizer, the chemical_id index lookups by chemical
 fertilizer_ingredients = db.Table('fertilizer_ingredients',
                                   db.Column('fertilizer_id', db.Integer, db.ForeignKey('fertilizer.id'),
                                             primary_key=True),
                                   db.Column('chemical_id', db.Integer, db.ForeignKey('chemical.id'),
-                                            primary_key=True)
+                                            primary_key=True, index=True)
                                   )
 
 
@@ -100,23 +183,17 @@ class Fertilizer(db.Model):
                                     backref=db.backref('fertilizer', lazy=True)
                                     )
 
-    @staticmethod
-    def is_name_available(name):
-        fertilizer = Fertilizer.query.filter(Fertilizer.name == name).first()
-        if fertilizer:
-            return False
-        return True
-
     def update_attributes(self, name, chemical_ids):
-        if name and self.is_name_available(name):
-            self.name = name
-
+        # select chemicals before changing the name, so a name conflict is raised on commit and not by autoflush
         chemicals = []
         for i in chemical_ids:
             chemical = Chemical.query.get(i)
             if chemical:
                 chemicals.append(chemical)
 
+        if name:
+            self.name = name
+
         # remove chemicals when not in chemical list
         for c in self.chemicals:
             if c not in chemicals:
@@ -150,16 +227,9 @@ class Chemical(db.Model):
     name = db.Column(db.String(64), unique=True, nullable=False)
 
     def update_attributes(self, name):
-        if name and self.is_name_available(name):
+        if name:
             self.name = name
 
-    @staticmethod
-    def is_name_available(name):
-        chemical = Chemical.query.filter(Chemical.name == name).first()
-        if chemical:
-            return False
-        return True
-
     def get_associated_fertilizers(self):
         fertilizers = db.session.query(Fertilizer).\
             join(fertilizer_ingredients, (fertilizer_ingredients.c.fertilizer_id == Fertilizer.id)).\
@@ -167,4 +237,573 @@ class Chemical(db.Model):
         return fertilizers
 
     def __repr__(self):
-        return '<Chemical {}: {}>'.format(self.id, self.name)
\ No newline at end of file
+        return '<Chemical {}: {}>'.format(self.id, self.name)
+
+
+class AquariumStats(db.Model):
+    """
+    Statistics of the temperature measurements and fertilization of an aquarium. The statistics are updated within the
+    transaction that inserts, changes or deletes measurements and fertilization, see the session events below.
+    """
+    aquarium_id = db.Column(db.Integer, db.ForeignKey('aquarium.id'), primary_key=True)
+    temperature_count = db.Column(db.Integer, nullable=False, default=0)
+    latest_temperature = db.Column(db.Float)
+    latest_temperature_timestamp = db.Column(db.DateTime)
+    fertilization_count = db.Column(db.Integer, nullable=False, default=0)
+    latest_fertilization_timestamp = db.Column(db.DateTime)
+    # incremented by every change of the fertilization and water change history, see NutrientController.rebuild
+    nutrient_version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<AquariumStats AID {}: {} temperatures, {} fertilization>' \
+               ''.format(self.aquarium_id, self.temperature_count, self.fertilization_count)
+
+
+class PurgeJob(db.Model):
+    """
+    Deletion of a soft deleted aquarium. The rows of the aquarium are deleted in small chunks, each in a transaction of
+    its own, so ingest and reads of other aquariums are not blocked. The aquarium is deleted with the last chunk.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # no foreign key, the job outlives the aquarium
+    aquarium_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(16), nullable=False, default=PENDING)
+    deleted_temperatures = db.Column(db.Integer, nullable=False, default=0)
+    deleted_fertilization = db.Column(db.Integer, nullable=False, default=0)
+    deleted_water_changes = db.Column(db.Integer, nullable=False, default=0)
+    created_timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # set with every chunk, a running job without progress for PURGE_RUNNING_TIMEOUT seconds was interrupted
+    updated_timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_timestamp = db.Column(db.DateTime)
+    error = db.Column(db.String(255))
+
+    def delete_chunk(self, model, chunk_size):
+        """
+        Deletes up to chunk_size rows of a model of the aquarium, selected by the aquarium_id index.
+
+        :param model: Model with an aquarium_id column, a key of purged_models.
+        :return: Number of deleted rows.
+        """
+        ids = db.session.execute(db.select(model.id).where(model.aquarium_id == self.aquarium_id).
+                                 limit(chunk_size)).scalars().all()
+        if ids:
+            db.session.execute(db.delete(model.__table__).where(model.id.in_(ids)))
+            setattr(self, purged_models[model], getattr(self, purged_models[model]) + len(ids))
+        return len(ids)
+
+    def delete_aquarium(self):
+        """
+        Deletes the aquarium and its stats, together with rows added by requests that loaded the aquarium before it
+        was hidden.
+        """
+        for model, counter in purged_models.items():
+            result = db.session.execute(db.delete(model.__table__).where(model.aquarium_id == self.aquarium_id))
+            setattr(self, counter, getattr(self, counter) + result.rowcount)
+        invalidate_nutrient_estimates(db.session, [self.aquarium_id])
+        db.session.execute(db.delete(AquariumStats.__table__).where(AquariumStats.aquarium_id == self.aquarium_id))
+        db.session.execute(db.delete(Aquarium.__table__).where(Aquarium.id == self.aquarium_id))
+
+    def __repr__(self):
+        return '<PurgeJob {}: aquarium_id={}, status={}>'.format(self.id, self.aquarium_id, self.status)
+
+
+class NutrientEstimate(db.Model):
+    """
+    Estimated concentrations of the chemicals in an aquarium. Fertilization adds the dose per liter of aquarium
+    volume to the chemicals of the fertilizer, a water change dilutes all chemicals by the share of the volume that was
+    replaced. New fertilization and water changes are applied in their transaction by the session events below.
+    Changes of the history (e.g. a deleted fertilization) delete the estimate, the write request rebuilds it from the
+    history after its commit, see NutrientController.rebuild_invalidated.
+
+    Fertilizers have no amounts of their chemicals, so a concentration is the milliliters of fertilizer containing the
+    chemical per liter of aquarium water.
+    """
+    aquarium_id = db.Column(db.Integer, db.ForeignKey('aquarium.id'), primary_key=True)
+    # time of the latest fertilization or water change applied, later events are applied incrementally
+    timestamp = db.Column(db.DateTime)
+    concentrations = db.relationship('NutrientConcentration',
+                                     cascade='all, delete-orphan',
+                                     lazy='joined')
+
+    def __repr__(self):
+        return '<NutrientEstimate AID {}: {} chemicals at {}>'.format(self.aquarium_id, len(self.concentrations),
+                                                                     self.timestamp)
+
+
+class NutrientConcentration(db.Model):
+    aquarium_id = db.Column(db.Integer, db.ForeignKey('nutrient_estimate.aquarium_id'), primary_key=True)
+    chemical_id = db.Column(db.Integer, db.ForeignKey('chemical.id'), primary_key=True, index=True)
+    milliliter_per_liter = db.Column(db.Float, nullable=False, default=0.0)
+    chemical = db.relationship('Chemical', lazy='joined')
+
+    def __repr__(self):
+        return '<NutrientConcentration AID {}: chemical {} {} ml/l>'.format(self.aquarium_id, self.chemical_id,
+                                                                           self.milliliter_per_liter)
+
+
+class ChangeLogEntry(db.Model):
+    """
+    Create, update or delete of a resource, written in the transaction of the change by the session events below.
+    Clients sync by reading the entries after the last entry they have seen, see GET /changes.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    # compaction keeps the latest entry of a resource
+    __table_args__ = (db.Index('ix_change_log_entry_resource_resource_id', 'resource', 'resource_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    resource = db.Column(db.String(32), nullable=False)
+    resource_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(16), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, index=True, default=datetime.utcnow)
+
+    def __repr__(self):
+        return '<ChangeLogEntry {}: {} {} {}>'.format(self.id, self.action, self.resource, self.resource_id)
+
+
+class ChangeLogLock(db.Model):
+    """
+    Single row that transactions update before they insert their change log entries at commit. The row lock is held
+    until the commit, so entries get their ids in commit order and a client never skips entries of a transaction that
+    commits after it read a page. It serializes the commits of all writers, see the change feed in README.md. The row
+    is inserted with the table.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    commits = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<ChangeLogLock {}: {} commits>'.format(self.id, self.commits)
+
+
+# models whose changes are logged, mapped to the resource names of the change log entries
+change_log_models = {
+    Aquarium: 'aquariums',
+    AquariumTemperature: 'temperatures',
+    Chemical: 'chemicals',
+    Fertilizer: 'fertilizers',
+    Fertilization: 'fertilization',
+    WaterChange: 'water_changes'
+}
+
+# rows of an aquarium deleted by a purge job, mapped to the counter column of the job
+purged_models = {
+    AquariumTemperature: 'deleted_temperatures',
+    Fertilization: 'deleted_fertilization',
+    WaterChange: 'deleted_water_changes'
+}
+
+
+# models that are counted in the aquarium stats, mapped to the count column and the columns of the latest row
+_stats_models = {
+    AquariumTemperature: ('temperature_count', {
+        'latest_temperature': AquariumTemperature.temperature,
+        'latest_temperature_timestamp': AquariumTemperature.timestamp
+    }),
+    Fertilization: ('fertilization_count', {
+        'latest_fertilization_timestamp': Fertilization.timestamp
+    })
+}
+
+_STATS_CHANGES = 'aquarium_stats_changes'
+_STATS_DELETED_AQUARIUMS = 'aquarium_stats_deleted_aquariums'
+_CHANGE_LOG_ENTRIES = 'change_log_entries'
+_NUTRIENT_EVENTS = 'nutrient_events'
+_INVALIDATED_NUTRIENT_ESTIMATES = 'invalidated_nutrient_estimates'
+
+
+def _latest_value(model, column, aquarium_id):
+    return db.select(column).where(model.aquarium_id == aquarium_id).\
+        order_by(model.timestamp.desc(), model.id.desc()).limit(1).scalar_subquery()
+
+
+def _stats_values(model, aquarium_id, count):
+    """
+    :param model: Model counted in the aquarium stats.
+    :param aquarium_id: Aquarium id of the stats.
+    :param count: Value or sql expression of the new row count.
+    :return: Dict of aquarium stats column names to the new values for the model.
+    """
+    count_column, latest_columns = _stats_models[model]
+    values = {count_column: count}
+    for name, column in latest_columns.items():
+        values[name] = _latest_value(model, column, aquarium_id)
+    return values
+
+
+def update_aquarium_stats(session, changes):
+    """
+    Adds row count changes to the aquarium stats and refreshes their latest values with an index lookup.
+    Statements that bypass the session events (e.g. bulk inserts) call this after executing.
+
+    :param session: Session of the transaction that changed the rows.
+    :param changes: Dict of aquarium ids to dicts of changed models and the change of their row count.
+    """
+    stats_table = AquariumStats.__table__
+    for aquarium_id, model_changes in changes.items():
+        values = {}
+        for model, count_change in model_changes.items():
+            count_column = stats_table.c[_stats_models[model][0]]
+            values.update(_stats_values(model, aquarium_id, count_column + count_change))
+        result = session.execute(db.update(stats_table).where(stats_table.c.aquarium_id == aquarium_id).values(values))
+
+        if result.rowcount == 0:
+            # stats of aquariums created by bulk statements are created on the first change
+            values = {'aquarium_id': aquarium_id}
+            for model in _stats_models:
+                count = db.select(db.func.count()).select_from(model).\
+                    where(model.aquarium_id == aquarium_id).scalar_subquery()
+                values.update(_stats_values(model, aquarium_id, count))
+            session.execute(db.insert(stats_table).values(values))
+
+        stats = session.identity_map.get(session.identity_key(AquariumStats, aquarium_id))
+        if stats is not None:
+            session.expire(stats)
+
+
+def _add_stats_change(session, model, aquarium_id, count_change):
+    model_changes = session.info.setdefault(_STATS_CHANGES, {}).setdefault(aquarium_id, {})
+    model_changes[model] = model_changes.get(model, 0) + count_change
+
+
+@db.event.listens_for(db.session, 'before_flush')
+def _collect_stats_changes(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, Aquarium) and obj.stats is None:
+            obj.stats = AquariumStats(temperature_count=0, fertilization_count=0)
+
+    for obj in session.deleted:
+        if isinstance(obj, Aquarium):
+            session.info.setdefault(_STATS_DELETED_AQUARIUMS, set()).add(obj.id)
+        elif type(obj) in _stats_models:
+            _add_stats_change(session, type(obj), obj.aquarium_id, -1)
+
+    for obj in session.dirty:
+        if type(obj) not in _stats_models or not session.is_modified(obj):
+            continue
+        added, unchanged, deleted = db.inspect(obj).attrs.aquarium_id.history
+        if added and deleted:
+            # moved to another aquarium
+            _add_stats_change(session, type(obj), deleted[0], -1)
+            _add_stats_change(session, type(obj), added[0], 1)
+        else:
+            # refresh the latest values
+            _add_stats_change(session, type(obj), obj.aquarium_id, 0)
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def _collect_new_stats_rows(session, flush_context):
+    # foreign keys of new rows are set during the flush
+    for obj in session.new:
+        if type(obj) in _stats_models:
+            _add_stats_change(session, type(obj), obj.aquarium_id, 1)
+
+
+@db.event.listens_for(db.session, 'after_flush_postexec')
+def _apply_stats_changes(session, flush_context):
+    changes = session.info.pop(_STATS_CHANGES, {})
+    deleted_aquarium_ids = session.info.pop(_STATS_DELETED_AQUARIUMS, set())
+    update_aquarium_stats(session, {aquarium_id: model_changes for aquarium_id, model_changes in changes.items()
+                                    if aquarium_id not in deleted_aquarium_ids})
+
+
+def write_change_log(session, entries):
+    """
+    Adds change log entries to the entries written at commit. Statements that bypass the session events (e.g. bulk
+    inserts) call this after executing.
+
+    :param session: Session of the transaction that changed the rows.
+    :param entries: List of (resource name, resource id, action) tuples.
+    """
+    session.info.setdefault(_CHANGE_LOG_ENTRIES, []).extend(entries)
+
+
+def _has_changed_attributes(obj):
+    # columns and associations (e.g. the chemicals of a fertilizer), children like temperatures are logged themselves
+    state = db.inspect(obj)
+    return any(state.attrs[prop.key].history.has_changes() for prop in state.mapper.iterate_properties
+               if isinstance(prop, db.ColumnProperty) or getattr(prop, 'secondary', None) is not None)
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def _collect_change_log_entries(session, flush_context):
+    # ids of new rows are set and new, dirty and deleted still hold the objects of the flush
+    entries = session.info.setdefault(_CHANGE_LOG_ENTRIES, [])
+    deleted_aquarium_ids = {obj.id for obj in session.deleted if isinstance(obj, Aquarium)}
+    for obj in session.new:
+        if type(obj) in change_log_models:
+            entries.append((change_log_models[type(obj)], obj.id, ChangeLogEntry.CREATE))
+
+    for obj in session.dirty:
+        if type(obj) not in change_log_models or not _has_changed_attributes(obj):
+            continue
+        if isinstance(obj, Aquarium) and obj.deleted_timestamp is not None:
+            # soft deleted
+            if db.inspect(obj).attrs.deleted_timestamp.history.added:
+                entries.append(('aquariums', obj.id, ChangeLogEntry.DELETE))
+            continue
+        entries.append((change_log_models[type(obj)], obj.id, ChangeLogEntry.UPDATE))
+
+    for obj in session.deleted:
+        # readings of a deleted aquarium are deleted with it
+        if type(obj) in change_log_models and getattr(obj, 'aquarium_id', None) not in deleted_aquarium_ids:
+            entries.append((change_log_models[type(obj)], obj.id, ChangeLogEntry.DELETE))
+
+
+@db.event.listens_for(db.session, 'before_commit')
+def _write_change_log_entries(session):
+    session.flush()
+    entries = session.info.pop(_CHANGE_LOG_ENTRIES, [])
+    if not entries:
+        return
+    # locks the row until the commit, ids of entries committed later are higher than all ids visible before
+    lock = ChangeLogLock.__table__
+    session.execute(db.update(lock).where(lock.c.id == 1).values(commits=lock.c.commits + 1))
+    timestamp = datetime.utcnow()
+    session.execute(db.insert(ChangeLogEntry.__table__),
+                    [{'resource': resource, 'resource_id': resource_id, 'action': action, 'timestamp': timestamp}
+                     for resource, resource_id, action in entries])
+
+
+def fertilization_dose(amount_in_milliliter, volume_in_liter):
+    """
+    :return: Milliliters of fertilizer per liter of aquarium water added by a fertilization.
+    """
+    return amount_in_milliliter / volume_in_liter
+
+
+def water_change_factor(liter_amount, volume_in_liter):
+    """
+    :return: Share of the concentrations that remains after a water change.
+    """
+    # changing more water than the volume replaces all of it
+    return max(0.0, 1 - liter_amount / volume_in_liter)
+
+
+def _increment_nutrient_versions(session, aquarium_ids):
+    # rebuilds that read the history before this transaction committed do not store their estimate
+    stats_table = AquariumStats.__table__
+    session.execute(db.update(stats_table).where(stats_table.c.aquarium_id.in_(aquarium_ids)).
+                    values(nutrient_version=stats_table.c.nutrient_version + 1))
+
+
+def invalidate_nutrient_estimates(session, aquarium_ids):
+    """
+    Deletes nutrient estimates and remembers the aquariums, so their estimates are rebuilt after the commit, see
+    pop_invalidated_nutrient_estimates.
+
+    :param session: Session of the transaction that changed the history.
+    :param aquarium_ids: List or select of aquarium ids.
+    """
+    if not isinstance(aquarium_ids, list):
+        aquarium_ids = session.execute(aquarium_ids).scalars().all()
+    if not aquarium_ids:
+        return
+    session.info.setdefault(_INVALIDATED_NUTRIENT_ESTIMATES, set()).update(aquarium_ids)
+    _increment_nutrient_versions(session, aquarium_ids)
+    session.execute(db.delete(NutrientConcentration.__table__).
+                    where(NutrientConcentration.aquarium_id.in_(aquarium_ids)))
+    session.execute(db.delete(NutrientEstimate.__table__).where(NutrientEstimate.aquarium_id.in_(aquarium_ids)))
+
+
+def pop_invalidated_nutrient_estimates(session):
+    """
+    :return: Set of the ids of the aquariums whose nutrient estimates were deleted by the committed transactions.
+    """
+    return session.info.pop(_INVALIDATED_NUTRIENT_ESTIMATES, set())
+
+
+def _advance_nutrient_estimate(session, aquarium_id, timestamp):
+    """
+    Moves the nutrient estimate of an aquarium to the time of a new fertilization or water change. Events older than
+    the estimate can not be applied incrementally, the estimate is invalidated instead.
+
+    :return: Volume of the aquarium to apply the event with, None if the event is not applied.
+    """
+    _increment_nutrient_versions(session, [aquarium_id])
+    table = NutrientEstimate.__table__
+    result = session.execute(db.update(table).
+                             where(table.c.aquarium_id == aquarium_id,
+                                   db.or_(table.c.timestamp.is_(None), table.c.timestamp <= timestamp)).
+                             values(timestamp=timestamp))
+    if result.rowcount == 0:
+        # no estimate yet or an older event
+        invalidate_nutrient_estimates(session, [aquarium_id])
+        return None
+    return session.execute(db.select(Aquarium.volume_in_liter).where(Aquarium.id == aquarium_id)).scalar()
+
+
+def _apply_fertilization(session, fertilization):
+    volume = _advance_nutrient_estimate(session, fertilization.aquarium_id, fertilization.timestamp)
+    if volume is None:
+        return
+    table = NutrientConcentration.__table__
+    dose = fertilization_dose(fertilization.amount_in_milliliter, volume)
+    chemical_ids = session.execute(db.select(fertilizer_ingredients.c.chemical_id).
+                                   where(fertilizer_ingredients.c.fertilizer_id == fertilization.fertilizer_id)).\
+        scalars().all()
+    for chemical_id in chemical_ids:
+        result = session.execute(db.update(table).
+                                 where(table.c.aquarium_id == fertilization.aquarium_id,
+                                       table.c.chemical_id == chemical_id).
+                                 values(milliliter_per_liter=table.c.milliliter_per_liter + dose))
+        if result.rowcount == 0:
+            session.execute(db.insert(table).values(aquarium_id=fertilization.aquarium_id, chemical_id=chemical_id,
+                                                    milliliter_per_liter=dose))
+
+
+def _apply_water_change(session, water_change):
+    volume = _advance_nutrient_estimate(session, water_change.aquarium_id, water_change.timestamp)
+    if volume is None:
+        return
+    table = NutrientConcentration.__table__
+    factor = water_change_factor(water_change.liter_amount, volume)
+    session.execute(db.update(table).where(table.c.aquarium_id == water_change.aquarium_id).
+                    values(milliliter_per_liter=table.c.milliliter_per_liter * factor))
+
+
+# events of the nutrient estimates mapped to the functions that apply them
+_nutrient_events = {
+    Fertilization: _apply_fertilization,
+    WaterChange: _apply_water_change
+}
+
+
+@db.event.listens_for(db.session, 'before_flush')
+def _invalidate_changed_nutrient_history(session, flush_context, instances):
+    # the estimates of deleted aquariums are deleted with them
+    deleted_aquarium_ids = {obj.id for obj in session.deleted if isinstance(obj, Aquarium)}
+    aquarium_ids = set()
+    fertilizer_ids = set()
+    for obj in session.deleted:
+        if type(obj) in _nutrient_events:
+            aquarium_ids.add(obj.aquarium_id)
+        elif isinstance(obj, Fertilizer):
+            fertilizer_ids.add(obj.id)
+        elif isinstance(obj, Chemical):
+            # aquariums with an estimate of the chemical or fertilization that a rebuild would estimate it from
+            _increment_nutrient_versions(session, db.select(NutrientConcentration.aquarium_id).
+                                         where(NutrientConcentration.chemical_id == obj.id).
+                                         union(db.select(Fertilization.aquarium_id).
+                                               join(fertilizer_ingredients, fertilizer_ingredients.c.fertilizer_id ==
+                                                    Fertilization.fertilizer_id).
+                                               where(fertilizer_ingredients.c.chemical_id == obj.id)))
+            session.execute(db.delete(NutrientConcentration.__table__).
+                            where(NutrientConcentration.chemical_id == obj.id))
+
+    for obj in session.dirty:
+        if type(obj) in _nutrient_events and _has_changed_attributes(obj):
+            # moved events change the estimates of both aquariums
+            aquarium_ids.update(db.inspect(obj).attrs.aquarium_id.history.sum())
+        elif isinstance(obj, Aquarium) and db.inspect(obj).attrs.volume_in_liter.history.has_changes():
+            aquarium_ids.add(obj.id)
+        elif isinstance(obj, Fertilizer) and db.inspect(obj).attrs.chemicals.history.has_changes():
+            fertilizer_ids.add(obj.id)
+
+    aquarium_ids -= deleted_aquarium_ids
+    aquarium_ids.discard(None)
+    if aquarium_ids:
+        invalidate_nutrient_estimates(session, list(aquarium_ids))
+    if fertilizer_ids:
+        invalidate_nutrient_estimates(session, db.select(Fertilization.aquarium_id).
+                                      where(Fertilization.fertilizer_id.in_(fertilizer_ids)).distinct())
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def _collect_nutrient_events(session, flush_context):
+    # aquarium ids and timestamp defaults of new rows are set during the flush
+    events = session.info.setdefault(_NUTRIENT_EVENTS, [])
+    events.extend(obj for obj in session.new if type(obj) in _nutrient_events)
+
+
+@db.event.listens_for(db.session, 'after_flush_postexec')
+def _apply_nutrient_events(session, flush_context):
+    events = session.info.pop(_NUTRIENT_EVENTS, [])
+    for event in sorted(events, key=lambda e: (e.timestamp, e.id)):
+        _nutrient_events[type(event)](session, event)
+
+
+@db.event.listens_for(db.session, 'after_soft_rollback')
+def _discard_flush_changes(session, previous_transaction):
+    session.info.pop(_STATS_CHANGES, None)
+    session.info.pop(_STATS_DELETED_AQUARIUMS, None)
+    session.info.pop(_CHANGE_LOG_ENTRIES, None)
+    session.info.pop(_NUTRIENT_EVENTS, None)
+    session.info.pop(_INVALIDATED_NUTRIENT_ESTIMATES, None)
+
+
+def full_text_table(table_name):
+    """
+    :return: Name of the SQLite FTS5 table of the names of a table.
+    """
+    return '{}_fts'.format(table_name)
+
+
+def name_search_ddl(table_name, dialect_name):
+    """
+    Statements that create the search of the name column of a table. The database keeps the full text search in sync on
+    every write: SQLite by triggers that update an external content FTS5 table, MySQL by a FULLTEXT index. SQLite gets
+    a case insensitive index of the names for the prefix search as well, the collation of MySQL is case insensitive.
+
+    :param table_name: Name of a table with id and name columns.
+    :param dialect_name: SQLAlchemy dialect name.
+    :return: List of DDL statements, empty for databases without full text search.
+    """
+    fts = full_text_table(table_name)
+    if dialect_name == 'sqlite':
+        statements = [
+            "CREATE VIRTUAL TABLE {fts} USING fts5(name, content='{table}', content_rowid='id')",
+            "CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+            "INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+            "CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END",
+            "CREATE TRIGGER {fts}_update AFTER UPDATE OF name ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+            "INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+            "CREATE INDEX ix_{table}_name_nocase ON {table} (name COLLATE NOCASE)"
+        ]
+    elif dialect_name == 'mysql':
+        statements = ['CREATE FULLTEXT INDEX ix_{table}_name_fulltext ON {table} (name)']
+    else:
+        statements = []
+    return [statement.format(table=table_name, fts=fts) for statement in statements]
+
+
+name_search_tables = (Aquarium.__table__, Chemical.__table__, Fertilizer.__table__)
+
+
+def include_in_migrations(obj, name, type_, reflected, compare_to):
+    """
+    include_object hook of alembic autogenerate. Excludes the objects of name_search_ddl, which are not part of the
+    models, so autogenerate does not drop them: the FTS5 tables (and their shadow tables, e.g. aquarium_fts_data) and
+    the NOCASE and FULLTEXT indexes of the names.
+    """
+    if not reflected or compare_to is not None:
+        return True
+    for table in name_search_tables:
+        fts = full_text_table(table.name)
+        if type_ == 'table' and (name == fts or name.startswith(fts + '_')):
+            return False
+        if type_ == 'index' and name in ('ix_{}_name_nocase'.format(table.name),
+                                          'ix_{}_name_fulltext'.format(table.name)):
+            return False
+    return True
+
+
+# the row of the change log lock exists before the first commit, like in the migration
+db.event.listen(ChangeLogLock.__table__, 'after_create',
+                db.DDL('INSERT INTO change_log_lock (id, commits) VALUES (1, 0)'))
+
+# create_all and drop_all create and drop the search of the names, the migration has a copy of the DDL
+for _table in name_search_tables:
+    for _dialect_name in ('sqlite', 'mysql'):
+        for _statement in name_search_ddl(_table.name, _dialect_name):
+            db.event.listen(_table, 'after_create', db.DDL(_statement).execute_if(dialect=_dialect_name))
+    db.event.listen(_table, 'before_drop', db.DDL('DROP TABLE IF EXISTS {}'.format(full_text_table(_table.name))).
+                    execute_if(dialect='sqlite'))
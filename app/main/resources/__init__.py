@@ -1,3 +1,9 @@
-from .resources import AquariumResource, AquariumListResource, TemperatureResource, TemperatureListResource, \
-    ChemicalResource, ChemicalListResource, FertilizerResource, FertilizerListResource, FertilizationResource,\
-    FertilizationListResource
+from .resources import AquariumResource, AquariumListResource, AquariumSummaryResource, TemperatureResource, \
+    TemperatureListResource, TemperatureBatchResource, ChemicalResource, ChemicalListResource, FertilizerResource, \
+    FertilizerListResource, FertilizationResource, FertilizationListResource, PurgeJobResource, \
+    WaterChangeResource, WaterChangeListResource, NutrientResource
+from .health import HealthResource, ReadinessResource
+from .statistics import TemperatureStatisticsResource
+from .export import TemperatureExportResource, FertilizationExportResource
+from .batch import BatchResource
+from .changes import ChangeListResource
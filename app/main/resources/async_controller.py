@@ -0,0 +1,154 @@
+from sqlalchemy import select, func
+
+from app.main.models import Aquarium, AquariumTemperature, Fertilizer, Fertilization, Chemical, fertilizer_ingredients
+from .controller import load_fields, filter_time_range, filter_visible_aquariums, order_by_ids, AquariumController, \
+    TemperatureController, ChemicalController, FertilizerController, FertilizationController
+
+"""
+Asynchronous variants of the controllers for the read only ASGI entry point (app/asgi.py).
+All methods take an sqlalchemy AsyncSession and build 2.0 style select statements instead of Model.query.
+"""
+
+
+class AsyncController:
+    """
+    Base class for asynchronous controllers.
+
+    Subclasses set the model, the resource field to column mappings and the order by columns, and apply their filters
+    in apply_filters.
+    """
+    model = None
+    columns = {}
+    relationships = {}
+    # OrderBy value names mapped to the columns to sort by
+    order_columns = {}
+
+    def apply_filters(self, statement, **filters):
+        """
+        :param statement: Select statement to filter.
+        :param filters: Filter values of the resource, None when not set.
+        :return: Filtered select statement.
+        """
+        return statement
+
+    def visible(self, statement):
+        """
+        :return: Statement restricted to the rows the resource shows.
+        """
+        return statement
+
+    def select_fields(self, fields=None):
+        return self.visible(load_fields(select(self.model), self.columns, fields, self.relationships))
+
+    async def count_all(self, session, **filters):
+        statement = self.apply_filters(self.visible(select(func.count()).select_from(self.model)), **filters)
+        return await session.scalar(statement)
+
+    async def get_by_id(self, session, resource_id, fields=None):
+        result = await session.execute(self.select_fields(fields).filter(self.model.id == resource_id))
+        return result.scalars().first()
+
+    async def get_by_ids(self, session, resource_ids, fields=None):
+        statement = self.select_fields(fields).filter(self.model.id.in_(resource_ids))
+        result = await session.execute(statement)
+        return order_by_ids(result.scalars(), resource_ids)
+
+    async def get_multiple(self, session, order_by, page=1, items_per_page=5, fields=None, **filters):
+        """
+        :param session: AsyncSession to execute the statement with.
+        :param order_by: OrderBy object which sets the sequence.
+        :param page: Page number to display.
+        :param items_per_page: Item limit per page.
+        :param fields: Resource field names to load. Loads all columns when None.
+        :param filters: Filter values of the resource.
+        :return: Ordered database objects of the requested page.
+        """
+        if order_by.value_name not in self.order_columns:
+            raise ValueError('Cant apply sorting with {}'.format(order_by))
+
+        column = self.order_columns[order_by.value_name]
+        statement = self.apply_filters(self.select_fields(fields), **filters).\
+            order_by(column.asc() if order_by.is_ascending() else column.desc()).\
+            limit(items_per_page).offset((page - 1) * items_per_page)
+        result = await session.execute(statement)
+        return result.scalars().all()
+
+
+class AsyncAquariumController(AsyncController):
+    model = Aquarium
+    columns = AquariumController.columns
+    relationships = AquariumController.relationships
+    order_columns = {
+        'name': Aquarium.name,
+        'liter': Aquarium.volume_in_liter
+    }
+
+    def visible(self, statement):
+        return statement.filter(AquariumController.visible)
+
+
+class AsyncTemperatureController(AsyncController):
+    model = AquariumTemperature
+    columns = TemperatureController.columns
+    order_columns = {
+        'date': AquariumTemperature.timestamp,
+        'celsius': AquariumTemperature.temperature
+    }
+
+    def visible(self, statement):
+        return filter_visible_aquariums(statement, AquariumTemperature.aquarium_id)
+
+    def apply_filters(self, statement, aquarium_id=None, from_timestamp=None, to_timestamp=None):
+        statement = filter_time_range(statement, AquariumTemperature.timestamp, from_timestamp, to_timestamp)
+        if aquarium_id:
+            statement = statement.filter(AquariumTemperature.aquarium_id == aquarium_id)
+        return statement
+
+
+class AsyncChemicalController(AsyncController):
+    model = Chemical
+    columns = ChemicalController.columns
+    order_columns = {
+        'name': Chemical.name
+    }
+
+    def apply_filters(self, statement, fertilizer_id=None):
+        if fertilizer_id:
+            statement = statement.\
+                join(fertilizer_ingredients, (fertilizer_ingredients.c.chemical_id == Chemical.id)).\
+                filter(fertilizer_ingredients.c.fertilizer_id == fertilizer_id)
+        return statement
+
+
+class AsyncFertilizerController(AsyncController):
+    model = Fertilizer
+    columns = FertilizerController.columns
+    relationships = FertilizerController.relationships
+    order_columns = {
+        'name': Fertilizer.name
+    }
+
+    def apply_filters(self, statement, chemical_id=None):
+        if chemical_id:
+            statement = statement.\
+                join(fertilizer_ingredients, (fertilizer_ingredients.c.fertilizer_id == Fertilizer.id)).\
+                filter(fertilizer_ingredients.c.chemical_id == chemical_id)
+        return statement
+
+
+class AsyncFertilizationController(AsyncController):
+    model = Fertilization
+    columns = FertilizationController.columns
+    order_columns = {
+        'date': Fertilization.timestamp,
+        'amount': Fertilization.amount_in_milliliter
+    }
+
+    def visible(self, statement):
+        return filter_visible_aquariums(statement, Fertilization.aquarium_id)
+
+    def apply_filters(self, statement, aquarium_id=None, from_timestamp=None, to_timestamp=None):
+        statement = filter_time_range(statement, Fertilization.timestamp, from_timestamp, to_timestamp)
+        if aquarium_id:
+            statement = statement.filter(Fertilization.aquarium_id == aquarium_id)
+        return statement
@@ -0,0 +1,115 @@
+import re
+
+from flask import current_app, g, request
+from flask_restful import Resource, marshal_with, abort
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from app.http_status_codes import HttpStatus as Status
+from app.main.api_parser import ParserFactory
+from app.main.models import db
+from .resource_fields import Fields
+
+"""
+Batches of create, update and delete operations on the resources, executed in one transaction by the resources of
+the single requests.
+"""
+
+# "$<index>.<field>" refers to a field of the response of an earlier operation of the batch, e.g. "$0.id"
+_reference = re.compile(r'\$(\d+)\.(\w+)')
+
+parser_factory = ParserFactory()
+
+
+def _referenced_value(match, results):
+    index, name = int(match.group(1)), match.group(2)
+    if index >= len(results):
+        raise ValueError('Operation {} can only refer to earlier operations, not to {}'.format(len(results), index))
+    body = results[index]['body']
+    if not isinstance(body, dict) or name not in body:
+        raise ValueError('Response of operation {} has no field {}'.format(index, name))
+    return body[name]
+
+
+def resolve_references(value, results):
+    """
+    Replaces the references to the responses of earlier operations in a path or body. A string that is a single
+    reference is replaced by the referenced value, e.g. an integer id, references in longer strings by their text.
+
+    :param value: Path or JSON body of an operation.
+    :param results: Results of the operations executed before.
+    :return: Value with the references replaced.
+    :raise ValueError: If a reference points to a later operation or a missing field.
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    match = _reference.fullmatch(value)
+    if match:
+        return _referenced_value(match, results)
+    return _reference.sub(lambda m: str(_referenced_value(m, results)), value)
+
+
+class BatchResource(Resource):
+    """
+    Gives access to the POST HTTP method to execute an ordered list of operations on the other resources in one
+    transaction. Each operation is parsed, validated and executed by the resource of its path, which flushes instead
+    of committing (see resources.commit), so later operations can refer to the ids created by earlier ones. The first
+    failed operation rolls back the whole batch.
+    """
+    @marshal_with(Fields.batch_field)
+    def post(self):
+        parser = parser_factory.batch_parser()
+        args = parser.parse_args()
+        operations = args['operations']
+
+        results = []
+        g.after_batch_commit = []
+        try:
+            for index, operation in enumerate(operations):
+                result = self._execute(operation, results)
+                results.append(result)
+                if result['status'] >= Status.bad_request_400:
+                    db.session.rollback()
+                    abort(result['status'], message='Operation {} failed, no operation was committed'.format(index),
+                          results=results)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            after_batch_commit = g.pop('after_batch_commit')
+
+        for func in after_batch_commit:
+            func()
+        return {'results': results}, Status.ok_200
+
+    @staticmethod
+    def _execute(operation, results):
+        """
+        Dispatches an operation to the resource of its path in a request context of its own.
+
+        :return: Dict of the status code and the response body of the operation.
+        """
+        try:
+            path = resolve_references(operation['path'], results)
+            body = resolve_references(operation['body'], results)
+        except ValueError as error:
+            return {'status': Status.bad_request_400, 'body': {'message': str(error)}}
+
+        environ = EnvironBuilder(path=path, method=operation['method'], json=body,
+                                 headers={'Accept': request.headers.get('Accept', 'application/json')}).get_environ()
+        with current_app.request_context(environ):
+            if request.endpoint == 'batchresource':
+                return {'status': Status.bad_request_400, 'body': {'message': 'Batches can not be nested'}}
+            try:
+                response = current_app.dispatch_request()
+            except HTTPException as error:
+                return {'status': error.code, 'body': getattr(error, 'data', {'message': error.description})}
+
+        body = response.get_json() if response.status_code != Status.no_content_204 else None
+        return {'status': response.status_code, 'body': body}
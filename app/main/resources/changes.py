@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_restful import Resource, marshal_with, abort
+
+from app.http_status_codes import HttpStatus as Status
+from app.main.api_parser import ParserFactory
+from .controller import ChangeLogController
+from .resource_fields import Fields
+
+"""
+Change log of the resources for clients that keep a copy of them and only download what changed since their last sync.
+"""
+
+parser_factory = ParserFactory()
+change_log_controller = ChangeLogController()
+
+
+class ChangeListResource(Resource):
+    """
+    Gives access to the GET HTTP method to get the creates, updates and deletes after a cursor ordered by the time
+    they were written. Without a cursor the response has no changes and the cursor of the latest change, which a client
+    takes after downloading all resources.
+    """
+    @marshal_with(Fields.change_list_field)
+    def get(self):
+        parser = parser_factory.change_parser()
+        args = parser.parse_args()
+        items_per_page = args['items-per-page'] or current_app.config['ITEMS_PER_PAGE']
+
+        if args['since'] is None:
+            next_cursor = change_log_controller.get_head_cursor()
+            return {'content': [], 'items_per_page': items_per_page, 'next': next_cursor, 'has_more': False}, \
+                Status.ok_200
+
+        since_id, timestamp = args['since']
+        retention_days = current_app.config['CHANGES_RETENTION_DAYS']
+        if timestamp < datetime.utcnow() - timedelta(days=retention_days):
+            # entries after the cursor the client has not received may have been deleted
+            abort(Status.gone_410, message='Changes older than {} days are deleted, download all resources and '
+                                           'request /changes without since.'.format(retention_days))
+
+        entries, next_cursor, has_more = change_log_controller.get_page(since_id, items_per_page)
+        return {'content': entries, 'items_per_page': items_per_page, 'next': next_cursor, 'has_more': has_more}, \
+            Status.ok_200
@@ -1,6 +1,20 @@
+import base64
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
 from functools import wraps, partial
 
-from app.main.models import Aquarium, AquariumTemperature, Fertilizer, Fertilization, Chemical, fertilizer_ingredients
+from sqlalchemy import func, or_, and_, case
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from flask import current_app
+from sqlalchemy.orm import load_only, lazyload
+
+from app.extensions import db, reading_cache, catalog_cache, purger
+from app.main.models import Aquarium, AquariumStats, AquariumTemperature, Fertilizer, Fertilization, Chemical, \
+    PurgeJob, ChangeLogEntry, WaterChange, NutrientEstimate, NutrientConcentration, fertilizer_ingredients, \
+    full_text_table, purged_models, fertilization_dose, water_change_factor, pop_invalidated_nutrient_estimates
 
 
 def make_order_by(order_by_string):
@@ -87,6 +101,189 @@ def paginate(page=1, items_per_page=5):
     return decorate
 
 
+def load_fields(query, columns, fields=None, relationships=None):
+    """
+    Restricts the columns and relationships loaded by a query to the requested resource fields.
+
+    :param query: SQLAlchemy query of a model.
+    :param columns: Dict of resource field names to model column attributes. Must contain the primary key as 'id'.
+    :param fields: Requested resource field names. Everything is loaded when None.
+    :param relationships: Dict of resource field names to eagerly loaded model relationships.
+    :return: Query with loader options for the requested fields.
+    """
+    if not fields:
+        return query
+
+    # the primary key is always needed to build the identity of the loaded objects
+    selected = [columns['id']] + [columns[name] for name in fields if name in columns and name != 'id']
+    query = query.options(load_only(*selected))
+
+    # skip eager loading of relationships that are not part of the response
+    for name, relationship in (relationships or {}).items():
+        if name not in fields:
+            query = query.options(lazyload(relationship))
+    return query
+
+
+def filter_time_range(query, column, from_timestamp=None, to_timestamp=None):
+    """
+    Restricts a query to rows with from_timestamp <= column < to_timestamp.
+
+    :param query: SQLAlchemy query to filter.
+    :param column: Timestamp column attribute to filter.
+    :param from_timestamp: Inclusive lower bound. No lower bound when None.
+    :param to_timestamp: Exclusive upper bound. No upper bound when None.
+    :return: Filtered query.
+    """
+    if from_timestamp:
+        query = query.filter(column >= from_timestamp)
+    if to_timestamp:
+        query = query.filter(column < to_timestamp)
+    return query
+
+
+def filter_visible_aquariums(query, aquarium_id_column):
+    """
+    Restricts a query of rows of aquariums (e.g. temperatures) to the aquariums that are not deleted. The rows of a
+    deleted aquarium are hidden with it until its purge job deleted them.
+
+    :param query: SQLAlchemy query to filter.
+    :param aquarium_id_column: Aquarium id column attribute of the rows.
+    :return: Filtered query.
+    """
+    # few aquariums are deleted at a time, the list of their ids is small
+    deleted_aquarium_ids = db.select(Aquarium.id).where(Aquarium.deleted_timestamp.isnot(None))
+    return query.filter(aquarium_id_column.notin_(deleted_aquarium_ids))
+
+
+def _full_text_matches(model, search, dialect_name):
+    """
+    :return: Subquery of the ids and scores (lower is better) of the rows whose name contains words starting with the
+             words of search. None when the database has no full text search.
+    """
+    words = re.findall(r'\w+', search)
+    if not words:
+        return None
+
+    if dialect_name == 'sqlite':
+        fts = db.table(full_text_table(model.__table__.name), db.column('rowid'), db.column('rank'))
+        terms = ' '.join('"{}"*'.format(word) for word in words)
+        return db.select(fts.c.rowid.label('id'), fts.c.rank.label('score')).\
+            where(db.literal_column(fts.name).op('MATCH')(terms)).subquery()
+
+    if dialect_name == 'mysql':
+        # imported here, the dialect is loaded by the engine and would slow down the startup of other databases
+        from sqlalchemy.dialects import mysql
+        relevance = mysql.match(model.name, against=' '.join('+{}*'.format(word) for word in words)).\
+            in_boolean_mode()
+        return db.select(model.id.label('id'), (-relevance).label('score')).where(relevance).subquery()
+    return None
+
+
+def search_names(query, model, search):
+    """
+    Restricts a query to the rows whose name starts with search, ignoring case (range of the name index), or matches
+    search by full text search (SQLite FTS5, MySQL FULLTEXT). The rows are ranked: names starting with search first,
+    then by full text relevance and name.
+
+    :param query: SQLAlchemy query of a model with a name column.
+    :param model: Model class of the query.
+    :param search: Search text.
+    :return: Filtered and ordered query.
+    """
+    dialect_name = db.engine.dialect.name
+    if dialect_name == 'mysql':
+        # LIKE with a constant prefix is a range of the (case insensitive) index
+        prefix = model.name.startswith(search, autoescape=True)
+    elif dialect_name == 'sqlite':
+        # range of the NOCASE index of the names
+        name = model.name.collate('NOCASE')
+        prefix = and_(name >= search, name < search + '\U0010ffff')
+    else:
+        prefix = and_(model.name >= search, model.name < search + '\U0010ffff')
+
+    matches = _full_text_matches(model, search, dialect_name)
+    if matches is None:
+        return query.filter(prefix).order_by(model.name.asc())
+    query = query.outerjoin(matches, matches.c.id == model.id).filter(or_(prefix, matches.c.id.isnot(None)))
+    return query.order_by(case((prefix, 0), else_=1), matches.c.score.asc(), model.name.asc())
+
+
+def select_by_ids(query, id_column, ids):
+    """
+    Selects all objects with the given ids in a single query.
+
+    :param query: SQLAlchemy query of a model.
+    :param id_column: Primary key column attribute of the model.
+    :param ids: List of requested ids.
+    :return: Tuple of the found objects in the order of ids and the list of ids that were not found.
+    """
+    return order_by_ids(query.filter(id_column.in_(ids)), ids)
+
+
+def order_by_ids(objects, ids):
+    """
+    :param objects: Database objects with an id attribute.
+    :param ids: List of requested ids.
+    :return: Tuple of the objects in the order of ids and the list of ids without object.
+    """
+    found = {obj.id: obj for obj in objects}
+    content = [found[i] for i in ids if i in found]
+    missing_ids = [i for i in ids if i not in found]
+    return content, missing_ids
+
+
+def iterate_rows(query, chunk_size):
+    """
+    Executes a Core select and returns its rows in chunks. The database driver streams the rows when it supports server
+    side cursors, so the memory use does not depend on the number of rows.
+
+    :param query: SQLAlchemy Core select.
+    :param chunk_size: Number of rows per chunk.
+    :return: Generator of lists of rows.
+    """
+    result = db.session.execute(query.execution_options(stream_results=True))
+    try:
+        for rows in result.partitions(chunk_size):
+            yield rows
+    finally:
+        result.close()
+
+
+def encode_cursor(order_by, from_timestamp, to_timestamp, value, last_id):
+    """
+    Creates the opaque cursor of keyset pagination that points behind a row. It carries the order and the time range of
+    the request, sort values of a different request do not point behind the same rows.
+
+    :param order_by: OrderBy object of the request.
+    :param from_timestamp: From date time of the request or None.
+    :param to_timestamp: To date time of the request or None.
+    :param value: Sort value of the last row of a page, None if the row has no value.
+    :param last_id: Id of the last row of a page.
+    :return: URL safe string, see Validator.cursor.
+    """
+    if isinstance(value, Decimal):
+        # sums of integer columns are decimals on mysql
+        value = int(value) if value == value.to_integral_value() else float(value)
+    content = json.dumps([order_by.to_asc_string() if order_by.is_ascending() else order_by.to_desc_string(),
+                          from_timestamp.isoformat() if from_timestamp else None,
+                          to_timestamp.isoformat() if to_timestamp else None,
+                          value is None, value, last_id])
+    return base64.urlsafe_b64encode(content.encode()).decode()
+
+
+def encode_change_cursor(last_id, timestamp):
+    """
+    Creates the opaque cursor of the change log that points behind an entry.
+
+    :param last_id: Id of the last change log entry the client received.
+    :param timestamp: Time up to which the client received all entries, entries after the cursor are not older.
+    :return: URL safe string, see Validator.change_cursor.
+    """
+    content = json.dumps([last_id, timestamp.isoformat()])
+    return base64.urlsafe_b64encode(content.encode()).decode()
+
+
 class ResponseContent:
     def __init__(self, content, page, items_per_page, total_results):
         self.content = content
@@ -98,6 +295,103 @@ class ResponseContent:
         return '{} {} {} {}'.format(self.content, self.page, self.items_per_page, self.total_results)
 
 
+class KeysetContent:
+    def __init__(self, content, items_per_page, next_cursor):
+        self.content = content
+        self.items_per_page = items_per_page
+        self.next = next_cursor
+
+    def __repr__(self):
+        return '{} {} {}'.format(self.content, self.items_per_page, self.next)
+
+
+class IdListContent:
+    def __init__(self, content, missing_ids):
+        self.content = content
+        self.missing_ids = missing_ids
+
+    def __repr__(self):
+        return '{} {}'.format(self.content, self.missing_ids)
+
+
+class CachedTemperature:
+    """
+    Temperature from the reading cache with the attributes of an AquariumTemperature for marshalling.
+    """
+    __slots__ = ('id', 'temperature', 'timestamp', 'aquarium_id')
+
+    def __init__(self, temperature_id, temperature, timestamp, aquarium_id):
+        self.id = temperature_id
+        self.temperature = temperature
+        self.timestamp = timestamp
+        self.aquarium_id = aquarium_id
+
+    def __repr__(self):
+        return '<CachedTemperature {} in AID {}:{}:{}>'.format(self.id, self.aquarium_id, self.temperature,
+                                                               self.timestamp)
+
+
+class CachedChemical:
+    """
+    Chemical from the catalog cache with the attributes of a Chemical for marshalling.
+    """
+    __slots__ = ('id', 'name')
+
+    def __init__(self, chemical_id, name):
+        self.id = chemical_id
+        self.name = name
+
+    def __repr__(self):
+        return '<CachedChemical {}: {}>'.format(self.id, self.name)
+
+
+class CachedFertilizer:
+    """
+    Fertilizer from the catalog cache with the attributes of a Fertilizer for marshalling.
+    """
+    __slots__ = ('id', 'name', 'chemicals')
+
+    def __init__(self, fertilizer_id, name, chemicals):
+        self.id = fertilizer_id
+        self.name = name
+        self.chemicals = chemicals
+
+    def __repr__(self):
+        return '<CachedFertilizer {}: {}>'.format(self.id, self.name)
+
+
+def load_catalog():
+    """
+    :return: Tuple of the chemical, fertilizer and ingredient rows of the catalog cache.
+    """
+    chemicals = Chemical.query.with_entities(Chemical.id, Chemical.name).order_by(Chemical.name.asc()).all()
+    fertilizers = Fertilizer.query.with_entities(Fertilizer.id, Fertilizer.name).order_by(Fertilizer.name.asc()).all()
+    ingredients = db.session.query(fertilizer_ingredients.c.fertilizer_id, fertilizer_ingredients.c.chemical_id).\
+        order_by(fertilizer_ingredients.c.fertilizer_id, fertilizer_ingredients.c.chemical_id).all()
+    return chemicals, fertilizers, ingredients
+
+
+def _catalog_id(resource_id):
+    # ids of the url are strings
+    try:
+        return int(resource_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _catalog_page(ids, order_by, page, items_per_page):
+    """
+    :param ids: Ids ordered by name ascending.
+    :return: Tuple of the ids of the page and the number of ids.
+    """
+    if order_by.value_name != 'name':
+        raise ValueError('Cant apply sorting with {}'.format(order_by))
+    if not order_by.is_ascending():
+        ids.reverse()
+    start = (page - 1) * items_per_page
+    return ids[start:start + items_per_page], len(ids)
+
+
 class AquariumController:
     """
     Selects aquarium objects from the database.
@@ -105,36 +399,154 @@ class AquariumController:
     Adds functionality to filter, order by and paginate when selecting data from the database.
     Also allows counting of elements(rows) in table.
     """
-    def count_all(self):
-            return Aquarium.query.count()
-
-    def get_by_id(self, aquarium_id):
-        return Aquarium.query.get(aquarium_id)
+    # resource field names mapped to the columns and relationships needed to marshal them
+    columns = {
+        'id': Aquarium.id,
+        'name': Aquarium.name,
+        'volume_in_liter': Aquarium.volume_in_liter
+    }
+    relationships = {
+        'stats': Aquarium.stats
+    }
+    # soft deleted aquariums are hidden until their purge job deleted them
+    visible = Aquarium.deleted_timestamp.is_(None)
+
+    def count_all(self, search=None):
+        aquarium_query = Aquarium.query.filter(self.visible)
+        if search:
+            aquarium_query = search_names(aquarium_query, Aquarium, search)
+        return aquarium_query.count()
+
+    def get_by_id(self, aquarium_id, fields=None):
+        query = load_fields(Aquarium.query.filter(self.visible), self.columns, fields, self.relationships)
+        return query.filter(Aquarium.id == aquarium_id).first()
+
+    def get_by_ids(self, aquarium_ids, fields=None):
+        query = load_fields(Aquarium.query.filter(self.visible), self.columns, fields, self.relationships)
+        return select_by_ids(query, Aquarium.id, aquarium_ids)
 
     @paginate()
-    def get_multiple(self, order_by: OrderBy, page=1):
+    def get_multiple(self, order_by: OrderBy, page=1, fields=None, search=None):
         """
         :param order_by: OrderBy object which sets the sequence.
         :param page: Page number to display.
+        :param fields: Resource field names to load. Loads all columns when None.
+        :param search: filter aquariums by name and order them by relevance instead of order_by.
         :return: Ordered query for aquarium database objects.
         """
+        aquarium_query = load_fields(Aquarium.query.filter(self.visible), self.columns, fields, self.relationships)
+
+        if search:
+            return search_names(aquarium_query, Aquarium, search)
 
         # Apply order by query name/liter ascending descending and return aquarium query.
         if order_by.value_name == 'name':
             if order_by.is_ascending():
-                return Aquarium.query.order_by(Aquarium.name.asc())
+                return aquarium_query.order_by(Aquarium.name.asc())
 
-            return Aquarium.query.order_by(Aquarium.name.desc())
+            return aquarium_query.order_by(Aquarium.name.desc())
 
         if order_by.value_name == 'liter':
             if order_by.is_ascending():
-                return Aquarium.query.order_by(Aquarium.volume_in_liter.asc())
+                return aquarium_query.order_by(Aquarium.volume_in_liter.asc())
 
-            return Aquarium.query.order_by(Aquarium.volume_in_liter.desc())
+            return aquarium_query.order_by(Aquarium.volume_in_liter.desc())
 
         raise ValueError('Cant apply sorting with {}'.format(order_by))
 
 
+class AquariumSummaryController:
+    """
+    Selects temperature and fertilization aggregates of all aquariums over a time range.
+
+    Each metric family is computed by one grouped query, which are joined to the aquariums. The rows are paginated by
+    keyset (sort value and id of the last row), so later pages do not count or skip the rows of the previous pages.
+    Aquariums without a sort value (no temperatures in the time range) follow all others in both directions.
+    """
+
+    @staticmethod
+    def _aggregates(from_timestamp=None, to_timestamp=None):
+        temperatures = db.select(AquariumTemperature.aquarium_id,
+                                 func.count(AquariumTemperature.id).label('temperature_count'),
+                                 func.min(AquariumTemperature.temperature).label('min_temperature'),
+                                 func.max(AquariumTemperature.temperature).label('max_temperature'),
+                                 func.avg(AquariumTemperature.temperature).label('avg_temperature'))
+        temperatures = filter_time_range(temperatures, AquariumTemperature.timestamp, from_timestamp, to_timestamp).\
+            group_by(AquariumTemperature.aquarium_id).subquery()
+
+        fertilization = db.select(Fertilization.aquarium_id,
+                                  func.count(Fertilization.id).label('fertilization_count'),
+                                  func.sum(Fertilization.amount_in_milliliter).label('fertilizer_milliliter'))
+        fertilization = filter_time_range(fertilization, Fertilization.timestamp, from_timestamp, to_timestamp).\
+            group_by(Fertilization.aquarium_id).subquery()
+        return temperatures, fertilization
+
+    def get_page(self, order_by, from_timestamp=None, to_timestamp=None, after=None, items_per_page=5):
+        """
+        :param order_by: OrderBy object which sets the sequence, by name, avg, min or max temperature, readings or
+                         fertilizer.
+        :param from_timestamp: aggregate temperatures and fertilization at or after this date time.
+        :param to_timestamp: aggregate temperatures and fertilization before this date time.
+        :param after: Tuple of the sort value (None if the row had none) and id of the last row of the previous page.
+                      First page when None.
+        :param items_per_page: Item limit per page.
+        :return: Tuple of the summary dicts of the page and the cursor of the next page (None on the last page).
+        """
+        temperatures, fertilization = self._aggregates(from_timestamp, to_timestamp)
+        temperature_count = func.coalesce(temperatures.c.temperature_count, 0)
+        fertilization_count = func.coalesce(fertilization.c.fertilization_count, 0)
+        fertilizer_milliliter = func.coalesce(fertilization.c.fertilizer_milliliter, 0)
+
+        ascending = order_by.is_ascending()
+        sort_keys = {
+            'name': Aquarium.name,
+            'avg': temperatures.c.avg_temperature,
+            'min': temperatures.c.min_temperature,
+            'max': temperatures.c.max_temperature,
+            'readings': temperature_count,
+            'fertilizer': fertilizer_milliliter
+        }
+        if order_by.value_name not in sort_keys:
+            raise ValueError('Cant apply sorting with {}'.format(order_by))
+        sort_key = sort_keys[order_by.value_name]
+        # leading key, rows without a sort value last
+        sort_key_missing = case((sort_key.is_(None), 1), else_=0)
+
+        query = db.select(Aquarium.id, Aquarium.name, Aquarium.volume_in_liter,
+                          temperature_count.label('temperature_count'),
+                          temperatures.c.min_temperature, temperatures.c.max_temperature,
+                          temperatures.c.avg_temperature,
+                          fertilization_count.label('fertilization_count'),
+                          fertilizer_milliliter.label('fertilizer_milliliter'),
+                          sort_key.label('sort_key')).\
+            select_from(Aquarium.__table__.
+                        outerjoin(temperatures, temperatures.c.aquarium_id == Aquarium.id).
+                        outerjoin(fertilization, fertilization.c.aquarium_id == Aquarium.id)).\
+            where(AquariumController.visible)
+
+        if after:
+            value, last_id = after
+            after_id = Aquarium.id > last_id if ascending else Aquarium.id < last_id
+            if value is None:
+                query = query.where(sort_key.is_(None), after_id)
+            else:
+                after_value = sort_key > value if ascending else sort_key < value
+                query = query.where(or_(sort_key.is_(None), after_value, and_(sort_key == value, after_id)))
+
+        if ascending:
+            query = query.order_by(sort_key_missing, sort_key.asc(), Aquarium.id.asc())
+        else:
+            query = query.order_by(sort_key_missing, sort_key.desc(), Aquarium.id.desc())
+
+        # one more row tells whether there is a next page
+        rows = db.session.execute(query.limit(items_per_page + 1)).all()
+        next_cursor = None
+        if len(rows) > items_per_page:
+            rows = rows[:items_per_page]
+            next_cursor = encode_cursor(order_by, from_timestamp, to_timestamp, rows[-1].sort_key, rows[-1].id)
+        return [dict(row._mapping) for row in rows], next_cursor
+
+
 class TemperatureController:
     """
     Selects temperature objects from the database.
@@ -142,26 +554,53 @@ class TemperatureController:
     Adds functionality to filter, order by and paginate when selecting data from the database.
     Also allows counting of elements(rows) in table.
     """
-    def count_all(self, aquarium_id=None):
+    # resource field names mapped to the columns needed to marshal them
+    columns = {
+        'id': AquariumTemperature.id,
+        'temperature': AquariumTemperature.temperature,
+        'timestamp': AquariumTemperature.timestamp,
+        'aquarium_id': AquariumTemperature.aquarium_id
+    }
+
+    def count_all(self, aquarium_id=None, from_timestamp=None, to_timestamp=None):
+        temperatures_query = filter_time_range(AquariumTemperature.query, AquariumTemperature.timestamp,
+                                               from_timestamp, to_timestamp)
+        temperatures_query = filter_visible_aquariums(temperatures_query, AquariumTemperature.aquarium_id)
         if aquarium_id:
-            return AquariumTemperature.query.filter(AquariumTemperature.aquarium_id == aquarium_id).count()
-        return AquariumTemperature.query.count()
+            temperatures_query = temperatures_query.filter(AquariumTemperature.aquarium_id == aquarium_id)
+        return temperatures_query.count()
+
+    def get_by_id(self, temperature_id, fields=None):
+        query = load_fields(AquariumTemperature.query, self.columns, fields)
+        query = filter_visible_aquariums(query, AquariumTemperature.aquarium_id)
+        return query.filter(AquariumTemperature.id == temperature_id).first()
+
+    def get_by_ids(self, temperature_ids, fields=None):
+        query = load_fields(AquariumTemperature.query, self.columns, fields)
+        query = filter_visible_aquariums(query, AquariumTemperature.aquarium_id)
+        return select_by_ids(query, AquariumTemperature.id, temperature_ids)
 
-    def get_by_id(self, temperature_id):
-        return AquariumTemperature.query.get(temperature_id)
+    def get_by_timestamp(self, aquarium_id, timestamp):
+        return AquariumTemperature.query.\
+            filter(AquariumTemperature.aquarium_id == aquarium_id, AquariumTemperature.timestamp == timestamp).first()
 
     @paginate()
-    def get_multiple(self, order_by, aquarium_id=None):
+    def get_multiple(self, order_by, aquarium_id=None, from_timestamp=None, to_timestamp=None, fields=None):
         """
         :param order_by: OrderBy object which sets the sequence.
         :param aquarium_id: filter temperatures by aquarium id.
+        :param from_timestamp: filter temperatures measured at or after this date time.
+        :param to_timestamp: filter temperatures measured before this date time.
+        :param fields: Resource field names to load. Loads all columns when None.
         :return: Ordered query of temperature database objects.
         """
+        temperatures_query = load_fields(AquariumTemperature.query, self.columns, fields)
+        temperatures_query = filter_visible_aquariums(temperatures_query, AquariumTemperature.aquarium_id)
+        temperatures_query = filter_time_range(temperatures_query, AquariumTemperature.timestamp,
+                                               from_timestamp, to_timestamp)
 
         if aquarium_id:
-            temperatures_query = AquariumTemperature.query.filter(AquariumTemperature.aquarium_id == aquarium_id)
-        else:
-            temperatures_query = AquariumTemperature.query
+            temperatures_query = temperatures_query.filter(AquariumTemperature.aquarium_id == aquarium_id)
 
         # Apply order by query date/celsius ascending descending and return temperature query.
         if order_by.value_name == 'date':
@@ -178,6 +617,61 @@ class TemperatureController:
 
         raise ValueError('Cant apply sorting with {}'.format(order_by))
 
+    def get_latest(self, aquarium_id, page=1, items_per_page=5):
+        """
+        Selects the newest temperatures of an aquarium from the reading cache. The cached temperatures are loaded again
+        when the aquarium stats show a change.
+
+        :param aquarium_id: filter temperatures by aquarium id.
+        :param page: Page number to display.
+        :param items_per_page: Item limit per page.
+        :return: Tuple of the temperatures of the page ordered by date descending and the number of temperatures of
+                 the aquarium. None when the page is not cached.
+        """
+        stats = AquariumStats.query.join(Aquarium, Aquarium.id == AquariumStats.aquarium_id).\
+            filter(AquariumStats.aquarium_id == aquarium_id, AquariumController.visible).first()
+        if stats is None:
+            return None
+
+        def load_newest(limit):
+            return AquariumTemperature.query.\
+                with_entities(AquariumTemperature.id, AquariumTemperature.timestamp, AquariumTemperature.temperature).\
+                filter(AquariumTemperature.aquarium_id == aquarium_id, AquariumTemperature.timestamp.isnot(None)).\
+                order_by(AquariumTemperature.timestamp.desc(), AquariumTemperature.id.desc()).limit(limit).all()
+
+        version = (stats.temperature_count, stats.latest_temperature_timestamp)
+        readings = reading_cache.latest(aquarium_id, version, (page - 1) * items_per_page, items_per_page, load_newest)
+        if readings is None:
+            return None
+        temperatures = [CachedTemperature(i, value, timestamp, aquarium_id) for i, timestamp, value in readings]
+        return temperatures, stats.temperature_count
+
+    def iterate_series(self, aquarium_id=None, from_timestamp=None, to_timestamp=None, chunk_size=10000):
+        """
+        Selects the temperature series in chunks of rows without creating ORM objects, see iterate_rows.
+
+        :param aquarium_id: filter temperatures by aquarium id.
+        :param from_timestamp: filter temperatures measured at or after this date time.
+        :param to_timestamp: filter temperatures measured before this date time.
+        :param chunk_size: Number of rows per chunk.
+        :return: Generator of lists of (aquarium_id, timestamp, temperature) rows ordered by aquarium and timestamp.
+        """
+        query = db.select(AquariumTemperature.aquarium_id, AquariumTemperature.timestamp,
+                          AquariumTemperature.temperature).\
+            where(AquariumTemperature.timestamp.isnot(None)).\
+            order_by(AquariumTemperature.aquarium_id, AquariumTemperature.timestamp)
+        query = filter_time_range(query, AquariumTemperature.timestamp, from_timestamp, to_timestamp)
+        query = filter_visible_aquariums(query, AquariumTemperature.aquarium_id)
+        if aquarium_id:
+            query = query.where(AquariumTemperature.aquarium_id == aquarium_id)
+        return iterate_rows(query, chunk_size)
+
+    def add_to_cache(self, temperature):
+        reading_cache.append(temperature.aquarium_id, temperature.id, temperature.timestamp, temperature.temperature)
+
+    def remove_from_cache(self, *aquarium_ids):
+        reading_cache.invalidate(*aquarium_ids)
+
 
 class ChemicalController:
     """
@@ -186,26 +680,93 @@ class ChemicalController:
     Adds functionality to filter, order by and paginate when selecting data from the database.
     Also allows counting of elements(rows) in table.
     """
-    def count_all(self):
-        return Chemical.query.count()
+    # resource field names mapped to the columns needed to marshal them
+    columns = {
+        'id': Chemical.id,
+        'name': Chemical.name
+    }
+
+    def count_all(self, fertilizer_id=None, search=None):
+        chemical_query = Chemical.query
+        if fertilizer_id:
+            chemical_query = chemical_query.\
+                join(fertilizer_ingredients, (fertilizer_ingredients.c.chemical_id == Chemical.id)).\
+                filter(fertilizer_ingredients.c.fertilizer_id == fertilizer_id)
+        if search:
+            chemical_query = search_names(chemical_query, Chemical, search)
+        return chemical_query.count()
+
+    def get_by_id(self, chemical_id, fields=None):
+        return load_fields(Chemical.query, self.columns, fields).get(chemical_id)
+
+    def get_by_ids(self, chemical_ids, fields=None):
+        query = load_fields(Chemical.query, self.columns, fields)
+        return select_by_ids(query, Chemical.id, chemical_ids)
+
+    @staticmethod
+    def _from_catalog(catalog, chemical_id):
+        return CachedChemical(chemical_id, catalog.chemical_names[chemical_id])
+
+    def get_cached_by_id(self, chemical_id, fields=None):
+        """
+        Selects the chemical from the catalog cache, from the database when the catalog cache is disabled.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return self.get_by_id(chemical_id, fields=fields)
+        chemical_id = _catalog_id(chemical_id)
+        if chemical_id not in catalog.chemical_names:
+            return None
+        return self._from_catalog(catalog, chemical_id)
+
+    def get_cached_by_ids(self, chemical_ids, fields=None):
+        """
+        Selects the chemicals from the catalog cache, from the database when the catalog cache is disabled.
 
-    def get_by_id(self, chemical_id):
-        return Chemical.query.get(chemical_id)
+        :return: Tuple of the found chemicals in the order of chemical_ids and the list of ids that were not found.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return self.get_by_ids(chemical_ids, fields=fields)
+        chemicals = [self._from_catalog(catalog, i) for i in chemical_ids if i in catalog.chemical_names]
+        return order_by_ids(chemicals, chemical_ids)
+
+    def get_cached_page(self, order_by, page=1, items_per_page=5, fertilizer_id=None):
+        """
+        :param order_by: OrderBy object which sets the sequence.
+        :param page: Page number to display.
+        :param items_per_page: Item limit per page.
+        :param fertilizer_id: filter chemicals by fertilizer id.
+        :return: Tuple of the chemicals of the page from the catalog cache and the number of chemicals that match the
+                 filter. None when the catalog cache is disabled.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return None
+        chemical_ids, chemical_count = _catalog_page(catalog.chemicals(fertilizer_id), order_by, page, items_per_page)
+        return [self._from_catalog(catalog, i) for i in chemical_ids], chemical_count
+
+    def refresh_cache(self):
+        catalog_cache.refresh(load_catalog)
 
     @paginate()
-    def get_multiple(self, order_by, fertilizer_id=None):
+    def get_multiple(self, order_by, fertilizer_id=None, fields=None, search=None):
         """
         :param order_by: OrderBy object which sets the sequence.
         :param fertilizer_id: filter chemicals by fertilizer id.
+        :param fields: Resource field names to load. Loads all columns when None.
+        :param search: filter chemicals by name and order them by relevance instead of order_by.
         :return: Ordered query of chemical database objects.
         """
+        chemical_query = load_fields(Chemical.query, self.columns, fields)
 
         if fertilizer_id:
-            chemical_query = Chemical.query.\
+            chemical_query = chemical_query.\
                 join(fertilizer_ingredients, (fertilizer_ingredients.c.chemical_id == Chemical.id)).\
                 filter(fertilizer_ingredients.c.fertilizer_id == fertilizer_id)
-        else:
-            chemical_query = Chemical.query
+
+        if search:
+            return search_names(chemical_query, Chemical, search)
 
         # Apply order by query name ascending descending and return chemical query.
         if order_by.value_name == 'name':
@@ -224,33 +785,102 @@ class FertilizerController:
     Adds functionality to filter, order by and paginate when selecting data from the database.
     Also allows counting of elements(rows) in table.
     """
-    def count_all(self, chemical_id=None):
+    # resource field names mapped to the columns and relationships needed to marshal them
+    columns = {
+        'id': Fertilizer.id,
+        'name': Fertilizer.name
+    }
+    relationships = {
+        'chemicals': Fertilizer.chemicals
+    }
+
+    def count_all(self, chemical_id=None, search=None):
+        fertilizer_query = Fertilizer.query
         if chemical_id:
-            fertilizers_count = Fertilizer.query.\
+            fertilizer_query = fertilizer_query.\
                 join(fertilizer_ingredients, (fertilizer_ingredients.c.fertilizer_id == Fertilizer.id)).\
-                filter(fertilizer_ingredients.c.chemical_id == chemical_id).count()
-            return fertilizers_count
-        return Fertilizer.query.count()
+                filter(fertilizer_ingredients.c.chemical_id == chemical_id)
+        if search:
+            fertilizer_query = search_names(fertilizer_query, Fertilizer, search)
+        return fertilizer_query.count()
+
+    def get_by_id(self, fertilizer_id, fields=None):
+        return load_fields(Fertilizer.query, self.columns, fields, self.relationships).get(fertilizer_id)
+
+    def get_by_ids(self, fertilizer_ids, fields=None):
+        query = load_fields(Fertilizer.query, self.columns, fields, self.relationships)
+        return select_by_ids(query, Fertilizer.id, fertilizer_ids)
+
+    @staticmethod
+    def _from_catalog(catalog, fertilizer_id):
+        chemicals = [CachedChemical(i, catalog.chemical_names[i]) for i in catalog.chemical_ids[fertilizer_id]]
+        return CachedFertilizer(fertilizer_id, catalog.fertilizer_names[fertilizer_id], chemicals)
 
-    def get_by_id(self, fertilizer_id):
-        return Fertilizer.query.get(fertilizer_id)
+    def get_cached_by_id(self, fertilizer_id, fields=None):
+        """
+        Selects the fertilizer with its chemicals from the catalog cache, from the database when the catalog cache is
+        disabled.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return self.get_by_id(fertilizer_id, fields=fields)
+        fertilizer_id = _catalog_id(fertilizer_id)
+        if fertilizer_id not in catalog.fertilizer_names:
+            return None
+        return self._from_catalog(catalog, fertilizer_id)
+
+    def get_cached_by_ids(self, fertilizer_ids, fields=None):
+        """
+        Selects the fertilizers with their chemicals from the catalog cache, from the database when the catalog cache
+        is disabled.
+
+        :return: Tuple of the found fertilizers in the order of fertilizer_ids and the list of ids that were not found.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return self.get_by_ids(fertilizer_ids, fields=fields)
+        fertilizers = [self._from_catalog(catalog, i) for i in fertilizer_ids if i in catalog.fertilizer_names]
+        return order_by_ids(fertilizers, fertilizer_ids)
+
+    def get_cached_page(self, order_by, page=1, items_per_page=5, chemical_id=None):
+        """
+        :param order_by: OrderBy object which sets the sequence.
+        :param page: Page number to display.
+        :param items_per_page: Item limit per page.
+        :param chemical_id: filter fertilizer by chemical id.
+        :return: Tuple of the fertilizers of the page from the catalog cache and the number of fertilizers that match
+                 the filter. None when the catalog cache is disabled.
+        """
+        catalog = catalog_cache.get(load_catalog)
+        if catalog is None:
+            return None
+        fertilizer_ids, fertilizer_count = _catalog_page(catalog.fertilizers(chemical_id), order_by, page,
+                                                         items_per_page)
+        return [self._from_catalog(catalog, i) for i in fertilizer_ids], fertilizer_count
+
+    def refresh_cache(self):
+        catalog_cache.refresh(load_catalog)
 
     @paginate()
-    def get_multiple(self, order_by, chemical_id=None):
+    def get_multiple(self, order_by, chemical_id=None, fields=None, search=None):
         """
         :param order_by: OrderBy object which sets the sequence.
         :param chemical_id: filter fertilizer by chemical id..
+        :param fields: Resource field names to load. Loads all columns and chemicals when None.
+        :param search: filter fertilizer by name and order them by relevance instead of order_by.
         :return: Ordered query of fertilizer database objects.
         """
+        # query for all fertilizers
+        fertilizer_query = load_fields(Fertilizer.query, self.columns, fields, self.relationships)
 
         if chemical_id:
             # query for all fertilizers that contain a chemical with chemical_id
-            fertilizer_query = Fertilizer.query.\
+            fertilizer_query = fertilizer_query.\
                 join(fertilizer_ingredients, (fertilizer_ingredients.c.fertilizer_id == Fertilizer.id)).\
                 filter(fertilizer_ingredients.c.chemical_id == chemical_id)
-        else:
-            # query for all fertilizers
-            fertilizer_query = Fertilizer.query
+
+        if search:
+            return search_names(fertilizer_query, Fertilizer, search)
 
         # Apply order by query name ascending descending and return fertilizer query.
         if order_by.value_name == 'name':
@@ -269,27 +899,71 @@ class FertilizationController:
     Adds functionality to filter, order by and paginate when selecting data from the database.
     Also allows counting of elements(rows) in table.
     """
-    def count_all(self, aquarium_id=None):
+    # resource field names mapped to the columns needed to marshal them
+    columns = {
+        'id': Fertilization.id,
+        'amount_in_milliliter': Fertilization.amount_in_milliliter,
+        'timestamp': Fertilization.timestamp,
+        'aquarium_id': Fertilization.aquarium_id,
+        'fertilizer_id': Fertilization.fertilizer_id
+    }
+
+    def count_all(self, aquarium_id=None, from_timestamp=None, to_timestamp=None):
+        fertilization_query = filter_time_range(Fertilization.query, Fertilization.timestamp,
+                                                from_timestamp, to_timestamp)
+        fertilization_query = filter_visible_aquariums(fertilization_query, Fertilization.aquarium_id)
         if aquarium_id:
-            aquarium = Aquarium.query.get(aquarium_id)
-            return aquarium.fertilization.count()
-        return Fertilization.query.count()
+            fertilization_query = fertilization_query.filter(Fertilization.aquarium_id == aquarium_id)
+        return fertilization_query.count()
+
+    def get_by_id(self, fertilization_id, fields=None):
+        query = load_fields(Fertilization.query, self.columns, fields)
+        query = filter_visible_aquariums(query, Fertilization.aquarium_id)
+        return query.filter(Fertilization.id == fertilization_id).first()
 
-    def get_by_id(self, fertilization_id):
-        return Fertilization.query.get(fertilization_id)
+    def get_by_ids(self, fertilization_ids, fields=None):
+        query = load_fields(Fertilization.query, self.columns, fields)
+        query = filter_visible_aquariums(query, Fertilization.aquarium_id)
+        return select_by_ids(query, Fertilization.id, fertilization_ids)
+
+    def iterate_series(self, aquarium_id=None, from_timestamp=None, to_timestamp=None, chunk_size=10000):
+        """
+        Selects the fertilization series in chunks of rows without creating ORM objects, see iterate_rows.
+
+        :param aquarium_id: filter fertilization by aquarium id.
+        :param from_timestamp: filter fertilization at or after this date time.
+        :param to_timestamp: filter fertilization before this date time.
+        :param chunk_size: Number of rows per chunk.
+        :return: Generator of lists of (aquarium_id, timestamp, amount_in_milliliter, fertilizer_id) rows ordered by
+                 aquarium and timestamp.
+        """
+        query = db.select(Fertilization.aquarium_id, Fertilization.timestamp, Fertilization.amount_in_milliliter,
+                          Fertilization.fertilizer_id).\
+            where(Fertilization.timestamp.isnot(None)).\
+            order_by(Fertilization.aquarium_id, Fertilization.timestamp)
+        query = filter_time_range(query, Fertilization.timestamp, from_timestamp, to_timestamp)
+        query = filter_visible_aquariums(query, Fertilization.aquarium_id)
+        if aquarium_id:
+            query = query.where(Fertilization.aquarium_id == aquarium_id)
+        return iterate_rows(query, chunk_size)
 
     @paginate()
-    def get_multiple(self, order_by, aquarium_id=None):
+    def get_multiple(self, order_by, aquarium_id=None, from_timestamp=None, to_timestamp=None, fields=None):
         """
         :param order_by: OrderBy object which sets the sequence.
         :param aquarium_id: filter fertilization by aquarium id.
+        :param from_timestamp: filter fertilization at or after this date time.
+        :param to_timestamp: filter fertilization before this date time.
+        :param fields: Resource field names to load. Loads all columns when None.
         :return: Ordered query of fertilization database objects.
         """
+        fertilization_query = load_fields(Fertilization.query, self.columns, fields)
+        fertilization_query = filter_visible_aquariums(fertilization_query, Fertilization.aquarium_id)
+        fertilization_query = filter_time_range(fertilization_query, Fertilization.timestamp,
+                                                from_timestamp, to_timestamp)
 
         if aquarium_id:
-            fertilization_query = Fertilization.query.filter(Fertilization.aquarium_id == aquarium_id)
-        else:
-            fertilization_query = Fertilization.query
+            fertilization_query = fertilization_query.filter(Fertilization.aquarium_id == aquarium_id)
 
         # Apply order by query date/amount ascending descending and return fertilization query.
         if order_by.value_name == 'date':
@@ -304,3 +978,292 @@ class FertilizationController:
 
             return fertilization_query.order_by(Fertilization.amount_in_milliliter.desc())
         raise ValueError('Cant apply sorting with {}'.format(order_by))
+
+
+class WaterChangeController:
+    """
+    Selects water change objects from the database.
+
+    Adds functionality to filter, order by and paginate when selecting data from the database.
+    Also allows counting of elements(rows) in table.
+    """
+    # resource field names mapped to the columns needed to marshal them
+    columns = {
+        'id': WaterChange.id,
+        'liter_amount': WaterChange.liter_amount,
+        'timestamp': WaterChange.timestamp,
+        'aquarium_id': WaterChange.aquarium_id
+    }
+
+    def count_all(self, aquarium_id=None, from_timestamp=None, to_timestamp=None):
+        water_change_query = filter_time_range(WaterChange.query, WaterChange.timestamp, from_timestamp, to_timestamp)
+        water_change_query = filter_visible_aquariums(water_change_query, WaterChange.aquarium_id)
+        if aquarium_id:
+            water_change_query = water_change_query.filter(WaterChange.aquarium_id == aquarium_id)
+        return water_change_query.count()
+
+    def get_by_id(self, water_change_id, fields=None):
+        query = load_fields(WaterChange.query, self.columns, fields)
+        query = filter_visible_aquariums(query, WaterChange.aquarium_id)
+        return query.filter(WaterChange.id == water_change_id).first()
+
+    def get_by_ids(self, water_change_ids, fields=None):
+        query = load_fields(WaterChange.query, self.columns, fields)
+        query = filter_visible_aquariums(query, WaterChange.aquarium_id)
+        return select_by_ids(query, WaterChange.id, water_change_ids)
+
+    @paginate()
+    def get_multiple(self, order_by, aquarium_id=None, from_timestamp=None, to_timestamp=None, fields=None):
+        """
+        :param order_by: OrderBy object which sets the sequence.
+        :param aquarium_id: filter water changes by aquarium id.
+        :param from_timestamp: filter water changes at or after this date time.
+        :param to_timestamp: filter water changes before this date time.
+        :param fields: Resource field names to load. Loads all columns when None.
+        :return: Ordered query of water change database objects.
+        """
+        water_change_query = load_fields(WaterChange.query, self.columns, fields)
+        water_change_query = filter_visible_aquariums(water_change_query, WaterChange.aquarium_id)
+        water_change_query = filter_time_range(water_change_query, WaterChange.timestamp, from_timestamp, to_timestamp)
+
+        if aquarium_id:
+            water_change_query = water_change_query.filter(WaterChange.aquarium_id == aquarium_id)
+
+        if order_by.value_name == 'date':
+            if order_by.is_ascending():
+                return water_change_query.order_by(WaterChange.timestamp.asc())
+
+            return water_change_query.order_by(WaterChange.timestamp.desc())
+
+        if order_by.value_name == 'liter':
+            if order_by.is_ascending():
+                return water_change_query.order_by(WaterChange.liter_amount.asc())
+
+            return water_change_query.order_by(WaterChange.liter_amount.desc())
+        raise ValueError('Cant apply sorting with {}'.format(order_by))
+
+
+class NutrientController:
+    """
+    Selects the nutrient estimates of aquariums and rebuilds them from the fertilization and water change history
+    after the history was changed. New fertilization and water changes are applied by the session events of the
+    models. Reads never store an estimate, the write that deleted it rebuilds it after its commit.
+    """
+    def get_by_aquarium_id(self, aquarium_id):
+        return NutrientEstimate.query.get(aquarium_id)
+
+    @staticmethod
+    def _nutrient_version(aquarium_id, lock=False):
+        query = db.select(AquariumStats.nutrient_version).where(AquariumStats.aquarium_id == aquarium_id)
+        if lock:
+            query = query.with_for_update()
+        return db.session.execute(query).scalar()
+
+    def estimate(self, aquarium, chunk_size=10000):
+        """
+        Replays the fertilization and water changes of an aquarium in the order of their timestamps.
+
+        :param aquarium: Aquarium object.
+        :param chunk_size: Number of rows selected at once.
+        :return: NutrientEstimate object, which is not added to the session.
+        """
+        chemical_ids = {}
+        for fertilizer_id, chemical_id in db.session.execute(db.select(fertilizer_ingredients)):
+            chemical_ids.setdefault(fertilizer_id, []).append(chemical_id)
+
+        # one result, drivers with server side cursors can not stream two results of a connection at once
+        fertilization = db.select(Fertilization.timestamp, Fertilization.id, Fertilization.amount_in_milliliter,
+                                  Fertilization.fertilizer_id, db.null().label('liter_amount')).\
+            where(Fertilization.aquarium_id == aquarium.id, Fertilization.timestamp.isnot(None))
+        water_changes = db.select(WaterChange.timestamp, WaterChange.id, db.null(), db.null(),
+                                  WaterChange.liter_amount).\
+            where(WaterChange.aquarium_id == aquarium.id, WaterChange.timestamp.isnot(None))
+        query = db.union_all(fertilization, water_changes).order_by('timestamp', 'id')
+
+        concentrations = {}
+        timestamp = None
+        for rows in iterate_rows(query, chunk_size):
+            for row in rows:
+                timestamp = row.timestamp
+                if row.liter_amount is None:
+                    dose = fertilization_dose(row.amount_in_milliliter, aquarium.volume_in_liter)
+                    for chemical_id in chemical_ids.get(row.fertilizer_id, []):
+                        concentrations[chemical_id] = concentrations.get(chemical_id, 0.0) + dose
+                else:
+                    factor = water_change_factor(row.liter_amount, aquarium.volume_in_liter)
+                    concentrations = {chemical_id: c * factor for chemical_id, c in concentrations.items()}
+
+        chemicals = {chemical.id: chemical for chemical in Chemical.query.filter(Chemical.id.in_(concentrations))}
+        estimate = NutrientEstimate(aquarium_id=aquarium.id, timestamp=timestamp)
+        estimate.concentrations = [NutrientConcentration(chemical_id=chemical_id, chemical=chemicals[chemical_id],
+                                                         milliliter_per_liter=c)
+                                   for chemical_id, c in concentrations.items() if chemical_id in chemicals]
+        return estimate
+
+    def rebuild(self, aquarium, chunk_size=10000):
+        """
+        Estimates the concentrations of an aquarium from its history and stores them as the new estimate. The estimate
+        is only stored if no fertilization or water change of the aquarium was committed while the history was read,
+        because the session events of such a change found no estimate to apply it to.
+
+        :param aquarium: Aquarium object.
+        :param chunk_size: Number of rows selected at once.
+        :return: NutrientEstimate object, not stored if the history changed.
+        """
+        # read first, so it is older than the history on databases with snapshots of the first read (e.g. mysql)
+        version = self._nutrient_version(aquarium.id)
+        estimate = self.estimate(aquarium, chunk_size)
+
+        # the lock makes writers of the history wait until the estimate is committed
+        if self._nutrient_version(aquarium.id, lock=True) != version:
+            # the write that changed the history rebuilds it again after its commit
+            db.session.rollback()
+            return estimate
+
+        db.session.add(estimate)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # rebuilt by a concurrent request
+            db.session.rollback()
+            return self.get_by_aquarium_id(aquarium.id) or estimate
+        return estimate
+
+    def rebuild_invalidated(self):
+        """
+        Rebuilds the estimates deleted by the committed changes of the session. Called by the write requests after
+        their commit, a failed rebuild is logged and the estimate is computed by the reads until the next rebuild.
+        """
+        for aquarium_id in sorted(pop_invalidated_nutrient_estimates(db.session)):
+            aquarium = Aquarium.query.filter(Aquarium.id == aquarium_id, AquariumController.visible).first()
+            if aquarium is None:
+                continue
+            try:
+                self.rebuild(aquarium)
+            except SQLAlchemyError:
+                db.session.rollback()
+                current_app.logger.exception('Rebuild of the nutrient estimate of aquarium %s failed', aquarium_id)
+
+
+class PurgeJobController:
+    """
+    Selects purge jobs and runs them in the background thread of the purger extension.
+    """
+    def get_by_id(self, job_id):
+        return PurgeJob.query.get(job_id)
+
+    def _resumable(self):
+        # running jobs are taken over when their process stopped without marking them failed
+        expiry_timestamp = datetime.utcnow() - timedelta(seconds=current_app.config['PURGE_RUNNING_TIMEOUT'])
+        return or_(PurgeJob.status.in_([PurgeJob.PENDING, PurgeJob.FAILED]),
+                   and_(PurgeJob.status == PurgeJob.RUNNING, PurgeJob.updated_timestamp < expiry_timestamp))
+
+    def get_unfinished(self):
+        """
+        :return: Pending and failed jobs and running jobs without progress for PURGE_RUNNING_TIMEOUT seconds.
+        """
+        return PurgeJob.query.filter(self._resumable()).order_by(PurgeJob.id.asc()).all()
+
+    def start(self, job_id):
+        purger.submit(self.run, job_id)
+
+    def run(self, job_id):
+        """
+        Deletes the rows of the aquarium of a job in chunks of PURGE_CHUNK_SIZE rows, each chunk in a transaction of
+        its own, and the aquarium at last. Failed or interrupted jobs continue with the remaining rows, jobs that are
+        done or running in another process are skipped.
+
+        :param job_id: Id of the purge job.
+        """
+        config = current_app.config
+        chunk_size = config['PURGE_CHUNK_SIZE']
+        # only one process runs a job, the others find it running or done
+        claimed = PurgeJob.query.filter(PurgeJob.id == job_id, self._resumable()). \
+            update({'status': PurgeJob.RUNNING, 'error': None, 'updated_timestamp': datetime.utcnow()},
+                   synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = self.get_by_id(job_id)
+        try:
+            for model in purged_models:
+                while job.delete_chunk(model, chunk_size) == chunk_size:
+                    db.session.commit()
+                    # lets waiting writers take the database lock
+                    time.sleep(config['PURGE_CHUNK_PAUSE'])
+                db.session.commit()
+
+            job.delete_aquarium()
+            job.status = PurgeJob.DONE
+            job.finished_timestamp = datetime.utcnow()
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            job.status = PurgeJob.FAILED
+            job.error = str(error)[:255]
+            db.session.commit()
+            raise
+
+
+class ChangeLogController:
+    """
+    Selects the entries of the change log by id and deletes expired and superseded entries.
+    """
+    def get_head_cursor(self):
+        """
+        :return: Cursor of the latest entry.
+        """
+        head_id = db.session.query(func.max(ChangeLogEntry.id)).scalar()
+        return encode_change_cursor(head_id or 0, datetime.utcnow())
+
+    def get_page(self, since_id, items_per_page):
+        """
+        Selects the entries after an entry. Entries are written in commit order (see ChangeLogLock), so no entry with a
+        lower id is committed after the page was read.
+
+        :param since_id: Id of the last entry the client received.
+        :param items_per_page: Maximum number of entries.
+        :return: Tuple of the entries ordered by id, the cursor of the next page and whether more entries follow.
+        """
+        entries = ChangeLogEntry.query.filter(ChangeLogEntry.id > since_id).order_by(ChangeLogEntry.id.asc()). \
+            limit(items_per_page + 1).all()
+        has_more = len(entries) > items_per_page
+        entries = entries[:items_per_page]
+
+        last_id = entries[-1].id if entries else since_id
+        # the client received all entries until now, unless the page was full
+        timestamp = entries[-1].timestamp if has_more else datetime.utcnow()
+        return entries, encode_change_cursor(last_id, timestamp), has_more
+
+    def _delete_chunks(self, query, chunk_size):
+        deleted = 0
+        while True:
+            ids = db.session.execute(query.limit(chunk_size)).scalars().all()
+            if ids:
+                db.session.execute(db.delete(ChangeLogEntry.__table__).where(ChangeLogEntry.id.in_(ids)))
+            db.session.commit()
+            deleted += len(ids)
+            if len(ids) < chunk_size:
+                return deleted
+
+    def compact(self, retention_days, compaction, chunk_size):
+        """
+        Deletes the entries older than retention_days and, if compaction is set, all entries of a resource except the
+        latest one, in transactions of chunk_size entries.
+
+        :return: Tuple of the numbers of expired and superseded entries deleted.
+        """
+        expiry_timestamp = datetime.utcnow() - timedelta(days=retention_days)
+        expired = self._delete_chunks(db.select(ChangeLogEntry.id).where(ChangeLogEntry.timestamp < expiry_timestamp),
+                                      chunk_size)
+        superseded = 0
+        if compaction:
+            latest = db.select(ChangeLogEntry.resource, ChangeLogEntry.resource_id,
+                               func.max(ChangeLogEntry.id).label('id')). \
+                group_by(ChangeLogEntry.resource, ChangeLogEntry.resource_id).subquery()
+            query = db.select(ChangeLogEntry.id).join(latest, and_(ChangeLogEntry.resource == latest.c.resource,
+                                                                   ChangeLogEntry.resource_id == latest.c.resource_id,
+                                                                   ChangeLogEntry.id < latest.c.id))
+            superseded = self._delete_chunks(query, chunk_size)
+        return expired, superseded
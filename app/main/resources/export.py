@@ -0,0 +1,227 @@
+import struct
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import Response, stream_with_context
+from flask_restful import Resource, abort
+
+try:
+    # optional, the arrow format answers with 501 when pyarrow is not installed
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+from app.http_status_codes import HttpStatus as Status
+from app.main.api_parser import ParserFactory
+from .controller import TemperatureController, FertilizationController
+
+"""
+Columnar export of the temperature and fertilization series for analytics, built from chunks of Core rows without
+ORM objects and JSON marshalling.
+"""
+
+CHUNK_SIZE = 10000
+# bytes of the npy export kept in memory before it is written to a temporary file
+SPOOL_SIZE = 16 * 1024 * 1024
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+parser_factory = ParserFactory()
+temperature_controller = TemperatureController()
+fertilization_controller = FertilizationController()
+
+
+def _to_microseconds(timestamp):
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+class ExportColumn:
+    """
+    Data class that describes a column of a columnar export.
+    """
+    def __init__(self, name, npy_type, struct_format, arrow_type, convert=None):
+        """
+        :param name: Column name in the export.
+        :param npy_type: numpy type description of the column, e.g. '<i8'.
+        :param struct_format: struct format character of the column values in the npy records.
+        :param arrow_type: Name of the pyarrow type factory, e.g. 'int64'.
+        :param convert: Function that converts a row value to the struct value. Values are written as is when None.
+        """
+        self.name = name
+        self.npy_type = npy_type
+        self.struct_format = struct_format
+        self.arrow_type = arrow_type
+        self.convert = convert
+
+    def make_arrow_type(self):
+        if self.arrow_type == 'timestamp':
+            return pyarrow.timestamp('us')
+        return getattr(pyarrow, self.arrow_type)()
+
+
+def _timestamp_column():
+    return ExportColumn('timestamp', '<M8[us]', 'q', 'timestamp', _to_microseconds)
+
+
+temperature_columns = [
+    ExportColumn('aquarium_id', '<i8', 'q', 'int64'),
+    _timestamp_column(),
+    ExportColumn('temperature', '<f8', 'd', 'float64')
+]
+
+fertilization_columns = [
+    ExportColumn('aquarium_id', '<i8', 'q', 'int64'),
+    _timestamp_column(),
+    ExportColumn('amount_in_milliliter', '<i8', 'q', 'int64'),
+    ExportColumn('fertilizer_id', '<i8', 'q', 'int64')
+]
+
+
+def npy_header(columns, count):
+    """
+    Creates the header of a npy file (format version 1.0) of a one dimensional array of records.
+
+    :param columns: List of ExportColumn objects, the fields of the records.
+    :param count: Number of records.
+    :return: Header bytes, the data starts at a multiple of 64 bytes.
+    """
+    description = {
+        'descr': [(column.name, column.npy_type) for column in columns],
+        'fortran_order': False,
+        'shape': (count,)
+    }
+    # numpy reads the header with ast.literal_eval
+    header = repr(description)
+    # magic string, version, header length, header padded with spaces and terminated by a newline
+    padding = 63 - (10 + len(header)) % 64
+    header = header + ' ' * padding + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin-1')
+
+
+def npy_export(columns, chunks):
+    """
+    Writes the rows as npy records into a temporary file, because the header needs the number of rows.
+
+    :param columns: List of ExportColumn objects in the order of the row values.
+    :param chunks: Iterable of lists of rows.
+    :return: Generator of the bytes of the npy file.
+    """
+    record = struct.Struct('<' + ''.join(column.struct_format for column in columns))
+    converters = [column.convert for column in columns]
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    count = 0
+    try:
+        for rows in chunks:
+            buffer = bytearray(record.size * len(rows))
+            for i, row in enumerate(rows):
+                record.pack_into(buffer, i * record.size, *[value if convert is None else convert(value)
+                                                            for convert, value in zip(converters, row)])
+            spool.write(buffer)
+            count += len(rows)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+
+    def generate():
+        with spool:
+            yield npy_header(columns, count)
+            for block in iter(lambda: spool.read(STREAM_BLOCK_SIZE), b''):
+                yield block
+    return generate()
+
+
+class _ArrowSink:
+    """
+    File like object for pyarrow that collects the written bytes until they are taken.
+    """
+    def __init__(self):
+        self.buffers = []
+        self.closed = False
+
+    def write(self, data):
+        self.buffers.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.buffers)
+        self.buffers = []
+        return data
+
+
+def arrow_export(columns, chunks):
+    """
+    Streams the rows in the Arrow IPC streaming format, one record batch per chunk.
+
+    :param columns: List of ExportColumn objects in the order of the row values.
+    :param chunks: Iterable of lists of rows.
+    :return: Generator of the bytes of the arrow stream.
+    """
+    schema = pyarrow.schema([(column.name, column.make_arrow_type()) for column in columns])
+    sink = _ArrowSink()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for rows in chunks:
+            arrays = [pyarrow.array(values, type=field.type) for field, values in zip(schema, zip(*rows))]
+            writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+class _SeriesExportResource(Resource):
+    """
+    Gives access to the GET HTTP method to download a series as npy array of records or as arrow stream.
+    """
+    name = None
+    columns = None
+    controller = None
+
+    def get(self):
+        parser = parser_factory.export_parser()
+        args = parser.parse_args()
+        export_format = args['format']
+        chunks = self.controller.iterate_series(args['aquarium-id'], args['from'], args['to'], CHUNK_SIZE)
+
+        if export_format == 'arrow':
+            if pyarrow is None:
+                abort(Status.not_implemented_501, message='Arrow export requires pyarrow')
+            # rows are selected while the response is sent
+            body = stream_with_context(arrow_export(self.columns, chunks))
+            mimetype = 'application/vnd.apache.arrow.stream'
+            filename = '{}.arrows'.format(self.name)
+        else:
+            body = npy_export(self.columns, chunks)
+            mimetype = 'application/octet-stream'
+            filename = '{}.npy'.format(self.name)
+
+        response = Response(body, status=Status.ok_200, mimetype=mimetype)
+        response.headers['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+        return response
+
+
+class TemperatureExportResource(_SeriesExportResource):
+    """
+    Gives access to the GET HTTP method to download the temperatures (aquarium_id, timestamp, temperature) ordered by
+    aquarium and timestamp.
+    """
+    name = 'temperatures'
+    columns = temperature_columns
+    controller = temperature_controller
+
+
+class FertilizationExportResource(_SeriesExportResource):
+    """
+    Gives access to the GET HTTP method to download the fertilization (aquarium_id, timestamp, amount_in_milliliter,
+    fertilizer_id) ordered by aquarium and timestamp.
+    """
+    name = 'fertilization'
+    columns = fertilization_columns
+    controller = fertilization_controller
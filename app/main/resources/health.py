@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from flask_restful import Resource
+from sqlalchemy import text
+
+from app.extensions import db
+from app.http_status_codes import HttpStatus as Status
+
+"""
+Liveness and readiness checks for load balancers and orchestration.
+"""
+
+# runs the database checks, so a hanging database or an exhausted pool can be reported after the timeout
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='readiness')
+
+
+def pool_status(engine):
+    """
+    :param engine: SQLAlchemy engine.
+    :return: Dict of the pool class and the connection counts the pool implementation reports.
+    """
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
+
+
+def _round_trip(engine):
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    return (time.perf_counter() - start) * 1000
+
+
+def check_database(engine, timeout):
+    """
+    Runs SELECT 1 on a new pool connection.
+
+    :param engine: SQLAlchemy engine to check.
+    :param timeout: Seconds to wait for the pool checkout and the query.
+    :return: Tuple of the readiness and a dict of the status, round trip time and pool counts.
+    """
+    future = _executor.submit(_round_trip, engine)
+    try:
+        latency_ms = future.result(timeout=timeout)
+        status = {'status': 'ok', 'latency_ms': round(latency_ms, 3)}
+        ready = True
+    except TimeoutError:
+        status = {'status': 'timeout', 'timeout_ms': timeout * 1000}
+        ready = False
+    except Exception as error:
+        status = {'status': 'error', 'error': type(error).__name__}
+        ready = False
+    status['pool'] = pool_status(engine)
+    return ready, status
+
+
+class HealthResource(Resource):
+    """
+    Liveness check without I/O.
+    """
+    def get(self):
+        return {'status': 'ok'}, Status.ok_200
+
+
+class ReadinessResource(Resource):
+    """
+    Readiness check of the database and the read replica with round trip time and connection pool counts.
+    """
+    def get(self):
+        app = current_app._get_current_object()
+        timeout = app.config['READINESS_TIMEOUT']
+
+        binds = [None] + list(app.config['SQLALCHEMY_BINDS'] or {})
+        databases = {}
+        ready = True
+        for bind in binds:
+            bind_ready, databases[bind or 'default'] = check_database(db.get_engine(app, bind=bind), timeout)
+            ready = ready and bind_ready
+
+        content = {'status': 'ok' if ready else 'unavailable', 'databases': databases}
+        return content, Status.ok_200 if ready else Status.service_unavailable_503
@@ -11,11 +11,20 @@ class Fields:
     """
     Data class used to marshall sqlalchemy data objects for transmission.
     """
+    aquarium_stats_field = {
+        'temperature_count': fields.Integer,
+        'latest_temperature': fields.Float,
+        'latest_temperature_timestamp': fields.DateTime,
+        'fertilization_count': fields.Integer,
+        'latest_fertilization_timestamp': fields.DateTime
+    }
+
     aquarium_field = {
         'id': fields.Integer,
         'name': fields.String,
         'volume_in_liter': fields.Integer,
-        'temperatures': fields.Url('temperaturelistresource')
+        'temperatures': fields.Url('temperaturelistresource'),
+        'stats': fields.Nested(aquarium_stats_field, allow_null=True)
     }
 
     aquarium_list_field = {
@@ -25,6 +34,24 @@ class Fields:
         'total_results': fields.Integer,
     }
 
+    aquarium_summary_field = {
+        'id': fields.Integer,
+        'name': fields.String,
+        'volume_in_liter': fields.Integer,
+        'temperature_count': fields.Integer,
+        'min_temperature': fields.Float,
+        'max_temperature': fields.Float,
+        'avg_temperature': fields.Float,
+        'fertilization_count': fields.Integer,
+        'fertilizer_milliliter': fields.Integer
+    }
+
+    aquarium_summary_list_field = {
+        'content': fields.List(fields.Nested(aquarium_summary_field)),
+        'items_per_page': fields.Integer,
+        'next': fields.String
+    }
+
     temperature_field = {
         'id': fields.Integer,
         'temperature': fields.Float,
@@ -39,6 +66,63 @@ class Fields:
         'total_results': fields.Integer,
     }
 
+    temperature_batch_field = {
+        'received': fields.Integer,
+        'inserted': fields.Integer,
+        'duplicates': fields.Integer
+    }
+
+    batch_result_field = {
+        'status': fields.Integer,
+        # response of the operation, e.g. the created resource
+        'body': fields.Raw
+    }
+
+    batch_field = {
+        'results': fields.List(fields.Nested(batch_result_field))
+    }
+
+    change_field = {
+        'id': fields.Integer,
+        'resource': fields.String,
+        'resource_id': fields.Integer,
+        'action': fields.String,
+        'timestamp': fields.DateTime
+    }
+
+    change_list_field = {
+        'content': fields.List(fields.Nested(change_field)),
+        'items_per_page': fields.Integer,
+        'next': fields.String,
+        'has_more': fields.Boolean
+    }
+
+    temperature_statistics_field = {
+        'aquarium_id': fields.Integer,
+        'from': fields.DateTime,
+        'to': fields.DateTime,
+        'count': fields.Integer,
+        'mean': fields.Float,
+        'stddev': fields.Float,
+        'min': fields.Float,
+        'max': fields.Float,
+        'percentiles': fields.List(fields.Nested({
+            'percentile': fields.Integer,
+            'temperature': fields.Float
+        })),
+        'histogram': fields.Nested({
+            'bin_edges': fields.List(fields.Float),
+            'counts': fields.List(fields.Integer)
+        }),
+        'time_in_range': fields.Nested({
+            'low': fields.Float,
+            'high': fields.Float,
+            'below': fields.Float,
+            'in_range': fields.Float,
+            'above': fields.Float
+        })
+    }
+
     chemical_field = {
         'id': fields.Integer,
         'name': fields.String
@@ -79,6 +163,18 @@ class Fields:
         'total_results': fields.Integer,
     }
 
+    purge_job_field = {
+        'id': fields.Integer,
+        'aquarium_id': fields.Integer,
+        'status': fields.String,
+        'deleted_temperatures': fields.Integer,
+        'deleted_fertilization': fields.Integer,
+        'deleted_water_changes': fields.Integer,
+        'created_timestamp': fields.DateTime,
+        'finished_timestamp': fields.DateTime,
+        'error': fields.String
+    }
+
     water_change_field = {
         'id': fields.Integer,
         'liter_amount': fields.Integer,
@@ -92,3 +188,59 @@ class Fields:
         'items_per_page': fields.Integer,
         'total_results': fields.Integer,
     }
+
+    nutrient_concentration_field = {
+        'chemical_id': fields.Integer,
+        'name': fields.String(attribute='chemical.name'),
+        'milliliter_per_liter': fields.Float
+    }
+
+    nutrient_field = {
+        'aquarium_id': fields.Integer,
+        # time of the latest fertilization or water change of the estimate
+        'timestamp': fields.DateTime,
+        'concentrations': fields.List(fields.Nested(nutrient_concentration_field))
+    }
+
+    @staticmethod
+    def select(resource_field, names=None):
+        """
+        Reduces a resource field to the requested field names.
+
+        :param resource_field: Marshal field dict of a single resource.
+        :param names: Requested field names. Returns the complete resource field when None.
+        :return: Marshal field dict with the requested fields only.
+        """
+        if not names:
+            return resource_field
+        return {name: field for name, field in resource_field.items() if name in names}
+
+    @staticmethod
+    def select_list(resource_field, names=None):
+        """
+        Creates a paginated list field for a resource field reduced to the requested field names.
+
+        :param resource_field: Marshal field dict of a single resource.
+        :param names: Requested field names. Uses the complete resource field when None.
+        :return: Marshal field dict for a paginated list of resources.
+        """
+        return {
+            'content': fields.List(fields.Nested(Fields.select(resource_field, names))),
+            'page': fields.Integer,
+            'items_per_page': fields.Integer,
+            'total_results': fields.Integer,
+        }
+
+    @staticmethod
+    def select_id_list(resource_field, names=None):
+        """
+        Creates a field for resources requested by a list of ids, reduced to the requested field names.
+
+        :param resource_field: Marshal field dict of a single resource.
+        :param names: Requested field names. Uses the complete resource field when None.
+        :return: Marshal field dict for the found resources and the ids that were not found.
+        """
+        return {
+            'content': fields.List(fields.Nested(Fields.select(resource_field, names))),
+            'missing_ids': fields.List(fields.Integer),
+        }
@@ -1,22 +1,32 @@
-from flask_restful import Resource, marshal_with, abort
-from flask import current_app
+import re
+from functools import partial
 
-from app.main.models import Aquarium, AquariumTemperature, Chemical, Fertilizer, Fertilization, db
+from flask_restful import Resource, marshal_with, marshal, abort
+from flask import current_app, g
+from sqlalchemy.exc import IntegrityError
+
+from app.main.models import Aquarium, AquariumTemperature, Chemical, Fertilizer, Fertilization, PurgeJob, \
+    WaterChange, db
 from app.http_status_codes import HttpStatus as Status
 from .resource_fields import Fields
 from app.main.api_parser import ParserFactory
-from .controller import make_order_by, ResponseContent, AquariumController, TemperatureController, \
-    ChemicalController, FertilizerController, FertilizationController
+from .controller import make_order_by, ResponseContent, IdListContent, KeysetContent, AquariumController, \
+    AquariumSummaryController, TemperatureController, ChemicalController, FertilizerController, \
+    FertilizationController, PurgeJobController, WaterChangeController, NutrientController
 
 # Can create parser with different arguments and request types
 parser_factory = ParserFactory()
 
 # Utility objects to count, select, order by and filter data from the database for all resources.
 aquarium_controller = AquariumController()
+aquarium_summary_controller = AquariumSummaryController()
 temperature_controller = TemperatureController()
 chemical_controller = ChemicalController()
 fertilizer_controller = FertilizerController()
 fertilization_controller = FertilizationController()
+purge_job_controller = PurgeJobController()
+water_change_controller = WaterChangeController()
+nutrient_controller = NutrientController()
 
 
 def abort_if_resource_not_found(resource, message='Resource not found'):
@@ -24,53 +34,147 @@ def abort_if_resource_not_found(resource, message='Resource not found'):
         abort(Status.not_found_404, message=message)
 
 
+def in_batch():
+    """
+    :return: True while the operations of a batch request are executed, see BatchResource.
+    """
+    return 'after_batch_commit' in g
+
+
+def commit():
+    """
+    Commits the session. The operations of a batch request are only flushed, which assigns the ids of new resources,
+    and committed together at the end of the batch. The nutrient estimates deleted by the changes are rebuilt after the
+    commit.
+    """
+    if in_batch():
+        db.session.flush()
+    else:
+        db.session.commit()
+    after_commit(nutrient_controller.rebuild_invalidated)
+
+
+def after_commit(func, *args):
+    """
+    Calls func with args after the changes of the request are committed, e.g. to update the caches. Batch requests
+    call it after the batch is committed and not at all when it is rolled back.
+    """
+    if in_batch():
+        g.after_batch_commit.append(partial(func, *args))
+    else:
+        func(*args)
+
+
+# unique violations of a name column, SQLite reports the column, MySQL the unique key (e.g. ix_aquarium_name) and
+# PostgreSQL the key in the detail of the message
+_name_conflict_pattern = re.compile(r"UNIQUE constraint failed: \w+\.name$|"
+                                    r"Duplicate entry .* for key '(\w+\.)?(\w+_)?name'|"
+                                    r"Key \(name\)=\(.*\) already exists")
+
+
+def _name_taken(model, name, resource_id=None):
+    query = model.query.filter(model.name == name)
+    if resource_id is not None:
+        query = query.filter(model.id != resource_id)
+    return db.session.query(query.exists()).scalar()
+
+
+def commit_or_abort_on_conflict(resource, message='Name not available'):
+    """
+    Commits the session and relies on the unique constraints of the names instead of checking them beforehand.
+    Aborts with conflict if a name is taken, other integrity errors are raised. Messages of other drivers than the
+    ones of _name_conflict_pattern are recognized by selecting the name after the rollback.
+
+    :param resource: Aquarium, chemical or fertilizer object with the name that is committed.
+    """
+    model, name, resource_id = type(resource), resource.name, resource.id
+    try:
+        commit()
+    except IntegrityError as error:
+        db.session.rollback()
+        if not _name_conflict_pattern.search(str(error.orig)) and not _name_taken(model, name, resource_id):
+            raise
+        abort(Status.conflict_409, message=message)
+
+
 class AquariumListResource(Resource):
     """
     Gives access to GET and POST HTTP methods to get multiple aquarium resources or create a new aquarium resource.
     """
-    @marshal_with(Fields.aquarium_list_field)
     def get(self):
 
         parser = parser_factory.aquarium_parser('get')
         args = parser.parse_args()
         order_by = make_order_by(args['order-by'])
         page = args['page']
+        fields = args['fields']
+        search = args['q']
+
+        if args['ids']:
+            aquariums, missing_ids = aquarium_controller.get_by_ids(args['ids'], fields=fields)
+            response = IdListContent(aquariums, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.aquarium_field, fields)), Status.ok_200
 
         items_per_page = current_app.config['ITEMS_PER_PAGE']
         # set pagination attributes for decorator
         aquarium_controller.get_multiple.set_page(page)
         aquarium_controller.get_multiple.set_items_per_page(items_per_page)
 
-        aquariums = aquarium_controller.get_multiple(order_by=order_by)
-        aquarium_count = aquarium_controller.count_all()
+        aquariums = aquarium_controller.get_multiple(order_by=order_by, fields=fields, search=search)
+        aquarium_count = aquarium_controller.count_all(search)
 
         response = ResponseContent(aquariums, page, items_per_page, aquarium_count)
-        return response, Status.ok_200
+        return marshal(response, Fields.select_list(Fields.aquarium_field, fields)), Status.ok_200
 
     @marshal_with(Fields.aquarium_field)
     def post(self):
         parser = parser_factory.aquarium_parser('post')
         args = parser.parse_args()
 
-        name = args['name']
-        if not Aquarium.is_name_available(name):
-            abort(Status.conflict_409, message='Name not available')
-
         new_aquarium = Aquarium(name=args['name'], volume_in_liter=args['volume_in_liter'])
         db.session.add(new_aquarium)
-        db.session.commit()
+        commit_or_abort_on_conflict(new_aquarium)
         return new_aquarium, Status.created_201
 
 
+class AquariumSummaryResource(Resource):
+    """
+    Gives access to the GET HTTP method to compare the temperatures and fertilization of all aquariums over a time
+    range. Pages are requested with the cursor of the previous page.
+    """
+    @marshal_with(Fields.aquarium_summary_list_field)
+    def get(self):
+        parser = parser_factory.aquarium_summary_parser()
+        args = parser.parse_args()
+        order_by = make_order_by(args['order-by'])
+        items_per_page = args['items-per-page'] or current_app.config['ITEMS_PER_PAGE']
+
+        after = None
+        if args['after']:
+            cursor_order_by, from_timestamp, to_timestamp, sort_value, last_id = args['after']
+            if cursor_order_by != args['order-by']:
+                abort(Status.bad_request_400, message={'after': 'Cursor of a different order-by parameter.'})
+            if (from_timestamp, to_timestamp) != (args['from'], args['to']):
+                abort(Status.bad_request_400, message={'after': 'Cursor of different from or to parameters.'})
+            after = (sort_value, last_id)
+
+        summaries, next_cursor = aquarium_summary_controller.get_page(order_by, args['from'], args['to'], after,
+                                                                      items_per_page)
+        return KeysetContent(summaries, items_per_page, next_cursor), Status.ok_200
+
+
 class AquariumResource(Resource):
     """
     Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single aquarium resource.
     """
-    @marshal_with(Fields.aquarium_field)
     def get(self, aquarium_id):
-        aquarium = aquarium_controller.get_by_id(aquarium_id)
+        parser = parser_factory.fields_parser(Fields.aquarium_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        aquarium = aquarium_controller.get_by_id(aquarium_id, fields=fields)
         abort_if_resource_not_found(aquarium)
-        return aquarium, Status.ok_200
+        return marshal(aquarium, Fields.select(Fields.aquarium_field, fields)), Status.ok_200
 
     @marshal_with(Fields.aquarium_field)
     def patch(self, aquarium_id):
@@ -82,19 +186,38 @@ class AquariumResource(Resource):
 
         volume_in_liter = args['volume_in_liter']
         name = args['name']
-        if not Aquarium.is_name_available(name):
-            abort(Status.conflict_409, message='Name not available')
-
         aquarium.update_attributes(name=name, volume_in_liter=volume_in_liter)
-        db.session.commit()
+        commit_or_abort_on_conflict(aquarium)
         return aquarium, Status.ok_200
 
     def delete(self, aquarium_id):
         aquarium = aquarium_controller.get_by_id(aquarium_id)
         abort_if_resource_not_found(aquarium)
-        db.session.delete(aquarium)
-        db.session.commit()
-        return '', Status.no_content_204
+        if not current_app.config['PURGE_ENABLED']:
+            db.session.delete(aquarium)
+            commit()
+            after_commit(temperature_controller.remove_from_cache, aquarium_id)
+            return '', Status.no_content_204
+
+        # hidden at once, the temperatures and fertilization are deleted in chunks by a background job
+        aquarium.soft_delete()
+        job = PurgeJob(aquarium_id=aquarium.id)
+        db.session.add(job)
+        commit()
+        after_commit(temperature_controller.remove_from_cache, aquarium.id)
+        after_commit(purge_job_controller.start, job.id)
+        return marshal(job, Fields.purge_job_field), Status.accepted_202, {'Location': '/purge-jobs/{}'.format(job.id)}
+
+
+class PurgeJobResource(Resource):
+    """
+    Gives access to the GET HTTP method to follow the deletion of an aquarium.
+    """
+    @marshal_with(Fields.purge_job_field)
+    def get(self, job_id):
+        job = purge_job_controller.get_by_id(job_id)
+        abort_if_resource_not_found(job)
+        return job, Status.ok_200
 
 
 class TemperatureListResource(Resource):
@@ -102,23 +225,41 @@ class TemperatureListResource(Resource):
     Gives access to GET and POST HTTP methods to get multiple temperature resources
     or create a new temperature resource.
     """
-    @marshal_with(Fields.temperature_list_field)
     def get(self):
         parser = parser_factory.temperature_parser('get')
         args = parser.parse_args()
         order_by = make_order_by(args['order-by'])
         page = args['page']
+        fields = args['fields']
         aquarium_id = args['aquarium-id']
+        from_timestamp = args['from']
+        to_timestamp = args['to']
+
+        if args['ids']:
+            temperatures, missing_ids = temperature_controller.get_by_ids(args['ids'], fields=fields)
+            response = IdListContent(temperatures, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.temperature_field, fields)), Status.ok_200
 
         items_per_page = current_app.config['ITEMS_PER_PAGE']
+        newest_first = order_by.value_name == 'date' and not order_by.is_ascending()
+        if aquarium_id and newest_first and not from_timestamp and not to_timestamp:
+            # newest temperatures of an aquarium are served from the reading cache
+            latest = temperature_controller.get_latest(aquarium_id, page, items_per_page)
+            if latest is not None:
+                temperatures, temperature_count = latest
+                response = ResponseContent(temperatures, page, items_per_page, temperature_count)
+                return marshal(response, Fields.select_list(Fields.temperature_field, fields)), Status.ok_200
+
         # set pagination attributes for decorator
         temperature_controller.get_multiple.set_page(page)
         temperature_controller.get_multiple.set_items_per_page(items_per_page)
 
-        temperatures = temperature_controller.get_multiple(order_by=order_by, aquarium_id=aquarium_id)
-        aquarium_count = temperature_controller.count_all(aquarium_id)
+        temperatures = temperature_controller.get_multiple(order_by=order_by, aquarium_id=aquarium_id,
+                                                           from_timestamp=from_timestamp, to_timestamp=to_timestamp,
+                                                           fields=fields)
+        aquarium_count = temperature_controller.count_all(aquarium_id, from_timestamp, to_timestamp)
         response = ResponseContent(temperatures, page, items_per_page, aquarium_count)
-        return response, Status.ok_200
+        return marshal(response, Fields.select_list(Fields.temperature_field, fields)), Status.ok_200
 
     @marshal_with(Fields.temperature_field)
     def post(self):
@@ -126,25 +267,75 @@ class TemperatureListResource(Resource):
         args = parser.parse_args()
         celsius = args['celsius']
         aquarium_id = args['aquarium_id']
+        timestamp = args['timestamp']
 
         aquarium = aquarium_controller.get_by_id(aquarium_id)
         abort_if_resource_not_found(aquarium)
 
         temperature = AquariumTemperature(temperature=celsius)
+        if timestamp:
+            temperature.timestamp = timestamp
         aquarium.add_temperature(temperature)
-        db.session.commit()
+        try:
+            commit()
+        except IntegrityError:
+            # retried upload of a measurement, answer with the stored measurement
+            db.session.rollback()
+            if not timestamp:
+                raise
+            if in_batch():
+                # the rollback discarded the previous operations of the batch
+                abort(Status.conflict_409, message='Temperature of the aquarium at this timestamp exists')
+            existing_temperature = temperature_controller.get_by_timestamp(aquarium_id, timestamp)
+            abort_if_resource_not_found(existing_temperature)
+            return existing_temperature, Status.ok_200
+
+        after_commit(temperature_controller.add_to_cache, temperature)
         return temperature, Status.created_201
 
 
+class TemperatureBatchResource(Resource):
+    """
+    Gives access to the POST HTTP method to upload multiple temperature measurements with client timestamps at once.
+    Measurements that already exist for the aquarium and timestamp are skipped, so failed uploads can be retried.
+    """
+    @marshal_with(Fields.temperature_batch_field)
+    def post(self):
+        parser = parser_factory.temperature_batch_parser()
+        args = parser.parse_args()
+        temperatures = args['temperatures']
+
+        aquarium_ids = sorted({temperature['aquarium_id'] for temperature in temperatures})
+        _, missing_ids = aquarium_controller.get_by_ids(aquarium_ids, fields=['id'])
+        if missing_ids:
+            abort(Status.bad_request_400, message={'temperatures': 'Invalid aquarium ids {}'.format(missing_ids)})
+
+        inserted = AquariumTemperature.insert_ignore_duplicates(temperatures)
+        commit()
+        # measurements can be older than the cached ones
+        after_commit(temperature_controller.remove_from_cache, *inserted)
+
+        inserted_count = sum(inserted.values())
+        response = {
+            'received': len(temperatures),
+            'inserted': inserted_count,
+            'duplicates': len(temperatures) - inserted_count
+        }
+        return response, Status.created_201 if inserted_count else Status.ok_200
+
+
 class TemperatureResource(Resource):
     """
     Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single temperature resource.
     """
-    @marshal_with(Fields.temperature_field)
     def get(self, temperature_id):
-        temperature = temperature_controller.get_by_id(temperature_id)
+        parser = parser_factory.fields_parser(Fields.temperature_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        temperature = temperature_controller.get_by_id(temperature_id, fields=fields)
         abort_if_resource_not_found(temperature)
-        return temperature, Status.ok_200
+        return marshal(temperature, Fields.select(Fields.temperature_field, fields)), Status.ok_200
 
     @marshal_with(Fields.temperature_field)
     def patch(self, temperature_id):
@@ -155,15 +346,18 @@ class TemperatureResource(Resource):
         args = parser.parse_args()
         celsius = args['celsius']
         aquarium_id = args['aquarium_id']
+        previous_aquarium_id = temperature.aquarium_id
         temperature.update_attributes(celsius=celsius, aquarium_id=aquarium_id)
-        db.session.commit()
+        commit()
+        after_commit(temperature_controller.remove_from_cache, previous_aquarium_id, temperature.aquarium_id)
         return temperature, Status.ok_200
 
     def delete(self, temperature_id):
         temperature = temperature_controller.get_by_id(temperature_id)
         abort_if_resource_not_found(temperature)
         db.session.delete(temperature)
-        db.session.commit()
+        commit()
+        after_commit(temperature_controller.remove_from_cache, temperature.aquarium_id)
         return '', Status.no_content_204
 
 
@@ -171,23 +365,37 @@ class ChemicalListResource(Resource):
     """
     Gives access to GET and POST HTTP methods to get multiple chemical resources or create a new chemical resource.
     """
-    @marshal_with(Fields.chemical_list_field)
     def get(self):
         parser = parser_factory.chemical_parser('get')
         args = parser.parse_args()
         order_by = make_order_by(args['order-by'])
         page = args['page']
+        fields = args['fields']
         fertilizer_id = args['fertilizer-id']
+        search = args['q']
+
+        if args['ids']:
+            chemicals, missing_ids = chemical_controller.get_cached_by_ids(args['ids'], fields=fields)
+            response = IdListContent(chemicals, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.chemical_field, fields)), Status.ok_200
 
         items_per_page = current_app.config['ITEMS_PER_PAGE']
+        # chemicals are served from the catalog cache without database queries, searches use the name indexes
+        cached = None if search else chemical_controller.get_cached_page(order_by, page, items_per_page, fertilizer_id)
+        if cached is not None:
+            chemicals, chemical_count = cached
+            response = ResponseContent(chemicals, page, items_per_page, chemical_count)
+            return marshal(response, Fields.select_list(Fields.chemical_field, fields)), Status.ok_200
+
         # set pagination attributes for decorator
         chemical_controller.get_multiple.set_page(page)
         chemical_controller.get_multiple.set_items_per_page(items_per_page)
 
-        chemicals = chemical_controller.get_multiple(order_by=order_by, fertilizer_id=fertilizer_id)
-        chemical_count = chemical_controller.count_all()
+        chemicals = chemical_controller.get_multiple(order_by=order_by, fertilizer_id=fertilizer_id, fields=fields,
+                                                     search=search)
+        chemical_count = chemical_controller.count_all(fertilizer_id, search)
         response = ResponseContent(chemicals, page, items_per_page, chemical_count)
-        return response, Status.ok_200
+        return marshal(response, Fields.select_list(Fields.chemical_field, fields)), Status.ok_200
 
     @marshal_with(Fields.chemical_field)
     def post(self):
@@ -195,12 +403,10 @@ class ChemicalListResource(Resource):
         args = parser.parse_args()
         name = args['name']
 
-        if not Chemical.is_name_available(name):
-            abort(Status.conflict_409, message='Name not available')
-
         chemical = Chemical(name=name)
         db.session.add(chemical)
-        db.session.commit()
+        commit_or_abort_on_conflict(chemical)
+        after_commit(chemical_controller.refresh_cache)
         return chemical, Status.created_201
 
 
@@ -208,11 +414,14 @@ class ChemicalResource(Resource):
     """
     Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single chemical resource.
     """
-    @marshal_with(Fields.chemical_field)
     def get(self, chemical_id):
-        chemical = chemical_controller.get_by_id(chemical_id)
+        parser = parser_factory.fields_parser(Fields.chemical_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        chemical = chemical_controller.get_cached_by_id(chemical_id, fields=fields)
         abort_if_resource_not_found(chemical)
-        return chemical, Status.ok_200
+        return marshal(chemical, Fields.select(Fields.chemical_field, fields)), Status.ok_200
 
     @marshal_with(Fields.chemical_field)
     def patch(self, chemical_id):
@@ -223,18 +432,17 @@ class ChemicalResource(Resource):
         args = parser.parse_args()
 
         name = args['name']
-        if not Chemical.is_name_available(name):
-            abort(Status.conflict_409, message='Name not available')
-
         chemical.update_attributes(name=name)
-        db.session.commit()
+        commit_or_abort_on_conflict(chemical)
+        after_commit(chemical_controller.refresh_cache)
         return chemical, Status.ok_200
 
     def delete(self, chemical_id):
         chemical = chemical_controller.get_by_id(chemical_id)
         abort_if_resource_not_found(chemical)
         db.session.delete(chemical)
-        db.session.commit()
+        commit()
+        after_commit(chemical_controller.refresh_cache)
         return '', Status.no_content_204
 
 
@@ -242,23 +450,38 @@ class FertilizerListResource(Resource):
     """
     Gives access to GET and POST HTTP methods to get multiple fertilizer resources or create a new fertilizer resource.
     """
-    @marshal_with(Fields.fertilizer_list_field)
     def get(self):
         parser = parser_factory.fertilizer_parser('get')
         args = parser.parse_args()
         order_by = make_order_by(args['order-by'])
         page = args['page']
+        fields = args['fields']
         chemical_id = args['chemical-id']
+        search = args['q']
+
+        if args['ids']:
+            fertilizers, missing_ids = fertilizer_controller.get_cached_by_ids(args['ids'], fields=fields)
+            response = IdListContent(fertilizers, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.fertilizer_field, fields)), Status.ok_200
 
         items_per_page = current_app.config['ITEMS_PER_PAGE']
+        # fertilizers and their chemicals are served from the catalog cache without database queries, searches use
+        # the name indexes
+        cached = None if search else fertilizer_controller.get_cached_page(order_by, page, items_per_page, chemical_id)
+        if cached is not None:
+            fertilizers, fertilizer_count = cached
+            response = ResponseContent(fertilizers, page, items_per_page, fertilizer_count)
+            return marshal(response, Fields.select_list(Fields.fertilizer_field, fields)), Status.ok_200
+
         # set pagination attributes for decorator
         fertilizer_controller.get_multiple.set_page(page)
         fertilizer_controller.get_multiple.set_items_per_page(items_per_page)
 
-        fertilizers = fertilizer_controller.get_multiple(order_by=order_by, chemical_id=chemical_id)
-        fertilizer_count = fertilizer_controller.count_all(chemical_id)
+        fertilizers = fertilizer_controller.get_multiple(order_by=order_by, chemical_id=chemical_id, fields=fields,
+                                                         search=search)
+        fertilizer_count = fertilizer_controller.count_all(chemical_id, search)
         response = ResponseContent(fertilizers, page, items_per_page, fertilizer_count)
-        return response, Status.ok_200
+        return marshal(response, Fields.select_list(Fields.fertilizer_field, fields)), Status.ok_200
 
     @marshal_with(Fields.fertilizer_field)
     def post(self):
@@ -266,12 +489,10 @@ class FertilizerListResource(Resource):
         args = parser.parse_args()
 
         name = args['name']
-        if not Fertilizer.is_name_available(name):
-            abort(Status.conflict_409, message='Name not available')
-
         fertilizer = Fertilizer(name=name)
         db.session.add(fertilizer)
-        db.session.commit()
+        commit_or_abort_on_conflict(fertilizer)
+        after_commit(fertilizer_controller.refresh_cache)
         return fertilizer, Status.created_201
 
 
@@ -279,11 +500,14 @@ class FertilizerResource(Resource):
     """
     Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single fertilizer resource.
     """
-    @marshal_with(Fields.fertilizer_field)
     def get(self, fertilizer_id):
-        fertilizer = fertilizer_controller.get_by_id(fertilizer_id)
+        parser = parser_factory.fields_parser(Fields.fertilizer_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        fertilizer = fertilizer_controller.get_cached_by_id(fertilizer_id, fields=fields)
         abort_if_resource_not_found(fertilizer)
-        return fertilizer, Status.ok_200
+        return marshal(fertilizer, Fields.select(Fields.fertilizer_field, fields)), Status.ok_200
 
     @marshal_with(Fields.fertilizer_field)
     def patch(self, fertilizer_id):
@@ -296,14 +520,16 @@ class FertilizerResource(Resource):
         name = args['name']
         fertilizer.update_attributes(name=name, chemical_ids=chemical_ids)
 
-        db.session.commit()
+        commit_or_abort_on_conflict(fertilizer)
+        after_commit(fertilizer_controller.refresh_cache)
         return fertilizer, Status.ok_200
 
     def delete(self, fertilizer_id):
         fertilizer = fertilizer_controller.get_by_id(fertilizer_id)
         abort_if_resource_not_found(fertilizer)
         db.session.delete(fertilizer)
-        db.session.commit()
+        commit()
+        after_commit(fertilizer_controller.refresh_cache)
         return '', Status.no_content_204
 
 
@@ -312,23 +538,32 @@ class FertilizationListResource(Resource):
     Gives access to GET and POST HTTP methods to get multiple fertilization resources or
     create a new fertilization resource.
     """
-    @marshal_with(Fields.fertilization_list_field)
     def get(self):
         parser = parser_factory.fertilization_parser('get')
         args = parser.parse_args()
         order_by = make_order_by(args['order-by'])
         page = args['page']
+        fields = args['fields']
         aquarium_id = args['aquarium-id']
+        from_timestamp = args['from']
+        to_timestamp = args['to']
+
+        if args['ids']:
+            fertilizations, missing_ids = fertilization_controller.get_by_ids(args['ids'], fields=fields)
+            response = IdListContent(fertilizations, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.fertilization_field, fields)), Status.ok_200
 
         items_per_page = current_app.config['ITEMS_PER_PAGE']
         # set pagination attributes for decorator
         fertilization_controller.get_multiple.set_page(page)
         fertilization_controller.get_multiple.set_items_per_page(items_per_page)
 
-        fertilization = fertilization_controller.get_multiple(order_by=order_by, aquarium_id=aquarium_id)
-        fertilization_count = fertilization_controller.count_all(aquarium_id)
+        fertilization = fertilization_controller.get_multiple(order_by=order_by, aquarium_id=aquarium_id,
+                                                              from_timestamp=from_timestamp, to_timestamp=to_timestamp,
+                                                              fields=fields)
+        fertilization_count = fertilization_controller.count_all(aquarium_id, from_timestamp, to_timestamp)
         response = ResponseContent(fertilization, page, items_per_page, fertilization_count)
-        return response, Status.ok_200
+        return marshal(response, Fields.select_list(Fields.fertilization_field, fields)), Status.ok_200
 
     @marshal_with(Fields.fertilization_field)
     def post(self):
@@ -345,7 +580,7 @@ class FertilizationListResource(Resource):
 
         fertilization = Fertilization(amount_in_milliliter=amount, fertilizer_id=fertilizer_id)
         aquarium.add_fertilization(fertilization)
-        db.session.commit()
+        commit()
         return fertilization, Status.created_201
 
 
@@ -353,11 +588,14 @@ class FertilizationResource(Resource):
     """
     Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single fertilization resource.
     """
-    @marshal_with(Fields.fertilization_field)
     def get(self, fertilization_id):
-        fertilization = fertilization_controller.get_by_id(fertilization_id)
+        parser = parser_factory.fields_parser(Fields.fertilization_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        fertilization = fertilization_controller.get_by_id(fertilization_id, fields=fields)
         abort_if_resource_not_found(fertilization)
-        return fertilization, Status.ok_200
+        return marshal(fertilization, Fields.select(Fields.fertilization_field, fields)), Status.ok_200
 
     @marshal_with(Fields.fertilization_field)
     def patch(self, fertilization_id):
@@ -368,12 +606,121 @@ class FertilizationResource(Resource):
         args = parser.parse_args()
         amount = args['amount_in_milliliter']
         fertilization.update_attributes(amount)
-        db.session.commit()
+        commit()
         return fertilization, Status.ok_200
 
     def delete(self, fertilization_id):
         fertilization = fertilization_controller.get_by_id(fertilization_id)
         abort_if_resource_not_found(fertilization)
         db.session.delete(fertilization)
-        db.session.commit()
+        commit()
+        return '', Status.no_content_204
+
+
+def abort_if_more_than_volume(aquarium, liter_amount):
+    if liter_amount > aquarium.volume_in_liter:
+        message = 'Water change exceeds the volume of {} liter.'.format(aquarium.volume_in_liter)
+        abort(Status.bad_request_400, message={'liter_amount': message})
+
+
+class WaterChangeListResource(Resource):
+    """
+    Gives access to GET and POST HTTP methods to get multiple water change resources or
+    create a new water change resource.
+    """
+    def get(self):
+        parser = parser_factory.water_change_parser('get')
+        args = parser.parse_args()
+        order_by = make_order_by(args['order-by'])
+        page = args['page']
+        fields = args['fields']
+        aquarium_id = args['aquarium-id']
+        from_timestamp = args['from']
+        to_timestamp = args['to']
+
+        if args['ids']:
+            water_changes, missing_ids = water_change_controller.get_by_ids(args['ids'], fields=fields)
+            response = IdListContent(water_changes, missing_ids)
+            return marshal(response, Fields.select_id_list(Fields.water_change_field, fields)), Status.ok_200
+
+        items_per_page = current_app.config['ITEMS_PER_PAGE']
+        # set pagination attributes for decorator
+        water_change_controller.get_multiple.set_page(page)
+        water_change_controller.get_multiple.set_items_per_page(items_per_page)
+
+        water_changes = water_change_controller.get_multiple(order_by=order_by, aquarium_id=aquarium_id,
+                                                             from_timestamp=from_timestamp, to_timestamp=to_timestamp,
+                                                             fields=fields)
+        water_change_count = water_change_controller.count_all(aquarium_id, from_timestamp, to_timestamp)
+        response = ResponseContent(water_changes, page, items_per_page, water_change_count)
+        return marshal(response, Fields.select_list(Fields.water_change_field, fields)), Status.ok_200
+
+    @marshal_with(Fields.water_change_field)
+    def post(self):
+        parser = parser_factory.water_change_parser('post')
+        args = parser.parse_args()
+        liter_amount = args['liter_amount']
+        aquarium_id = args['aquarium_id']
+        timestamp = args['timestamp']
+
+        aquarium = aquarium_controller.get_by_id(aquarium_id)
+        abort_if_resource_not_found(aquarium)
+        abort_if_more_than_volume(aquarium, liter_amount)
+
+        water_change = WaterChange(liter_amount=liter_amount)
+        if timestamp:
+            water_change.timestamp = timestamp
+        aquarium.add_water_change(water_change)
+        commit()
+        return water_change, Status.created_201
+
+
+class WaterChangeResource(Resource):
+    """
+    Gives access to GET, PATCH, DELETE HTTP methods to get, update or delete a single water change resource.
+    """
+    def get(self, water_change_id):
+        parser = parser_factory.fields_parser(Fields.water_change_field)
+        args = parser.parse_args()
+        fields = args['fields']
+
+        water_change = water_change_controller.get_by_id(water_change_id, fields=fields)
+        abort_if_resource_not_found(water_change)
+        return marshal(water_change, Fields.select(Fields.water_change_field, fields)), Status.ok_200
+
+    @marshal_with(Fields.water_change_field)
+    def patch(self, water_change_id):
+        water_change = water_change_controller.get_by_id(water_change_id)
+        abort_if_resource_not_found(water_change)
+
+        parser = parser_factory.water_change_parser('patch')
+        args = parser.parse_args()
+        liter_amount = args['liter_amount']
+        abort_if_more_than_volume(water_change.aquarium, liter_amount)
+        water_change.update_attributes(liter_amount)
+        commit()
+        return water_change, Status.ok_200
+
+    def delete(self, water_change_id):
+        water_change = water_change_controller.get_by_id(water_change_id)
+        abort_if_resource_not_found(water_change)
+        db.session.delete(water_change)
+        commit()
         return '', Status.no_content_204
+
+
+class NutrientResource(Resource):
+    """
+    Gives access to the GET HTTP method to get the estimated concentrations of the chemicals in an aquarium, see
+    models.NutrientEstimate.
+    """
+    @marshal_with(Fields.nutrient_field)
+    def get(self, aquarium_id):
+        aquarium = aquarium_controller.get_by_id(aquarium_id)
+        abort_if_resource_not_found(aquarium)
+
+        estimate = nutrient_controller.get_by_aquarium_id(aquarium.id)
+        if estimate is None:
+            # the rebuild after the write that changed the history did not finish, computed without storing it
+            estimate = nutrient_controller.estimate(aquarium)
+        return estimate, Status.ok_200
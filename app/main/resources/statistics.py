@@ -0,0 +1,171 @@
+from flask_restful import Resource, marshal_with, abort
+
+try:
+    # optional, the statistics resource answers with 501 when numpy is not installed
+    import numpy
+except ImportError:
+    numpy = None
+
+from app.http_status_codes import HttpStatus as Status
+from app.main.api_parser import ParserFactory
+from app.main.api_parser.request_validator import MIN_TEMPERATURE, MAX_TEMPERATURE
+from .controller import TemperatureController
+from .resource_fields import Fields
+
+"""
+Temperature statistics computed with numpy on chunks of rows, so the memory use is independent of the number of
+measurements.
+"""
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# bin width of the histogram the percentiles are computed from
+PERCENTILE_RESOLUTION = 0.01
+# longer gaps between two measurements (e.g. sensor outages) count as this interval for the time in range
+MAX_MEASUREMENT_INTERVAL_MICROSECONDS = 3600 * 10 ** 6
+CHUNK_SIZE = 10000
+
+parser_factory = ParserFactory()
+temperature_controller = TemperatureController()
+
+
+class TemperatureStatistics:
+    """
+    Accumulates count, mean, standard deviation, minimum, maximum, a histogram and the time below, in and above a
+    target range of temperature series chunk by chunk.
+
+    Percentiles are taken from a histogram with PERCENTILE_RESOLUTION wide bins over the valid temperature range
+    instead of sorting all temperatures, so they are accurate to half the resolution. The time in range weights each
+    measurement with the interval until the next measurement of the same aquarium.
+    """
+    def __init__(self, bins, low, high):
+        """
+        :param bins: Number of equally wide histogram bins between MIN_TEMPERATURE and MAX_TEMPERATURE.
+        :param low: Lower bound of the target range.
+        :param high: Upper bound of the target range.
+        """
+        self.low = low
+        self.high = high
+        self.bin_edges = numpy.linspace(MIN_TEMPERATURE, MAX_TEMPERATURE, bins + 1)
+        self.counts = numpy.zeros(bins, dtype=numpy.int64)
+        self.percentile_counts = numpy.zeros(round((MAX_TEMPERATURE - MIN_TEMPERATURE) / PERCENTILE_RESOLUTION),
+                                             dtype=numpy.int64)
+        self.count = 0
+        self.mean = 0.0
+        # sum of squared differences from the mean
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        # microseconds below, in and above the target range
+        self.durations = numpy.zeros(3, dtype=numpy.int64)
+        # last measurement of the previous chunk as (aquarium_id, timestamp, temperature) arrays of length 1
+        self._previous = None
+
+    def add(self, rows):
+        """
+        :param rows: List of (aquarium_id, timestamp, temperature) rows ordered by aquarium and timestamp.
+        """
+        if not rows:
+            return
+        aquarium_ids, timestamps, temperatures = zip(*rows)
+        aquarium_ids = numpy.array(aquarium_ids, dtype=numpy.int64)
+        timestamps = numpy.array(timestamps, dtype='datetime64[us]').astype(numpy.int64)
+        temperatures = numpy.array(temperatures, dtype=numpy.float64)
+
+        self._add_moments(temperatures)
+        self.counts += numpy.histogram(temperatures, bins=self.bin_edges)[0]
+        indices = ((temperatures - MIN_TEMPERATURE) / PERCENTILE_RESOLUTION).astype(numpy.int64)
+        indices = numpy.clip(indices, 0, len(self.percentile_counts) - 1)
+        self.percentile_counts += numpy.bincount(indices, minlength=len(self.percentile_counts))
+        self._add_durations(aquarium_ids, timestamps, temperatures)
+
+    def _add_moments(self, temperatures):
+        # merges the mean and squared differences of the chunk (Chan et al.), which is stable for many chunks
+        count = len(temperatures)
+        mean = temperatures.mean()
+        m2 = ((temperatures - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+        chunk_min, chunk_max = temperatures.min(), temperatures.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def _add_durations(self, aquarium_ids, timestamps, temperatures):
+        if self._previous is not None:
+            aquarium_ids, timestamps, temperatures = (numpy.concatenate(arrays) for arrays in
+                                                      zip(self._previous, (aquarium_ids, timestamps, temperatures)))
+        self._previous = (aquarium_ids[-1:], timestamps[-1:], temperatures[-1:])
+
+        intervals = numpy.minimum(numpy.diff(timestamps), MAX_MEASUREMENT_INTERVAL_MICROSECONDS)
+        # the last measurement of an aquarium has no following interval
+        intervals[aquarium_ids[1:] != aquarium_ids[:-1]] = 0
+        values = temperatures[:-1]
+        self.durations[0] += intervals[values < self.low].sum()
+        self.durations[1] += intervals[(values >= self.low) & (values <= self.high)].sum()
+        self.durations[2] += intervals[values > self.high].sum()
+
+    def percentiles(self):
+        """
+        :return: List of (percentile, temperature) tuples of PERCENTILES. Temperatures are None without measurements.
+        """
+        if not self.count:
+            return [(p, None) for p in PERCENTILES]
+        cumulative_counts = numpy.cumsum(self.percentile_counts)
+        percentiles = []
+        for p in PERCENTILES:
+            # bin of the measurement with the rank of the percentile (nearest rank)
+            index = numpy.searchsorted(cumulative_counts, p / 100 * (self.count - 1), side='right')
+            temperature = MIN_TEMPERATURE + (index + 0.5) * PERCENTILE_RESOLUTION
+            percentiles.append((p, float(min(max(temperature, self.min), self.max))))
+        return percentiles
+
+    def time_in_range(self):
+        """
+        :return: Dict of the target range and the percentages of time below, in and above it. The percentages are
+                 None without intervals between measurements.
+        """
+        total = self.durations.sum()
+        below, in_range, above = (float(100 * d / total) if total else None for d in self.durations)
+        return {'low': self.low, 'high': self.high, 'below': below, 'in_range': in_range, 'above': above}
+
+    def result(self):
+        return {
+            'count': self.count,
+            'mean': float(self.mean) if self.count else None,
+            'stddev': float((self.m2 / self.count) ** 0.5) if self.count else None,
+            'min': None if self.min is None else float(self.min),
+            'max': None if self.max is None else float(self.max),
+            'percentiles': [{'percentile': p, 'temperature': t} for p, t in self.percentiles()],
+            'histogram': {'bin_edges': self.bin_edges.tolist(), 'counts': self.counts.tolist()},
+            'time_in_range': self.time_in_range()
+        }
+
+
+class TemperatureStatisticsResource(Resource):
+    """
+    Gives access to the GET HTTP method to get statistics of the temperatures of an aquarium (or all aquariums) and
+    time range.
+    """
+    @marshal_with(Fields.temperature_statistics_field)
+    def get(self):
+        if numpy is None:
+            abort(Status.not_implemented_501, message='Temperature statistics require numpy')
+
+        parser = parser_factory.temperature_statistics_parser()
+        args = parser.parse_args()
+        aquarium_id = args['aquarium-id']
+        from_timestamp = args['from']
+        to_timestamp = args['to']
+        if args['low'] >= args['high']:
+            abort(Status.bad_request_400, message={'high': 'Upper bound of the range must be greater than low.'})
+
+        statistics = TemperatureStatistics(args['bins'], args['low'], args['high'])
+        for rows in temperature_controller.iterate_series(aquarium_id, from_timestamp, to_timestamp, CHUNK_SIZE):
+            statistics.add(rows)
+
+        response = statistics.result()
+        response.update({'aquarium_id': aquarium_id, 'from': from_timestamp, 'to': to_timestamp})
+        return response, Status.ok_200
@@ -0,0 +1,63 @@
+""" Purge module. The purger extension is initialized in app/__init__.py"""
+import queue
+import threading
+
+from flask import current_app
+
+
+class Purger:
+    """
+    Flask extension that runs purge jobs one after another in a background thread of the process, so deleting an
+    aquarium with millions of readings does not hold a request or a long transaction.
+
+    Jobs that failed or were interrupted when the process stopped are resumed by ``flask purge resume``, which is
+    scheduled e.g. by cron. Running jobs are resumed after PURGE_RUNNING_TIMEOUT seconds without progress.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # hide deleted aquariums and purge them in the background, delete them in the request when False
+        app.config.setdefault('PURGE_ENABLED', True)
+        # rows deleted per transaction and seconds to wait between the transactions
+        app.config.setdefault('PURGE_CHUNK_SIZE', 1000)
+        app.config.setdefault('PURGE_CHUNK_PAUSE', 0.05)
+        # seconds without progress after which a running job is taken over by flask purge resume
+        app.config.setdefault('PURGE_RUNNING_TIMEOUT', 600)
+        app.extensions['purger'] = _PurgeWorker(app)
+
+    @staticmethod
+    def submit(func, *args):
+        """
+        Calls func with args in the background thread within an app context.
+        """
+        current_app.extensions['purger'].submit(func, *args)
+
+
+class _PurgeWorker:
+    """
+    Queue of the functions of an app and the thread that calls them, started with the first function.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, func, *args):
+        self.queue.put((func, args))
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='purge', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            func, args = self.queue.get()
+            try:
+                with self.app.app_context():
+                    func(*args)
+            except Exception:
+                # the job records the error, the worker goes on with the next job
+                self.app.logger.exception('Purge job failed')
@@ -0,0 +1,183 @@
+""" Rate limiting module. The rate limiter extension is initialized in app/__init__.py"""
+import math
+import sqlite3
+import threading
+import time
+
+from flask import request, current_app, jsonify
+
+from app.http_status_codes import HttpStatus as Status
+
+
+def take_tokens(states, buckets, now, cost=1):
+    """
+    Token bucket algorithm for several buckets at once. Tokens are only taken when every bucket has enough tokens,
+    so a rejected request does not use up the tokens of the other buckets.
+
+    :param states: Dict of bucket keys to (tokens, updated) tuples. Missing buckets are full.
+    :param buckets: List of (key, rate, burst) tuples with the refill rate per second and the bucket size.
+    :param now: Current time in seconds.
+    :param cost: Tokens needed from each bucket.
+    :return: Tuple of the seconds until the request is allowed (0 when allowed) and the new states of the buckets.
+    """
+    new_states = {}
+    retry_after = 0
+    for key, rate, burst in buckets:
+        tokens, updated = states.get(key) or (burst, now)
+        tokens = min(burst, tokens + max(now - updated, 0) * rate)
+        if tokens < cost:
+            retry_after = max(retry_after, (cost - tokens) / rate)
+        new_states[key] = (tokens - cost, now)
+    return retry_after, new_states
+
+
+class MemoryBucketStore:
+    """
+    Token buckets of a single process.
+    """
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self.states = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            retry_after, new_states = take_tokens(self.states, buckets, now, cost)
+            if retry_after:
+                return retry_after
+            self.states.update(new_states)
+            if len(self.states) > self.max_buckets:
+                self._remove_full_buckets(buckets, now)
+            return 0
+
+    def _remove_full_buckets(self, buckets, now):
+        # a bucket that refilled completely is equal to a missing bucket
+        slowest_refill = max(burst / rate for _, rate, burst in buckets)
+        self.states = {key: (tokens, updated) for key, (tokens, updated) in self.states.items()
+                       if now - updated < slowest_refill}
+
+
+class SqliteBucketStore:
+    """
+    Token buckets in a local SQLite file, shared by all worker processes of a host.
+    """
+    def __init__(self, path, timeout=5):
+        """
+        :param path: Path of the SQLite file.
+        :param timeout: Seconds to wait for the lock of the file, sqlite3.OperationalError is raised after them.
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS token_bucket '
+                               '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._local.connection = connection
+        return connection
+
+    def take(self, buckets, cost=1):
+        connection = self._connection()
+        # wall clock time, monotonic clocks are not comparable between processes
+        now = time.time()
+        keys = [key for key, _, _ in buckets]
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute('SELECT key, tokens, updated FROM token_bucket WHERE key IN ({})'
+                                      ''.format(','.join('?' * len(keys))), keys).fetchall()
+            retry_after, new_states = take_tokens({key: (tokens, updated) for key, tokens, updated in rows},
+                                                  buckets, now, cost)
+            if not retry_after:
+                connection.executemany('INSERT OR REPLACE INTO token_bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                                       [(key, tokens, updated) for key, (tokens, updated) in new_states.items()])
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            # some errors (e.g. a full disk) roll the transaction back already
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        return retry_after
+
+
+def _aquarium_ids(data):
+    """
+    :param data: JSON body of an ingest request.
+    :return: Aquarium ids of a single temperature/fertilization, of a batch upload or of the bodies of batch
+             operations.
+    """
+    if not isinstance(data, dict):
+        return set()
+    if isinstance(data.get('operations'), list):
+        items = [operation.get('body') for operation in data['operations'] if isinstance(operation, dict)]
+    elif isinstance(data.get('temperatures'), list):
+        items = data['temperatures']
+    else:
+        items = [data]
+    return {item.get('aquarium_id') for item in items
+            if isinstance(item, dict) and isinstance(item.get('aquarium_id'), int)}
+
+
+class RateLimiter:
+    """
+    Flask extension that limits POST requests of the ingest endpoints (RATELIMIT_ENDPOINTS) with token buckets per
+    client and per aquarium. Clients are identified by the RATELIMIT_CLIENT_HEADER request header when set, otherwise
+    by their address. Rejected requests get status 429 and a Retry-After header.
+
+    The buckets are kept in process memory or, when RATELIMIT_STORAGE_PATH is set, in a SQLite file shared by the
+    processes of a host. Requests are allowed when the file can not be used (e.g. it stays locked), the error is
+    logged.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_ENDPOINTS', ['temperaturelistresource', 'temperaturebatchresource',
+                                                      'fertilizationlistresource', 'batchresource'])
+        app.config.setdefault('RATELIMIT_CLIENT_RATE', 10)
+        app.config.setdefault('RATELIMIT_CLIENT_BURST', 100)
+        app.config.setdefault('RATELIMIT_AQUARIUM_RATE', 5)
+        app.config.setdefault('RATELIMIT_AQUARIUM_BURST', 50)
+        app.config.setdefault('RATELIMIT_CLIENT_HEADER', None)
+        app.config.setdefault('RATELIMIT_STORAGE_PATH', None)
+
+        path = app.config['RATELIMIT_STORAGE_PATH']
+        app.extensions['rate_limiter'] = SqliteBucketStore(path) if path else MemoryBucketStore()
+        app.before_request(self.before_request)
+
+    @staticmethod
+    def _client_key():
+        header = current_app.config['RATELIMIT_CLIENT_HEADER']
+        client = request.headers.get(header) if header else None
+        return 'client:{}'.format(client or request.remote_addr)
+
+    def before_request(self):
+        config = current_app.config
+        if not config['RATELIMIT_ENABLED'] or request.method != 'POST' or \
+                request.endpoint not in config['RATELIMIT_ENDPOINTS']:
+            return None
+
+        buckets = [(self._client_key(), config['RATELIMIT_CLIENT_RATE'], config['RATELIMIT_CLIENT_BURST'])]
+        for aquarium_id in sorted(_aquarium_ids(request.get_json(silent=True))):
+            buckets.append(('aquarium:{}'.format(aquarium_id), config['RATELIMIT_AQUARIUM_RATE'],
+                            config['RATELIMIT_AQUARIUM_BURST']))
+
+        try:
+            retry_after = current_app.extensions['rate_limiter'].take(buckets)
+        except sqlite3.Error as error:
+            # failing open, the limits protect the database but must not take the ingest down with the bucket file
+            current_app.logger.warning('Rate limit not checked: %s', error)
+            return None
+        if not retry_after:
+            return None
+
+        response = jsonify(message='Too many requests, retry in {} seconds'.format(math.ceil(retry_after)))
+        response.status_code = Status.too_many_requests_429
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
@@ -0,0 +1,171 @@
+""" Reading cache module. The reading cache extension is initialized in app/__init__.py"""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_microseconds(timestamp):
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def _from_microseconds(microseconds):
+    return _EPOCH + timedelta(microseconds=microseconds)
+
+
+class ReadingRingBuffer:
+    """
+    Fixed size buffer of the most recent readings (id, timestamp, value) of a series. The readings are kept in typed
+    arrays instead of python objects, which needs 24 bytes per reading. Appending overwrites the oldest reading when
+    the buffer is full.
+    """
+    def __init__(self, capacity, version=None):
+        """
+        :param capacity: Maximum number of readings.
+        :param version: Version of the series in the database the buffer content corresponds to.
+        """
+        self.capacity = capacity
+        self.version = version
+        self.created = time.monotonic()
+        self.ids = array('q', [0]) * capacity
+        self.timestamps = array('q', [0]) * capacity
+        self.values = array('d', [0.0]) * capacity
+        # index of the next write and number of stored readings
+        self.end = 0
+        self.size = 0
+
+    def append(self, reading_id, timestamp, value):
+        self.ids[self.end] = reading_id
+        self.timestamps[self.end] = _to_microseconds(timestamp)
+        self.values[self.end] = value
+        self.end = (self.end + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def newest_timestamp(self):
+        if not self.size:
+            return None
+        return _from_microseconds(self.timestamps[(self.end - 1) % self.capacity])
+
+    def newest(self, offset=0, limit=None):
+        """
+        :param offset: Number of newest readings to skip.
+        :param limit: Maximum number of readings. All remaining readings when None.
+        :return: List of (id, timestamp, value) tuples, newest reading first.
+        """
+        stop = self.size if limit is None else min(self.size, offset + limit)
+        readings = []
+        for i in range(offset, stop):
+            index = (self.end - 1 - i) % self.capacity
+            readings.append((self.ids[index], _from_microseconds(self.timestamps[index]), self.values[index]))
+        return readings
+
+
+class ReadingCache:
+    """
+    Flask extension that keeps the most recent readings of each series (e.g. the temperatures of an aquarium) in
+    process memory.
+
+    Every series holds READING_CACHE_SIZE readings and at most READING_CACHE_MAX_READINGS readings are cached in total,
+    the least recently used series are evicted first. A series is loaded again when its version in the database
+    differs from the cached version or when it is older than READING_CACHE_TTL seconds, which also picks up changes
+    of other processes.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('READING_CACHE_ENABLED', True)
+        app.config.setdefault('READING_CACHE_SIZE', 100)
+        app.config.setdefault('READING_CACHE_MAX_READINGS', 100000)
+        app.config.setdefault('READING_CACHE_TTL', 60)
+        app.extensions['reading_cache'] = _ReadingStore()
+
+    @staticmethod
+    def _store():
+        return current_app.extensions['reading_cache']
+
+    def latest(self, key, version, offset, limit, load):
+        """
+        :param key: Key of the series, e.g. the aquarium id.
+        :param version: Current version of the series in the database as tuple of its row count and latest timestamp.
+        :param offset: Number of newest readings to skip.
+        :param limit: Maximum number of readings.
+        :param load: Function that selects the given number of newest (id, timestamp, value) rows from the database.
+        :return: List of (id, timestamp, value) tuples, newest reading first. None when the readings are not cached.
+        """
+        config = current_app.config
+        capacity = config['READING_CACHE_SIZE']
+        if not config['READING_CACHE_ENABLED'] or offset + limit > capacity:
+            return None
+
+        store = self._store()
+        with store.lock:
+            buffer = store.get(key)
+            if buffer is not None and buffer.version == version and \
+                    time.monotonic() - buffer.created < config['READING_CACHE_TTL']:
+                return buffer.newest(offset, limit)
+
+        buffer = ReadingRingBuffer(capacity, version)
+        for reading in reversed(load(capacity)):
+            buffer.append(*reading)
+
+        with store.lock:
+            store.put(key, buffer, config['READING_CACHE_MAX_READINGS'] // capacity)
+        return buffer.newest(offset, limit)
+
+    def append(self, key, reading_id, timestamp, value):
+        """
+        Adds a new reading to a cached series. Readings older than the newest cached reading invalidate the series.
+        """
+        if not current_app.config['READING_CACHE_ENABLED']:
+            return
+
+        store = self._store()
+        with store.lock:
+            buffer = store.get(key)
+            if buffer is None:
+                return
+            newest_timestamp = buffer.newest_timestamp()
+            if buffer.version is None or (newest_timestamp is not None and timestamp < newest_timestamp):
+                store.pop(key)
+                return
+            count, _ = buffer.version
+            buffer.append(reading_id, timestamp, value)
+            buffer.version = (count + 1, timestamp)
+
+    def invalidate(self, *keys):
+        store = self._store()
+        with store.lock:
+            for key in keys:
+                store.pop(key)
+
+
+class _ReadingStore:
+    """
+    Least recently used ring buffers of an app.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buffers = OrderedDict()
+
+    def get(self, key):
+        buffer = self.buffers.get(key)
+        if buffer is not None:
+            self.buffers.move_to_end(key)
+        return buffer
+
+    def put(self, key, buffer, max_buffers):
+        self.buffers[key] = buffer
+        self.buffers.move_to_end(key)
+        while len(self.buffers) > max(max_buffers, 1):
+            self.buffers.popitem(last=False)
+
+    def pop(self, key):
+        self.buffers.pop(key, None)
@@ -0,0 +1,94 @@
+""" Read replica routing module. The replica router extension is initialized in app/__init__.py"""
+import time
+
+from flask import g, request, has_request_context, current_app
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import orm
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PATCH', 'PUT', 'DELETE')
+# request header to read from the primary for a single request
+READ_PRIMARY_HEADER = 'X-Read-Your-Writes'
+# cookie set after writes to read from the primary until the replica caught up
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+
+def _use_replica():
+    return has_request_context() and g.get('use_replica', False)
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session that sends statements of read requests to the replica bind. Flushes always go to the primary.
+    """
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing and _use_replica():
+            return get_state(self.app).db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    SQLAlchemy extension that uses the RoutingSession.
+    """
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaRouter:
+    """
+    Flask extension that routes the database session of GET requests to the replica bind, when a replica bind is
+    configured in SQLALCHEMY_BINDS. Write requests and the validators of referenced ids always use the primary.
+
+    Read your writes: a request with the X-Read-Your-Writes header reads from the primary. After a successful write
+    the client additionally reads from the primary for REPLICA_STICKY_SECONDS by a cookie.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_BINDS', None)
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    @staticmethod
+    def has_replica(app):
+        return REPLICA_BIND in (app.config['SQLALCHEMY_BINDS'] or {})
+
+    @staticmethod
+    def use_primary():
+        """
+        Sends the remaining statements of a read request to the primary, e.g. before reading rows that are written.
+        """
+        g.use_replica = False
+
+    @staticmethod
+    def _reads_own_writes():
+        if request.headers.get(READ_PRIMARY_HEADER, '').lower() in ('1', 'true', 'yes'):
+            return True
+        try:
+            return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def routes_to_replica(app):
+        """
+        :return: Whether the reads of the current request go to the replica, also used by the asynchronous read path.
+        """
+        return request.method in READ_METHODS and ReplicaRouter.has_replica(app) and \
+            not ReplicaRouter._reads_own_writes()
+
+    def before_request(self):
+        g.use_replica = self.routes_to_replica(current_app)
+
+    def after_request(self, response):
+        sticky_seconds = current_app.config['REPLICA_STICKY_SECONDS']
+        if request.method in WRITE_METHODS and response.status_code < 400 and sticky_seconds and \
+                self.has_replica(current_app):
+            response.set_cookie(READ_PRIMARY_COOKIE, str(time.time() + sticky_seconds), max_age=sticky_seconds,
+                                httponly=True)
+        return response
@@ -0,0 +1,63 @@
+"""full text search of aquarium, chemical and fertilizer names
+
+Revision ID: 4f8d2a6c1e39
+Revises: e5a1c93d7f42
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8d2a6c1e39'
+down_revision = 'e5a1c93d7f42'
+branch_labels = None
+depends_on = None
+
+tables = ['aquarium', 'chemical', 'fertilizer']
+
+# copy of app.main.models.name_search_ddl. The tables and indexes are not part of the models, autogenerate skips them
+# by the include_object hook app.main.models.include_in_migrations. Batch operations of later SQLite migrations that
+# recreate one of these tables drop its triggers, they have to be created again
+sqlite_upgrade = [
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5(name, content='{table}', content_rowid='id')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO {table}_fts(rowid, name) VALUES (new.id, new.name); END",
+    # index the existing names
+    "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+    # case insensitive prefix search
+    "CREATE INDEX ix_{table}_name_nocase ON {table} (name COLLATE NOCASE)"
+]
+sqlite_downgrade = [
+    'DROP TRIGGER IF EXISTS {table}_fts_insert',
+    'DROP TRIGGER IF EXISTS {table}_fts_delete',
+    'DROP TRIGGER IF EXISTS {table}_fts_update',
+    'DROP TABLE IF EXISTS {table}_fts',
+    'DROP INDEX IF EXISTS ix_{table}_name_nocase'
+]
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    for table in tables:
+        if dialect_name == 'sqlite':
+            for statement in sqlite_upgrade:
+                op.execute(statement.format(table=table))
+        elif dialect_name == 'mysql':
+            op.create_index('ix_{}_name_fulltext'.format(table), table, ['name'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    for table in tables:
+        if dialect_name == 'sqlite':
+            for statement in sqlite_downgrade:
+                op.execute(statement.format(table=table))
+        elif dialect_name == 'mysql':
+            op.drop_index('ix_{}_name_fulltext'.format(table), table_name=table)
@@ -1,6 +1,5 @@
 from app import create_app
 from app.config import Config
-from app.main.models import db, Aquarium, AquariumTemperature
 
 
 app = create_app(Config)
@@ -8,6 +7,6 @@ app = create_app(Config)
 
 @app.shell_context_processor
 def make_shell_context():
+    from app.main.models import db, Aquarium, AquariumTemperature
     return {'db': db, 'Aquarium': Aquarium,
             'AquariumTemperature': AquariumTemperature}
-
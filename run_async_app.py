@@ -0,0 +1,6 @@
+from app.asgi import create_asgi_app
+from app.config import Config
+
+
+# serve with an ASGI server, e.g. uvicorn run_async_app:app
+app = create_asgi_app(Config)
@@ -0,0 +1,21 @@
+import pytest
+
+from app import create_app
+from app.config import TestConfig
+from app.extensions import db
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,121 @@
+import pytest
+
+from app.main.models import Aquarium, AquariumStats, AquariumTemperature, ChangeLogEntry, Chemical, PurgeJob
+from app.main.resources import resources
+from app.main.resources.batch import resolve_references
+
+
+def post_batch(client, operations):
+    return client.post('/batch', json={'operations': operations})
+
+
+@pytest.fixture
+def aquarium_id(client):
+    response = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+@pytest.fixture
+def recorded_callbacks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resources.chemical_controller, 'refresh_cache', lambda *args: calls.append('refresh_cache'))
+    monkeypatch.setattr(resources.purge_job_controller, 'start', lambda *args: calls.append('start'))
+    return calls
+
+
+def test_resolve_references():
+    results = [{'status': 201, 'body': {'id': 7, 'name': 'Iron'}}]
+    assert resolve_references({'chemicals': ['$0.id'], 'path': '/chemicals/$0.id'}, results) == \
+        {'chemicals': [7], 'path': '/chemicals/7'}
+    with pytest.raises(ValueError):
+        resolve_references('$1.id', results)
+    with pytest.raises(ValueError):
+        resolve_references('$0.volume', results)
+
+
+def test_references_to_earlier_operations(client):
+    response = post_batch(client, [
+        {'method': 'POST', 'path': '/aquariums', 'body': {'name': 'New tank', 'volume_in_liter': 60}},
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}},
+        {'method': 'POST', 'path': '/fertilizers', 'body': {'name': 'Easy Iron', 'chemicals': ['$1.id']}},
+        {'method': 'PATCH', 'path': '/fertilizers/$2.id', 'body': {'id': '$2.id', 'name': 'Easy Iron',
+                                                                    'chemicals': ['$1.id']}},
+        {'method': 'POST', 'path': '/fertilization', 'body': {'amount_in_milliliter': 5, 'aquarium_id': '$0.id',
+                                                               'fertilizer_id': '$2.id'}}
+    ])
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == [201, 201, 201, 200, 201]
+    aquarium, chemical, fertilizer, patched, fertilization = [result['body'] for result in results]
+    assert patched['id'] == fertilizer['id']
+    assert [c['id'] for c in patched['chemicals']] == [chemical['id']]
+    assert fertilization['aquarium_id'] == aquarium['id']
+    assert client.get('/fertilizers/{}'.format(fertilizer['id'])).get_json()['chemicals'][0]['name'] == 'Iron'
+
+
+def test_reference_to_later_operation(app, client):
+    response = post_batch(client, [{'method': 'DELETE', 'path': '/chemicals/$1.id'},
+                                   {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}}])
+    assert response.status_code == 400
+    with app.app_context():
+        assert Chemical.query.count() == 0
+
+
+def test_failed_operation_rolls_back_earlier_operations(app, client, aquarium_id):
+    assert client.post('/chemicals', json={'name': 'Iron'}).status_code == 201
+    with app.app_context():
+        change_log_count = ChangeLogEntry.query.count()
+
+    response = post_batch(client, [
+        {'method': 'POST', 'path': '/temperatures', 'body': {'celsius': 24.5, 'aquarium_id': aquarium_id,
+                                                              'timestamp': '2022-04-26T10:15:00Z'}},
+        {'method': 'POST', 'path': '/aquariums', 'body': {'name': 'Other tank', 'volume_in_liter': 60}},
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Zinc'}},
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}}
+    ])
+    assert response.status_code == 409
+    assert [result['status'] for result in response.get_json()['results']] == [201, 201, 201, 409]
+
+    with app.app_context():
+        assert AquariumTemperature.query.count() == 0
+        assert Aquarium.query.count() == 1
+        assert Chemical.query.count() == 1
+        assert ChangeLogEntry.query.count() == change_log_count
+        stats = AquariumStats.query.get(aquarium_id)
+        assert stats.temperature_count == 0 and stats.latest_temperature is None
+    assert client.get('/aquariums/{}'.format(aquarium_id)).get_json()['stats']['temperature_count'] == 0
+
+
+def test_after_commit_callbacks_skipped_on_rollback(app, client, aquarium_id, recorded_callbacks):
+    response = post_batch(client, [
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}},
+        {'method': 'DELETE', 'path': '/aquariums/{}'.format(aquarium_id)},
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}}
+    ])
+    assert response.status_code == 409
+    assert recorded_callbacks == []
+    with app.app_context():
+        assert PurgeJob.query.count() == 0
+    assert client.get('/aquariums/{}'.format(aquarium_id)).status_code == 200
+
+
+def test_after_commit_callbacks_run_after_commit(client, aquarium_id, recorded_callbacks):
+    response = post_batch(client, [
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}},
+        {'method': 'DELETE', 'path': '/aquariums/{}'.format(aquarium_id)}
+    ])
+    assert response.status_code == 200
+    assert recorded_callbacks == ['refresh_cache', 'start']
+
+
+def test_nested_batch(app, client):
+    response = post_batch(client, [
+        {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Iron'}},
+        {'method': 'POST', 'path': '/batch', 'body': {'operations': [
+            {'method': 'POST', 'path': '/chemicals', 'body': {'name': 'Zinc'}}]}}
+    ])
+    assert response.status_code == 400
+    assert response.get_json()['results'][1]['body']['message'] == 'Batches can not be nested'
+    with app.app_context():
+        assert Chemical.query.count() == 0
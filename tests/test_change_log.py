@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.main.models import Aquarium, ChangeLogEntry, Chemical
+
+
+def logged_changes(resource):
+    return [(entry.resource_id, entry.action) for entry in
+            ChangeLogEntry.query.filter_by(resource=resource).order_by(ChangeLogEntry.id.asc())]
+
+
+@pytest.fixture
+def statements(app):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(' '.join(statement.split()[:3]).upper())
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        yield executed
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_entries_written_at_commit(app):
+    with app.app_context():
+        db.session.add(Chemical(name='Iron'))
+        db.session.flush()
+        # the rows of the transaction are visible to it, its entries are not written yet
+        assert ChangeLogEntry.query.count() == 0
+        db.session.rollback()
+        assert ChangeLogEntry.query.count() == 0
+
+        chemical = Chemical(name='Iron')
+        db.session.add(chemical)
+        db.session.commit()
+        assert logged_changes('chemicals') == [(chemical.id, ChangeLogEntry.CREATE)]
+
+
+def test_entries_in_commit_order(app, statements):
+    with app.app_context():
+        db.session.add(Chemical(name='Iron'))
+        db.session.flush()
+        db.session.add(Aquarium(name='Tank', volume_in_liter=100))
+        db.session.flush()
+        del statements[:]
+        db.session.add(Chemical(name='Zinc'))
+        db.session.commit()
+
+        # the lock is taken after the last flush, the entries get their ids while it is held
+        assert statements == ['INSERT INTO CHEMICAL', 'UPDATE CHANGE_LOG_LOCK SET', 'INSERT INTO CHANGE_LOG_ENTRY']
+        assert [entry.resource for entry in ChangeLogEntry.query.order_by(ChangeLogEntry.id.asc())] == \
+            ['chemicals', 'aquariums', 'chemicals']
+
+        db.session.add(Chemical(name='Copper'))
+        db.session.commit()
+        assert [resource_id for resource_id, _ in logged_changes('chemicals')] == [1, 2, 3]
+
+
+def test_skipped_batch_duplicates_not_logged(app, client):
+    aquarium_id = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).get_json()['id']
+    temperatures = [{'celsius': 24, 'aquarium_id': aquarium_id, 'timestamp': '2022-04-26T10:{}:00Z'.format(minute)}
+                    for minute in (10, 15, 20)]
+    assert client.post('/temperatures/batch', json={'temperatures': temperatures[:2]}).status_code == 201
+    # a retried upload with one new measurement
+    response = client.post('/temperatures/batch', json={'temperatures': temperatures})
+    assert response.status_code == 201
+
+    with app.app_context():
+        assert logged_changes('temperatures') == [(1, ChangeLogEntry.CREATE), (2, ChangeLogEntry.CREATE),
+                                                  (3, ChangeLogEntry.CREATE)]
@@ -0,0 +1,33 @@
+import gzip
+import io
+
+import pytest
+
+
+@pytest.fixture
+def aquarium_id(client):
+    aquarium_id = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).get_json()['id']
+    temperatures = [{'celsius': 24, 'aquarium_id': aquarium_id, 'timestamp': '2022-04-26T10:{:02d}:00Z'.format(minute)}
+                    for minute in range(60)]
+    assert client.post('/temperatures/batch', json={'temperatures': temperatures}).status_code == 201
+    return aquarium_id
+
+
+def export(client, aquarium_id, export_format):
+    response = client.get('/temperatures/export', query_string={'aquarium-id': aquarium_id, 'format': export_format},
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return gzip.decompress(response.get_data())
+
+
+def test_npy_export_compressed(client, aquarium_id):
+    numpy = pytest.importorskip('numpy')
+    series = numpy.load(io.BytesIO(export(client, aquarium_id, 'npy')))
+    assert len(series) == 60 and set(series['aquarium_id']) == {aquarium_id}
+
+
+def test_arrow_export_compressed(client, aquarium_id):
+    pyarrow = pytest.importorskip('pyarrow')
+    table = pyarrow.ipc.open_stream(export(client, aquarium_id, 'arrow')).read_all()
+    assert table.num_rows == 60
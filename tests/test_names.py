@@ -0,0 +1,32 @@
+import re
+
+import pytest
+
+from app.main.resources import resources
+
+
+@pytest.mark.parametrize('message', [
+    'UNIQUE constraint failed: aquarium.name',
+    "Duplicate entry 'Tank' for key 'ix_aquarium_name'",
+    'duplicate key value violates unique constraint "ix_aquarium_name"\nDETAIL:  Key (name)=(Tank) already exists.',
+])
+def test_name_conflict_messages(message):
+    assert resources._name_conflict_pattern.search(message)
+
+
+@pytest.mark.parametrize('path', ['/aquariums', '/chemicals'])
+def test_taken_name_conflicts(client, path, monkeypatch):
+    body = {'name': 'Tank', 'volume_in_liter': 100}
+    assert client.post(path, json=body).status_code == 201
+    assert client.post(path, json=body).status_code == 409
+    # messages of other drivers are recognized by the name
+    monkeypatch.setattr(resources, '_name_conflict_pattern', re.compile('^$'))
+    assert client.post(path, json=body).status_code == 409
+
+
+def test_rename_to_taken_name_conflicts(client, monkeypatch):
+    monkeypatch.setattr(resources, '_name_conflict_pattern', re.compile('^$'))
+    for name in ('Iron', 'Zinc'):
+        assert client.post('/chemicals', json={'name': name}).status_code == 201
+    assert client.patch('/chemicals/2', json={'id': 2, 'name': 'Iron'}).status_code == 409
+    assert client.patch('/chemicals/2', json={'id': 2, 'name': 'Copper'}).status_code == 200
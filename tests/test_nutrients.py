@@ -0,0 +1,74 @@
+import pytest
+
+from app.extensions import db
+from app.main.models import Aquarium, AquariumStats, NutrientConcentration, NutrientEstimate
+from app.main.resources import resources
+
+
+@pytest.fixture
+def aquarium_id(client):
+    aquarium_id = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).get_json()['id']
+    chemical_id = client.post('/chemicals', json={'name': 'Iron'}).get_json()['id']
+    fertilizer = {'name': 'Easy Iron', 'chemicals': [chemical_id]}
+    fertilizer_id = client.post('/fertilizers', json=fertilizer).get_json()['id']
+    assert client.patch('/fertilizers/{}'.format(fertilizer_id), json=dict(fertilizer, id=fertilizer_id)).\
+        status_code == 200
+    assert client.post('/fertilization', json={'amount_in_milliliter': 10, 'aquarium_id': aquarium_id,
+                                               'fertilizer_id': fertilizer_id}).status_code == 201
+    return aquarium_id
+
+
+def stored_concentrations(aquarium_id):
+    estimate = NutrientEstimate.query.get(aquarium_id)
+    return estimate and [c.milliliter_per_liter for c in estimate.concentrations]
+
+
+def concentrations(client, aquarium_id):
+    response = client.get('/aquariums/{}/nutrients'.format(aquarium_id))
+    assert response.status_code == 200
+    return [c['milliliter_per_liter'] for c in response.get_json()['concentrations']]
+
+
+def test_write_rebuilds_invalidated_estimate(app, client, aquarium_id):
+    # a backdated water change can not be applied incrementally
+    assert client.post('/water-changes', json={'liter_amount': 50, 'aquarium_id': aquarium_id,
+                                               'timestamp': '2020-01-01T00:00:00Z'}).status_code == 201
+    with app.app_context():
+        assert stored_concentrations(aquarium_id) == [pytest.approx(0.1)]
+
+
+def test_read_does_not_store_estimate(app, client, aquarium_id):
+    with app.app_context():
+        NutrientConcentration.query.delete()
+        NutrientEstimate.query.delete()
+        db.session.commit()
+    assert concentrations(client, aquarium_id) == [pytest.approx(0.1)]
+    with app.app_context():
+        assert stored_concentrations(aquarium_id) is None
+
+
+def test_rebuild_that_raced_a_write_discarded(app, client, aquarium_id, monkeypatch):
+    controller = resources.nutrient_controller
+    estimate = controller.estimate
+
+    def racing_estimate(aquarium, chunk_size=10000):
+        result = estimate(aquarium, chunk_size)
+        # a write of the history commits while the rebuild reads it
+        with db.engine.begin() as connection:
+            stats = AquariumStats.__table__
+            connection.execute(stats.update().where(stats.c.aquarium_id == aquarium.id).
+                               values(nutrient_version=stats.c.nutrient_version + 1))
+        return result
+
+    with app.app_context():
+        NutrientConcentration.query.delete()
+        NutrientEstimate.query.delete()
+        db.session.commit()
+        monkeypatch.setattr(controller, 'estimate', racing_estimate)
+        rebuilt = controller.rebuild(Aquarium.query.get(aquarium_id))
+        assert [c.milliliter_per_liter for c in rebuilt.concentrations] == [pytest.approx(0.1)]
+        assert stored_concentrations(aquarium_id) is None
+
+        monkeypatch.setattr(controller, 'estimate', estimate)
+        controller.rebuild(Aquarium.query.get(aquarium_id))
+        assert stored_concentrations(aquarium_id) == [pytest.approx(0.1)]
@@ -0,0 +1,87 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.main.models import Aquarium, AquariumTemperature, PurgeJob
+from app.main.resources import resources
+
+
+@pytest.fixture
+def deleted_aquarium_id(client, monkeypatch):
+    # the purge job is not started, the rows of the aquarium stay until it runs
+    monkeypatch.setattr(resources.purge_job_controller, 'start', lambda job_id: None)
+    aquarium_id = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).get_json()['id']
+    chemical_id = client.post('/chemicals', json={'name': 'Iron'}).get_json()['id']
+    response = client.post('/fertilizers', json={'name': 'Easy Iron', 'chemicals': [chemical_id]})
+    fertilizer_id = response.get_json()['id']
+    assert client.post('/temperatures', json={'celsius': 24, 'aquarium_id': aquarium_id}).status_code == 201
+    assert client.post('/fertilization', json={'amount_in_milliliter': 5, 'aquarium_id': aquarium_id,
+                                               'fertilizer_id': fertilizer_id}).status_code == 201
+    assert client.post('/water-changes', json={'liter_amount': 20, 'aquarium_id': aquarium_id}).status_code == 201
+    assert client.delete('/aquariums/{}'.format(aquarium_id)).status_code == 202
+    return aquarium_id
+
+
+def test_readings_of_deleted_aquarium_hidden(client, deleted_aquarium_id):
+    for path in ('/temperatures', '/fertilization', '/water-changes'):
+        response = client.get('{}?aquarium-id={}'.format(path, deleted_aquarium_id))
+        assert response.get_json()['total_results'] == 0, path
+        assert client.get('{}?ids=1'.format(path)).get_json()['missing_ids'] == [1], path
+        assert client.get('{}/1'.format(path)).status_code == 404, path
+    assert client.get('/temperatures?aquarium-id={}&order-by=date:desc'.format(deleted_aquarium_id)).\
+        get_json()['total_results'] == 0
+
+
+def test_statistics_and_export_of_deleted_aquarium_empty(client, deleted_aquarium_id):
+    numpy = pytest.importorskip('numpy')
+    assert client.get('/temperatures/statistics?aquarium-id={}'.format(deleted_aquarium_id)).\
+        get_json()['count'] == 0
+    for path in ('/temperatures/export', '/fertilization/export'):
+        response = client.get('{}?aquarium-id={}'.format(path, deleted_aquarium_id))
+        assert len(numpy.load(io.BytesIO(response.data))) == 0, path
+
+
+def test_name_of_deleted_aquarium_released(client, deleted_aquarium_id):
+    response = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 60})
+    assert response.status_code == 201
+    assert response.get_json()['id'] != deleted_aquarium_id
+    assert client.post('/aquariums', json={'name': '~deleted 1', 'volume_in_liter': 60}).status_code == 400
+
+
+def set_job_status(job_id, status, updated_seconds_ago=0):
+    job = PurgeJob.query.get(job_id)
+    job.status = status
+    db.session.commit()
+    # onupdate sets the time of the commit, the update of the timestamp alone keeps it
+    PurgeJob.query.filter_by(id=job_id).update(
+        {'updated_timestamp': datetime.utcnow() - timedelta(seconds=updated_seconds_ago)}, synchronize_session=False)
+    db.session.commit()
+
+
+@pytest.mark.parametrize('status, updated_seconds_ago, claimed', [
+    (PurgeJob.PENDING, 0, True),
+    (PurgeJob.FAILED, 0, True),
+    # interrupted, no progress for longer than PURGE_RUNNING_TIMEOUT
+    (PurgeJob.RUNNING, 3600, True),
+    # running in another process
+    (PurgeJob.RUNNING, 0, False),
+    (PurgeJob.DONE, 3600, False),
+])
+def test_purge_job_claiming(app, deleted_aquarium_id, status, updated_seconds_ago, claimed):
+    app.config['PURGE_CHUNK_PAUSE'] = 0
+    with app.app_context():
+        job_id = PurgeJob.query.filter_by(aquarium_id=deleted_aquarium_id).one().id
+        set_job_status(job_id, status, updated_seconds_ago)
+        assert (PurgeJob.query.get(job_id) in resources.purge_job_controller.get_unfinished()) == claimed
+
+        resources.purge_job_controller.run(job_id)
+        db.session.expire_all()
+        job = PurgeJob.query.get(job_id)
+        if claimed:
+            assert job.status == PurgeJob.DONE and job.deleted_temperatures == 1
+            assert Aquarium.query.get(deleted_aquarium_id) is None
+        else:
+            assert job.status == status and job.deleted_temperatures == 0
+            assert AquariumTemperature.query.filter_by(aquarium_id=deleted_aquarium_id).count() == 1
@@ -0,0 +1,55 @@
+import logging
+import sqlite3
+
+import pytest
+
+from app import ratelimit
+from app.ratelimit import SqliteBucketStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqliteBucketStore(str(tmp_path / 'buckets.db'), timeout=0.01)
+
+
+@pytest.fixture
+def locked(store):
+    # another process holds the write lock of the bucket file
+    store.take([('client:warmup', 1, 1)])
+    connection = sqlite3.connect(store.path, isolation_level=None)
+    connection.execute('BEGIN IMMEDIATE')
+    yield
+    connection.execute('ROLLBACK')
+    connection.close()
+
+
+def test_take_with_sqlite_store(store):
+    buckets = [('client:sensor', 1, 2), ('aquarium:1', 1, 5)]
+    assert store.take(buckets) == 0
+    assert store.take(buckets) == 0
+    assert store.take(buckets) > 0
+
+
+def test_rolled_back_error_is_raised(store, monkeypatch):
+    def failing_take_tokens(*args):
+        # SQLite ends the transaction itself on errors like a full disk
+        store._connection().execute('ROLLBACK')
+        raise sqlite3.OperationalError('database or disk is full')
+
+    store.take([('client:warmup', 1, 1)])
+    monkeypatch.setattr(ratelimit, 'take_tokens', failing_take_tokens)
+    with pytest.raises(sqlite3.OperationalError, match='database or disk is full'):
+        store.take([('client:sensor', 1, 1)])
+
+
+def test_locked_store_fails_open(app, client, store, locked, caplog):
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_CLIENT_BURST'] = 1
+    app.extensions['rate_limiter'] = store
+    aquarium_id = client.post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).get_json()['id']
+
+    with caplog.at_level(logging.WARNING):
+        for celsius in (24, 25):
+            assert client.post('/temperatures', json={'celsius': celsius, 'aquarium_id': aquarium_id}).\
+                status_code == 201
+    assert 'database is locked' in caplog.text
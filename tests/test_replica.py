@@ -0,0 +1,73 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from app import create_app
+from app.config import TestConfig
+from app.extensions import db
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {'primary': str(tmp_path / 'primary.db'), 'replica': str(tmp_path / 'replica.db')}
+
+
+@pytest.fixture
+def replica_app(paths):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + paths['primary']
+        SQLALCHEMY_BINDS = {'replica': 'sqlite:///' + paths['replica']}
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+    assert app.test_client().post('/aquariums', json={'name': 'Tank', 'volume_in_liter': 100}).status_code == 201
+    # the replica lags behind, later writes only reach the primary
+    shutil.copy(paths['primary'], paths['replica'])
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+        db.get_engine(app, bind='replica').dispose()
+
+
+def count_temperatures(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute('SELECT COUNT(*) FROM aquarium_temperature').fetchone()[0]
+
+
+def total_temperatures(client, **kwargs):
+    response = client.get('/temperatures', **kwargs)
+    assert response.status_code == 200
+    return response.get_json()['total_results']
+
+
+def test_reads_from_replica_and_writes_to_primary(replica_app, paths):
+    writer = replica_app.test_client()
+    response = writer.post('/temperatures', json={'celsius': 24, 'aquarium_id': 1})
+    assert response.status_code == 201
+    assert 'read_primary_until=' in response.headers['Set-Cookie']
+    assert count_temperatures(paths['primary']) == 1 and count_temperatures(paths['replica']) == 0
+
+    reader = replica_app.test_client()
+    assert total_temperatures(reader) == 0
+    assert reader.get('/temperatures/1').status_code == 404
+    assert total_temperatures(reader, headers={'X-Read-Your-Writes': '1'}) == 1
+    # the cookie of the write reads from the primary for REPLICA_STICKY_SECONDS
+    assert total_temperatures(writer) == 1
+
+
+def test_validators_read_from_primary(replica_app):
+    # the requests above loaded the resources, which the api parser needs to be imported
+    from app.main.api_parser.request_validator import Validator
+
+    writer = replica_app.test_client()
+    aquarium_id = writer.post('/aquariums', json={'name': 'New tank', 'volume_in_liter': 60}).get_json()['id']
+
+    reader = replica_app.test_client()
+    assert reader.get('/aquariums/{}'.format(aquarium_id)).status_code == 404
+    assert reader.post('/temperatures', json={'celsius': 24, 'aquarium_id': aquarium_id}).status_code == 201
+    with replica_app.test_request_context('/temperatures'):
+        replica_app.preprocess_request()
+        assert Validator.aquarium_id(aquarium_id) == aquarium_id
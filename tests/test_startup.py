@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from flask import url_for
+from flask.cli import routes_command
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def test_startup_imports_no_lazy_modules():
+    # the time budget of tools/profile_startup.py depends on the host, the modules it loads lazily do not
+    sys.path.insert(0, os.path.join(ROOT, 'tools'))
+    try:
+        from profile_startup import LAZY_MODULES
+    finally:
+        sys.path.pop(0)
+    result = subprocess.run([sys.executable, '-c', 'import sys, run_app; print("\\n".join(sys.modules))'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    imported = set(result.stdout.split())
+    assert [name for name in LAZY_MODULES if name in imported] == []
+
+
+def test_routes_command_lists_resources(app):
+    result = app.test_cli_runner().invoke(routes_command)
+    assert result.exit_code == 0
+    assert '/aquariums/<string:aquarium_id>' in result.output
+
+
+def test_url_for_outside_of_request(app):
+    with app.test_request_context():
+        assert url_for('temperaturelistresource') == '/temperatures'
@@ -0,0 +1,77 @@
+import pytest
+
+
+@pytest.fixture
+def aquarium_ids(client):
+    return [client.post('/aquariums', json={'name': name, 'volume_in_liter': 100}).get_json()['id']
+            for name in ('Tank', 'Other tank')]
+
+
+def stats(client, aquarium_id):
+    return client.get('/aquariums/{}'.format(aquarium_id)).get_json()['stats']
+
+
+def post_temperature(client, aquarium_id, celsius, timestamp):
+    response = client.post('/temperatures', json={'celsius': celsius, 'aquarium_id': aquarium_id,
+                                                  'timestamp': timestamp})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_stats_after_insert_and_delete(client, aquarium_ids):
+    aquarium_id = aquarium_ids[0]
+    assert stats(client, aquarium_id)['temperature_count'] == 0
+    assert stats(client, aquarium_id)['latest_temperature'] is None
+
+    latest_id = post_temperature(client, aquarium_id, 25, '2022-04-26T12:00:00Z')
+    post_temperature(client, aquarium_id, 23, '2022-04-26T10:00:00Z')
+    aquarium_stats = stats(client, aquarium_id)
+    # an older measurement does not replace the latest one
+    assert aquarium_stats['temperature_count'] == 2 and aquarium_stats['latest_temperature'] == 25
+
+    assert client.delete('/temperatures/{}'.format(latest_id)).status_code == 204
+    aquarium_stats = stats(client, aquarium_id)
+    assert aquarium_stats['temperature_count'] == 1 and aquarium_stats['latest_temperature'] == 23
+    assert aquarium_stats['latest_temperature_timestamp'] == 'Tue, 26 Apr 2022 10:00:00 -0000'
+
+
+def test_stats_after_move(client, aquarium_ids):
+    source_id, target_id = aquarium_ids
+    temperature_id = post_temperature(client, source_id, 25, '2022-04-26T12:00:00Z')
+    post_temperature(client, target_id, 23, '2022-04-26T10:00:00Z')
+
+    response = client.patch('/temperatures/{}'.format(temperature_id),
+                            json={'id': temperature_id, 'celsius': 25, 'aquarium_id': target_id})
+    assert response.status_code == 200
+    source_stats, target_stats = stats(client, source_id), stats(client, target_id)
+    assert source_stats['temperature_count'] == 0 and source_stats['latest_temperature'] is None
+    assert target_stats['temperature_count'] == 2 and target_stats['latest_temperature'] == 25
+
+
+def test_stats_after_bulk_insert(client, aquarium_ids):
+    temperatures = [{'celsius': celsius, 'aquarium_id': aquarium_id, 'timestamp': timestamp}
+                    for aquarium_id in aquarium_ids
+                    for celsius, timestamp in ((24, '2022-04-26T10:00:00Z'), (26, '2022-04-26T11:00:00Z'))]
+    assert client.post('/temperatures/batch', json={'temperatures': temperatures}).status_code == 201
+    # duplicates of a retried upload are not counted
+    assert client.post('/temperatures/batch', json={'temperatures': temperatures}).status_code == 200
+
+    for aquarium_id in aquarium_ids:
+        aquarium_stats = stats(client, aquarium_id)
+        assert aquarium_stats['temperature_count'] == 2 and aquarium_stats['latest_temperature'] == 26
+
+
+def test_fertilization_stats(client, aquarium_ids):
+    aquarium_id = aquarium_ids[0]
+    chemical_id = client.post('/chemicals', json={'name': 'Iron'}).get_json()['id']
+    fertilizer_id = client.post('/fertilizers', json={'name': 'Easy Iron', 'chemicals': [chemical_id]}).\
+        get_json()['id']
+    response = client.post('/fertilization', json={'amount_in_milliliter': 5, 'aquarium_id': aquarium_id,
+                                                   'fertilizer_id': fertilizer_id})
+    assert response.status_code == 201
+    assert stats(client, aquarium_id)['fertilization_count'] == 1
+    assert stats(client, aquarium_id)['latest_fertilization_timestamp'] is not None
+
+    assert client.delete('/fertilization/{}'.format(response.get_json()['id'])).status_code == 204
+    assert stats(client, aquarium_id)['fertilization_count'] == 0
+    assert stats(client, aquarium_id)['latest_fertilization_timestamp'] is None
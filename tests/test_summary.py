@@ -0,0 +1,51 @@
+import base64
+import json
+
+import pytest
+
+
+@pytest.fixture
+def aquarium_ids(client):
+    aquarium_ids = [client.post('/aquariums', json={'name': name, 'volume_in_liter': 100}).get_json()['id']
+                    for name in ('Tank', 'Empty tank', 'Other tank', 'Second empty tank')]
+    for aquarium_id, celsius in zip(aquarium_ids[::2], (24, 26)):
+        assert client.post('/temperatures', json={'celsius': celsius, 'aquarium_id': aquarium_id}).status_code == 201
+    return aquarium_ids
+
+
+def summary_pages(client, order_by):
+    query_string = {'order-by': order_by, 'items-per-page': 1}
+    while True:
+        response = client.get('/aquariums/summary', query_string=query_string)
+        assert response.status_code == 200
+        yield response.get_json()['content']
+        if not response.get_json()['next']:
+            return
+        query_string['after'] = response.get_json()['next']
+
+
+@pytest.mark.parametrize('order_by, expected_temperatures', [
+    ('avg:asc', [24, 26, None, None]),
+    ('avg:desc', [26, 24, None, None]),
+    ('max:asc', [24, 26, None, None]),
+])
+def test_aquariums_without_temperatures_last(client, aquarium_ids, order_by, expected_temperatures):
+    pages = list(summary_pages(client, order_by))
+    summaries = [summary for page in pages for summary in page]
+    assert len(pages) == len(aquarium_ids)
+    assert [summary['avg_temperature'] for summary in summaries] == expected_temperatures
+    assert sorted(summary['id'] for summary in summaries) == aquarium_ids
+    # the aquariums without a value are ordered by id in the direction of the request
+    empty_ids = [summary['id'] for summary in summaries[2:]]
+    assert empty_ids == sorted(empty_ids, reverse=order_by.endswith('desc'))
+
+
+def test_cursor_of_aquarium_without_temperatures(client, aquarium_ids):
+    response = client.get('/aquariums/summary', query_string={'order-by': 'avg:asc', 'items-per-page': 3})
+    cursor = json.loads(base64.urlsafe_b64decode(response.get_json()['next']))
+    # the flag instead of a placeholder temperature
+    assert cursor[3:] == [True, None, response.get_json()['content'][-1]['id']]
+
+    query_string = {'order-by': 'avg:asc', 'after': response.get_json()['next']}
+    response = client.get('/aquariums/summary', query_string=query_string)
+    assert [summary['avg_temperature'] for summary in response.get_json()['content']] == [None]
@@ -0,0 +1,124 @@
+"""
+Benchmark of the synchronous (flask) and the asynchronous (app/asgi.py) read path under concurrent load.
+
+Both paths run in process against the same SQLite file, so only the request handling and database access are measured.
+The synchronous path is limited by its worker threads, the asynchronous path by the number of concurrent requests.
+
+    python tools/benchmark_async_reads.py --rows 200000 --requests 400 --concurrency 50 --threads 8
+
+Requires aiosqlite.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from app.asgi import create_asgi_app  # noqa: E402
+from app.config import TestConfig  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.main.models import Aquarium, AquariumTemperature  # noqa: E402
+
+
+def seed(flask_app, aquariums, rows):
+    now = datetime.utcnow()
+    with flask_app.app_context():
+        db.create_all()
+        db.session.execute(Aquarium.__table__.insert(),
+                           [{'name': 'aquarium_{}'.format(i), 'volume_in_liter': 100} for i in range(aquariums)])
+        chunk = []
+        for i in range(rows):
+            chunk.append({'temperature': random.uniform(18, 30), 'timestamp': now - timedelta(minutes=i),
+                          'aquarium_id': i % aquariums + 1})
+            if len(chunk) == 10000:
+                db.session.execute(AquariumTemperature.__table__.insert(), chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(AquariumTemperature.__table__.insert(), chunk)
+        db.session.commit()
+
+
+def request_paths(count, aquariums):
+    # sorting by celsius has no index and stands in for a slow query
+    return ['/temperatures?order-by=celsius:desc&aquarium-id={}&page={}'.format(random.randint(1, aquariums),
+                                                                                random.randint(1, 20))
+            for _ in range(count)]
+
+
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print('{:>6}: {:8.1f} requests/s, p50 {:7.1f} ms, p95 {:7.1f} ms'.format(
+        name, len(latencies) / elapsed, statistics.median(latencies) * 1000, p95 * 1000))
+
+
+def run_sync(flask_app, paths, threads):
+    def get(path):
+        start = time.perf_counter()
+        response = flask_app.test_client().get(path)
+        assert response.status_code == 200, response.data
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(get, paths))
+    report('sync', latencies, time.perf_counter() - start)
+
+
+async def run_async(asgi_app, paths, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def get(path):
+        route, query_string = path.split('?', 1)
+        scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'path': route,
+                 'root_path': '', 'query_string': query_string.encode(), 'headers': []}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            start = time.perf_counter()
+            await asgi_app(scope, receive, send)
+            assert messages[0]['status'] == 200, messages
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(get(path) for path in paths))
+    report('async', latencies, time.perf_counter() - start)
+    await asgi_app.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='temperature rows to seed')
+    parser.add_argument('--aquariums', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8, help='worker threads of the synchronous path')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent requests of the asynchronous path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchmarkConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'benchmark.db')
+
+        asgi_app = create_asgi_app(BenchmarkConfig)
+        seed(asgi_app.flask_app, args.aquariums, args.rows)
+        paths = request_paths(args.requests, args.aquariums)
+
+        run_sync(asgi_app.flask_app, paths, args.threads)
+        asyncio.run(run_async(asgi_app, paths, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
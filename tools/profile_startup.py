@@ -0,0 +1,71 @@
+"""
+Import time profile of the application startup (``import run_app``).
+
+Runs the import in a fresh interpreter with ``python -X importtime``, prints the slowest modules and fails when the
+startup exceeds the time budget or eagerly imports a module that is meant to be loaded lazily. Suitable as a CI check.
+
+    python tools/profile_startup.py --budget-ms 400
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# modules that only some processes need, see app/lazy.py
+LAZY_MODULES = (
+    'alembic',
+    'flask_migrate',
+    'app.main.resources.resources',
+    'app.main.api_parser',
+)
+
+
+def profile(module):
+    """
+    :param module: Module to import.
+    :return: Dict of imported module names to their cumulative import time in microseconds.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='run_app')
+    parser.add_argument('--budget-ms', type=float, default=400)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--runs', type=int, default=3, help='the fastest run is compared against the budget')
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    timings = min(runs, key=lambda t: t[args.module])
+    total_ms = timings[args.module] / 1000
+
+    print('slowest imports (cumulative):')
+    for name, cumulative in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print('{:10.1f} ms  {}'.format(cumulative / 1000, name))
+
+    errors = []
+    if total_ms > args.budget_ms:
+        errors.append('import {} took {:.1f} ms, budget is {:.1f} ms'.format(args.module, total_ms, args.budget_ms))
+    for name in LAZY_MODULES:
+        if name in timings:
+            errors.append('{} is imported at startup but should be loaded lazily'.format(name))
+
+    print('\nimport {}: {:.1f} ms (budget {:.1f} ms)'.format(args.module, total_ms, args.budget_ms))
+    for error in errors:
+        print('FAIL: ' + error)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()